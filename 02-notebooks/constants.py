@@ -1,12 +1,34 @@
-# Place all your constants here
-import os
-
-# Note: constants should be UPPER_CASE
-constants_path = os.path.realpath(__file__)
-SRC_PATH = os.path.dirname(constants_path)
-PROJECT_PATH = os.path.dirname(SRC_PATH)
-
-
-# The larger study area to use for earth engine this study uses the coastline of the Santa Monica bay
-
-STUDY_BOUNDARY_PATH = os.path.join(PROJECT_PATH,'00-data','study_boundary.gpkg')
+# Place all your constants here
+import importlib.util
+import os
+
+# Note: constants should be UPPER_CASE
+constants_path = os.path.realpath(__file__)
+SRC_PATH = os.path.dirname(constants_path)
+PROJECT_PATH = os.path.dirname(SRC_PATH)
+
+
+# The notebooks share the study boundary, the statistics store, the scene index, the algorithm versions
+# and coefficients with the app, so they are defined once, in 04-hf-files/public/constants.py. Both
+# modules are called constants, the app's is loaded by path as app_constants
+
+APP_CONSTANTS_PATH = os.path.join(PROJECT_PATH, '04-hf-files', 'public', 'constants.py')
+_spec = importlib.util.spec_from_file_location('app_constants', APP_CONSTANTS_PATH)
+app_constants = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(app_constants)
+
+STUDY_BOUNDARY_PATH = app_constants.STUDY_BOUNDARY_PATH
+STUDY_AREA_CRS = app_constants.STUDY_AREA_CRS
+AOI_TIER_TOLERANCES = app_constants.AOI_TIER_TOLERANCES
+
+STATS_STORE_PATH = app_constants.STATS_STORE_PATH
+SCENE_INDEX_PATH = app_constants.SCENE_INDEX_PATH
+ALGORITHM_VERSIONS = app_constants.ALGORITHM_VERSIONS
+
+OPTICAL_SCALE = app_constants.OPTICAL_SCALE
+OPTICAL_OFFSET = app_constants.OPTICAL_OFFSET
+THERMAL_SCALE = app_constants.THERMAL_SCALE
+THERMAL_OFFSET = app_constants.THERMAL_OFFSET
+TRINH_CHL_A = app_constants.TRINH_CHL_A
+NOVOA_SPM = app_constants.NOVOA_SPM
+ANSARI_SALINITY = app_constants.ANSARI_SALINITY
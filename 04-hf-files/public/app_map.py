@@ -0,0 +1,213 @@
+import geemap
+import ipyleaflet
+import traitlets
+
+from boundary import load_boundary
+from constants import LAYER_DATES, STUDY_BOUNDARY_PATH
+from functions import ImageFunctions
+from layer_cache import CachedLayer, LayerCache
+from layer_loader import LayerLoader
+from load_process import COLORBAR_LABELS, PRODUCT_METHODS, VIS_PARAMS, ImageProcess
+from prefilter import MIN_USABLE_FRACTION
+from scene_index import INDEXED_COLLECTIONS, SceneIndex
+from session import session_context, session_id
+from tile_pyramid import TILE_PYRAMID
+from tracing import TRACER
+
+# Product shown when a session starts
+DEFAULT_PRODUCT = 'True Color'
+
+
+def ensure_earth_engine():
+    # Initializes Earth Engine on first use, later calls return right away
+    with TRACER.span('ee_initialize'):
+        geemap.ee_initialize()
+
+
+def prepare():
+    """
+    Does the slow part of the app startup: imports geemap and Earth Engine (by importing this module),
+    loads the study boundary and, unless the default view is in the local tile pyramid, initializes
+    Earth Engine, so the first Map only builds its layers
+    :return: The Map class
+    :rtype: type
+    """
+    with TRACER.span('startup', session=session_id()):
+        boundary = load_boundary(STUDY_BOUNDARY_PATH)
+        # 'display' is the AOI tier ImageProcess clips the layers to
+        if TILE_PYRAMID.url_formats(DEFAULT_PRODUCT, LAYER_DATES, VIS_PARAMS[DEFAULT_PRODUCT], 'display') is None:
+            ensure_earth_engine()
+            boundary.ee_boundary
+    return Map
+
+
+def available_dates():
+    """
+    Lists the dates the date picker offers, from the local scene index (see scene_index.py). The app only
+    reads the index, it is updated by the scripts and the scene_index.py command
+    :return: Dates with enough clear water over the bay, newest first, LAYER_DATES included
+    :rtype: List
+    """
+    with TRACER.span('available_dates'):
+        indexed = SceneIndex().dates(INDEXED_COLLECTIONS[0], load_boundary(STUDY_BOUNDARY_PATH).aoi_key,
+                                     min_usable_fraction=MIN_USABLE_FRACTION)
+    return sorted(set(indexed) | set(LAYER_DATES), reverse=True)
+
+
+class Map(geemap.Map):
+    # Layer loading progress of the current selection, observed by Page through on_progress
+    progress = traitlets.Dict({})
+
+    def __init__(self, selected_image_type=DEFAULT_PRODUCT, dates=None, **kwargs):
+        print("__init__")
+        # Earth Engine is initialized only once a layer is not in the local tile pyramid
+        super().__init__(ee_initialize=False, **kwargs)
+        self.functions = ImageProcess(self)
+        self.functions.dates = list(dates) if dates else self.default_dates()
+        self.image_functions = ImageFunctions()
+        # Layers computed in this session, so toggling back to a product only shows them again
+        self.layer_cache = LayerCache()
+        # Map IDs are resolved on a worker pool, layers are attached as they complete
+        self.loader = LayerLoader(max_workers=4, context=session_context(), on_progress=self.on_loader_progress)
+        self._recorded_generation = 0
+        self.session_id = session_id()
+        # Span of the current selection, ended once its last layer is attached
+        self._toggle_span = None
+        self.add_layer_manager()
+        self._selected_image_type = selected_image_type
+        self.update_image()
+
+    @property
+    def selected_image_type(self):
+        return self._selected_image_type
+
+    @selected_image_type.setter
+    def selected_image_type(self, new_image_type):
+        # Solara sets the element's props on every render, only a changed product triggers an update
+        if new_image_type != self._selected_image_type:
+            self.set_selected_image_type(new_image_type)
+
+    @staticmethod
+    def default_dates():
+        # Dates a session opens with, those of the local tile pyramid
+        return list(LAYER_DATES)
+
+    @property
+    def dates(self):
+        return self.functions.dates
+
+    @dates.setter
+    def dates(self, new_dates):
+        # Dates picked in the page, an empty pick goes back to the default dates
+        new_dates = list(new_dates) if new_dates else self.default_dates()
+        if new_dates != self.functions.dates:
+            self.functions.dates = new_dates
+            self.update_image()
+
+    def addLayer(self, ee_object, vis_params=None, name=None, shown=True, opacity=1.0):
+        product = self.selected_image_type
+        key = self.layer_cache.key(product, name, vis_params, self.functions.aoi_tier)
+        layer = self.layer_cache.get(key)
+        if layer is not None:
+            self.show_layer(layer, f"{product} {name}", shown, opacity)
+            self.loader.skip()
+            return
+        self.loader.submit(
+            key,
+            lambda: self.layer_cache.put(key, ee_object, vis_params),
+            lambda layer: self.show_layer(layer, f"{product} {name}", shown, opacity),
+        )
+
+    def attach_layers(self, layers):
+        # Batch from ImageProcess.attach_layers, resolved through the layer cache and the loader pool
+        for date, image, vis_params in layers:
+            self.addLayer(image, vis_params, date, shown=True)
+
+    def attach_local_layers(self, product, url_formats):
+        # Layers of the local tile pyramid, shown right away without any Earth Engine request
+        vis_params = VIS_PARAMS[product]
+        for date, url_format, max_zoom in url_formats:
+            key = self.layer_cache.key(product, date, vis_params, self.functions.aoi_tier)
+            layer = self.layer_cache.get(key)
+            if layer is None:
+                layer = self.layer_cache.store(key, CachedLayer(None, url_format, max_native_zoom=max_zoom))
+            self.show_layer(layer, f"{product} {date}")
+            self.loader.skip()
+        if product in COLORBAR_LABELS:
+            self.functions.add_colorbar(self, product)
+
+    def show_layer(self, layer, name, shown=True, opacity=1.0):
+        if layer.tile_layer is None:
+            # Local tiles stop at the pyramid's highest zoom, Leaflet scales them up beyond it
+            native_zoom = {} if layer.max_native_zoom is None else {'max_native_zoom': layer.max_native_zoom}
+            layer.tile_layer = ipyleaflet.TileLayer(
+                url=layer.url_format,
+                name=name,
+                attribution="Google Earth Engine",
+                max_zoom=24,
+                **native_zoom,
+            )
+            self.add_layer(layer.tile_layer)
+        layer.tile_layer.opacity = opacity
+        layer.tile_layer.visible = shown
+        self.order_layers()
+
+    def order_layers(self):
+        # Layers are attached as they complete on the loader pool; the overlapping dates of the selection
+        # are kept in date order on top of the other layers, so the same date is on top at every load
+        rank = {f"{self.selected_image_type} {date}": index for index, date in enumerate(self.functions.dates)}
+        selected = sorted((layer for layer in self.layers if layer.name in rank), key=lambda layer: rank[layer.name])
+        ordered = tuple(layer for layer in self.layers if layer.name not in rank) + tuple(selected)
+        if ordered != tuple(self.layers):
+            self.layers = ordered
+
+    def on_loader_progress(self, progress):
+        if progress['complete'] and progress['generation'] != self._recorded_generation:
+            self._recorded_generation = progress['generation']
+            self.layer_cache.record_toggle(self.selected_image_type, progress['elapsed'])
+            if self._toggle_span is not None:
+                # The session's layer cache counters go with the toggle into the trace log
+                self._toggle_span.set(**{f'layer_cache_{key}': value for key, value in self.layer_cache.stats().items()})
+                TRACER.end(self._toggle_span)
+        self.progress = progress
+
+    def update_image(self):
+        print("update_image called")
+        # A new selection cancels the queued layers of the previous one
+        if self._toggle_span is not None and not self._toggle_span.finished:
+            self._toggle_span.set(cancelled=True)
+            TRACER.end(self._toggle_span)
+        self._toggle_span = TRACER.start('toggle', session=self.session_id, product=self.selected_image_type)
+        self.loader.start()
+
+        # Hide the previous product's layers and colorbar, the layers stay cached on the map
+        for layer in self.layer_cache.layers():
+            if layer.tile_layer is not None:
+                layer.tile_layer.visible = False
+        for colorbar in getattr(self, "colorbars", []):
+            if colorbar in self.controls:
+                self.remove_control(colorbar)
+        self.colorbars = []
+
+        # Spans of the layer requests, including those run on the loader pool, nest under the toggle
+        product = self.selected_image_type
+        with TRACER.activate(self._toggle_span):
+            url_formats = TILE_PYRAMID.url_formats(product, self.functions.dates, VIS_PARAMS[product],
+                                                   self.functions.aoi_tier)
+            TRACER.cache('tile_pyramid', url_formats is not None, product=product)
+            if url_formats is not None:
+                self.attach_local_layers(product, url_formats)
+            else:
+                ensure_earth_engine()
+                getattr(self.functions, PRODUCT_METHODS[product])(self, STUDY_BOUNDARY_PATH)
+
+        self.loader.finish()
+
+    def close(self):
+        # Solara closes the widget when the page unmounts it or the session ends, the loader pool goes with it
+        self.loader.shutdown()
+        super().close()
+
+    def set_selected_image_type(self, new_image_type):
+        self._selected_image_type = new_image_type
+        self.update_image()
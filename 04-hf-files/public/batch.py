@@ -0,0 +1,141 @@
+"""
+Reprocesses an archive of downloaded Landsat 8/9 Collection 2 Level 2 scenes on a process pool.
+
+    python 04-hf-files/public/batch.py ARCHIVE_DIRECTORY OUTPUT_DIRECTORY --workers 4
+
+Every sub-directory of the archive holding a *_QA_PIXEL.TIF is a scene. Each worker process reads
+its scene's bands window by window straight from the GeoTIFFs (WindowedProcessor), so no band
+arrays are pickled between processes; only paths go in and per-product statistics come back.
+Per scene, a Cloud-Optimized GeoTIFF with one band per product is written to the output directory
+and one row per product is stored in the statistics store under the LOCAL source, apart from the
+Earth Engine rows. Scenes whose raster exists and whose statistics are stored are skipped, so an
+interrupted run continues where it stopped.
+"""
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from boundary import load_boundary
+from constants import STATS_STORE_PATH, STUDY_BOUNDARY_PATH
+from local_functions import PRECISIONS, PRODUCT_BANDS
+from stats_store import LOCAL, StatsStore
+from windowed import WindowedProcessor
+
+BATCH_PRODUCTS = ('ln_chl_a', 'spm', 'salinity', 'ST_B10_Celsius')
+
+# Processor of the worker process, created once by the pool initializer
+_processor = None
+
+
+def find_scenes(archive_directory):
+    """
+    Lists the scenes of an archive
+    :param archive_directory: Directory with one sub-directory per scene
+    :type archive_directory: String
+    :return: (scene_id, date, scene directory) tuples sorted by scene_id, scene_id like LC08_041036_20211111
+        to match the Earth Engine system:index
+    :rtype: List
+    """
+    scenes = []
+    for qa_path in glob.glob(os.path.join(archive_directory, '**', '*_QA_PIXEL.TIF'), recursive=True):
+        # e.g. LC08_L2SP_041036_20211111_20211117_02_T1_QA_PIXEL.TIF
+        parts = os.path.basename(qa_path).split('_')
+        sensor, path_row, acquired = parts[0], parts[2], parts[3]
+        date = f'{acquired[:4]}-{acquired[4:6]}-{acquired[6:8]}'
+        scenes.append((f'{sensor}_{path_row}_{acquired}', date, os.path.dirname(qa_path)))
+    return sorted(scenes)
+
+
+def _initialize(block_size, products, boundary_path, precision):
+    global _processor
+    _processor = WindowedProcessor(block_size, products, boundary_path, precision)
+
+
+def _process_scene(scene_id, scene_directory, output_path):
+    # Runs in a worker process
+    return scene_id, _processor.process(scene_directory, output_path)
+
+
+def run(archive_directory, output_directory, workers=os.cpu_count(), block_size=512,
+        products=BATCH_PRODUCTS, boundary_path=STUDY_BOUNDARY_PATH, store=None, precision='float64'):
+    """
+    Processes every scene of the archive that is not complete yet
+    :param archive_directory: Directory with one sub-directory per scene
+    :type archive_directory: String
+    :param output_directory: Directory of the <scene_id>_products.tif rasters
+    :type output_directory: String
+    :param workers: Number of worker processes
+    :type workers: Integer
+    :param block_size: Window size of WindowedProcessor, bounds the memory of every worker
+    :type block_size: Integer
+    :param products: Products computed for every scene, keys of local_functions.PRODUCT_BANDS
+    :type products: Tuple
+    :param boundary_path: Study boundary the scenes are clipped to
+    :type boundary_path: String
+    :param store: Statistics store, the default store when None
+    :type store: StatsStore
+    :param precision: 'float64' or 'float32', the compute precision of LocalImageFunctions
+    :type precision: String
+    :return: Number of scenes processed and the throughput in scenes per minute
+    :rtype: Tuple
+    """
+    store = StatsStore() if store is None else store
+    aoi_key = load_boundary(boundary_path).aoi_key
+    os.makedirs(output_directory, exist_ok=True)
+
+    scenes = find_scenes(archive_directory)
+    known = {product: store.known_scenes(product, aoi_key, LOCAL) for product in products}
+    pending = []
+    for scene_id, date, scene_directory in scenes:
+        output_path = os.path.join(output_directory, f'{scene_id}_products.tif')
+        if os.path.exists(output_path) and all(scene_id in known[product] for product in products):
+            continue
+        pending.append((scene_id, date, scene_directory, output_path))
+    print(f'{len(scenes)} scenes, {len(scenes) - len(pending)} complete, {len(pending)} to process')
+    if not pending:
+        return 0, 0.0
+
+    dates = {scene_id: date for scene_id, date, _, _ in pending}
+    start = time.perf_counter()
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initialize,
+                             initargs=(block_size, tuple(products), boundary_path, precision)) as executor:
+        futures = [executor.submit(_process_scene, scene_id, scene_directory, output_path)
+                   for scene_id, _, scene_directory, output_path in pending]
+        for future in as_completed(futures):
+            try:
+                scene_id, statistics = future.result()
+            except Exception as e:
+                print(f'Scene failed: {e}')
+                continue
+            for product, values in statistics.items():
+                store.insert(product, aoi_key, [(scene_id, dates[scene_id], values['mean'], values['area'])], LOCAL)
+            done += 1
+            rate = done / (time.perf_counter() - start) * 60
+            print(f'{done}/{len(pending)} {scene_id} ({rate:.1f} scenes/min)')
+
+    rate = done / (time.perf_counter() - start) * 60
+    print(f'Processed {done} scenes at {rate:.1f} scenes/min')
+    return done, rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('archive_directory')
+    parser.add_argument('output_directory')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--block-size', type=int, default=512)
+    parser.add_argument('--products', nargs='+', default=list(BATCH_PRODUCTS), choices=list(PRODUCT_BANDS))
+    parser.add_argument('--boundary', default=STUDY_BOUNDARY_PATH)
+    parser.add_argument('--store', default=STATS_STORE_PATH, help='statistics store (SQLite)')
+    parser.add_argument('--precision', default='float64', choices=list(PRECISIONS))
+    args = parser.parse_args()
+
+    run(args.archive_directory, args.output_directory, args.workers, args.block_size,
+        tuple(args.products), args.boundary, StatsStore(args.store), args.precision)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+
+import ee
+import geopandas as gpd
+
+from constants import AOI_TIER_TOLERANCES, STUDY_AREA_CRS, STUDY_BOUNDARY_PATH
+from shared_cache import BOUNDARY_CACHE
+from stats_store import aoi_hash
+
+
+def count_vertices(geometry):
+    polygons = getattr(geometry, 'geoms', [geometry])
+    return sum(len(polygon.exterior.coords) + sum(len(ring.coords) for ring in polygon.interiors) for polygon in polygons)
+
+
+class AoiTier:
+    """
+    One simplification level of the study boundary, with its area and its Hausdorff
+    distance from the full-resolution boundary, both in metres of STUDY_AREA_CRS.
+    """
+
+    def __init__(self, name, tolerance, geometry, projected, original_projected):
+        self.name = name
+        self.tolerance = tolerance
+        self.geometry = geometry
+        self.area = projected.area
+        self.area_error = abs(projected.area - original_projected.area)
+        self.hausdorff_error = projected.hausdorff_distance(original_projected)
+        self.vertex_count = count_vertices(projected)
+        self._ee_boundary = None
+        self._lock = threading.Lock()
+
+    @property
+    def ee_boundary(self):
+        # Converted lazily so that loading the boundary does not require an Earth Engine session
+        with self._lock:
+            if self._ee_boundary is None:
+                # Same conversion as geemap.geopandas_to_ee, without importing geemap
+                geojson = json.loads(gpd.GeoDataFrame(geometry=[self.geometry], crs='EPSG:4326').to_json())
+                self._ee_boundary = ee.FeatureCollection(geojson)
+            return self._ee_boundary
+
+    @property
+    def ee_geometry(self):
+        return self.ee_boundary.geometry()
+
+    def summary(self):
+        return {
+            'tier': self.name,
+            'tolerance': self.tolerance,
+            'area': self.area,
+            'area_error': self.area_error,
+            'hausdorff_error': self.hausdorff_error,
+            'vertices': self.vertex_count,
+        }
+
+
+class Boundary:
+    """
+    A study boundary loaded once per process: the parsed GeoDataFrame, its dissolved geometry,
+    the simplified AOI tiers and their converted Earth Engine objects.
+    """
+
+    def __init__(self, path, mtime):
+        self.path = path
+        self.mtime = mtime
+        self.gdf = gpd.read_file(path)
+        self.geometry = self.gdf.to_crs('EPSG:4326').geometry.union_all()
+
+        # Simplify in the projected study-area CRS so the tolerances are in metres
+        projected = self.gdf.to_crs(STUDY_AREA_CRS).geometry.union_all()
+        self.tiers = {}
+        for name, tolerance in AOI_TIER_TOLERANCES.items():
+            simplified = projected.simplify(tolerance, preserve_topology=True) if tolerance else projected
+            geometry = gpd.GeoSeries([simplified], crs=STUDY_AREA_CRS).to_crs('EPSG:4326').iloc[0]
+            self.tiers[name] = AoiTier(name, tolerance, geometry, simplified, projected)
+
+    def tier(self, purpose='display'):
+        """
+        Returns the AOI tier for a purpose
+        :param purpose: One of the AOI_TIER_TOLERANCES keys: 'display', 'analysis' or 'exact'
+        :type purpose: String
+        :return: The simplified boundary tier
+        :rtype: AoiTier
+        """
+        if purpose not in self.tiers:
+            raise ValueError(f"Unknown AOI tier '{purpose}', expected one of {list(self.tiers)}")
+        return self.tiers[purpose]
+
+    @property
+    def ee_boundary(self):
+        # Scene lookups only need an intersection test, so the coarsest tier is enough
+        return self.tier('display').ee_boundary
+
+    def aoi(self, purpose='display'):
+        return self.tier(purpose).ee_geometry
+
+    @property
+    def aoi_key(self):
+        # Key of the boundary in the scene index and the statistics store, the same for the app and the scripts
+        return aoi_hash(self.geometry)
+
+    def tier_summary(self):
+        return [tier.summary() for tier in self.tiers.values()]
+
+
+class BoundaryRegistry:
+    """
+    Server-wide cache of study boundaries keyed on the file path and its modification time,
+    so a changed GeoPackage is re-read automatically and an unchanged one is parsed only once.
+    The boundaries live in the shared BOUNDARY_CACHE, sessions loading one at the same time share the load.
+    """
+
+    def __init__(self, cache=BOUNDARY_CACHE):
+        self._cache = cache
+        self._mtimes = {}
+        self._lock = threading.Lock()
+
+    def get(self, path=STUDY_BOUNDARY_PATH):
+        """
+        Returns the cached boundary for a path, loading it on first use or after the file changed
+        :param path: Path to the boundary GeoPackage or GeoJSON
+        :type path: String
+        :return: The loaded boundary
+        :rtype: Boundary
+        """
+        path = os.path.realpath(path)
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            previous = self._mtimes.get(path)
+            self._mtimes[path] = mtime
+        if previous is not None and previous != mtime:
+            # The file changed, drop the boundary of the old version
+            self._cache.invalidate((path, previous))
+        return self._cache.get_or_compute((path, mtime), lambda: Boundary(path, mtime))
+
+    def invalidate(self, path=None):
+        # Drop one boundary, or every boundary when no path is given
+        with self._lock:
+            paths = list(self._mtimes) if path is None else [os.path.realpath(path)]
+            for invalidated in paths:
+                mtime = self._mtimes.pop(invalidated, None)
+                if mtime is not None:
+                    self._cache.invalidate((invalidated, mtime))
+
+    def stats(self):
+        metrics = self._cache.metrics()
+        return {'hits': metrics['hits'], 'misses': metrics['misses'], 'entries': metrics['entries']}
+
+
+BOUNDARY_REGISTRY = BoundaryRegistry()
+
+
+def load_boundary(path=STUDY_BOUNDARY_PATH):
+    return BOUNDARY_REGISTRY.get(path)
@@ -1,73 +1,134 @@
-# Place all your constants here
-import os
-
-# Note: constants should be UPPER_CASE
-constants_path = os.path.realpath(__file__)
-SRC_PATH = os.path.dirname(constants_path)
-PROJECT_PATH = os.path.dirname(SRC_PATH)
-
-
-
-# The larger study area to use for earth engine this study uses the coastline of the Santa Monica bay
-
-STUDY_BOUNDARY_PATH = os.path.join(SRC_PATH,'study_boundary.gpkg')
-
-TURBO_PALETTE = [
-    "30123b", "321543", "33184a", "341b51", "351e58", "36215f", "372466", "38276d", 
-    "392a73", "3a2d79", "3b2f80", "3c3286", "3d358b", "3e3891", "3f3b97", "3f3e9c", 
-    "4040a2", "4143a7", "4146ac", "4249b1", "424bb5", "434eba", "4451bf", "4454c3", 
-    "4456c7", "4559cb", "455ccf", "455ed3", "4661d6", "4664da", "4666dd", "4669e0", 
-    "466be3", "476ee6", "4771e9", "4773eb", "4776ee", "4778f0", "477bf2", "467df4", 
-    "4680f6", "4682f8", "4685fa", "4687fb", "458afc", "458cfd", "448ffe", "4391fe", 
-    "4294ff", "4196ff", "4099ff", "3e9bfe", "3d9efe", "3ba0fd", "3aa3fc", "38a5fb", 
-    "37a8fa", "35abf8", "33adf7", "31aff5", "2fb2f4", "2eb4f2", "2cb7f0", "2ab9ee", 
-    "28bceb", "27bee9", "25c0e7", "23c3e4", "22c5e2", "20c7df", "1fc9dd", "1ecbda", 
-    "1ccdd8", "1bd0d5", "1ad2d2", "1ad4d0", "19d5cd", "18d7ca", "18d9c8", "18dbc5", 
-    "18ddc2", "18dec0", "18e0bd", "19e2bb", "19e3b9", "1ae4b6", "1ce6b4", "1de7b2", 
-    "1fe9af", "20eaac", "22ebaa", "25eca7", "27eea4", "2aefa1", "2cf09e", "2ff19b", 
-    "32f298", "35f394", "38f491", "3cf58e", "3ff68a", "43f787", "46f884", "4af880", 
-    "4ef97d", "52fa7a", "55fa76", "59fb73", "5dfc6f", "61fc6c", "65fd69", "69fd66", 
-    "6dfe62", "71fe5f", "75fe5c", "79fe59", "7dff56", "80ff53", "84ff51", "88ff4e", 
-    "8bff4b", "8fff49", "92ff47", "96fe44", "99fe42", "9cfe40", "9ffd3f", "a1fd3d", "a4fc3c", "a7fc3a", "a9fb39", "acfb38", 
-    "affa37", "b1f936", "b4f836", "b7f735", "b9f635", "bcf534", "bef434", "c1f334", 
-    "c3f134", "c6f034", "c8ef34", "cbed34", "cdec34", "d0ea34", "d2e935", "d4e735", 
-    "d7e535", "d9e436", "dbe236", "dde037", "dfdf37", "e1dd37", "e3db38", "e5d938", 
-    "e7d739", "e9d539", "ebd339", "ecd13a", "eecf3a", "efcd3a", "f1cb3a", "f2c93a", 
-    "f4c73a", "f5c53a", "f6c33a", "f7c13a", "f8be39", "f9bc39", "faba39", "fbb838", 
-    "fbb637", "fcb336", "fcb136", "fdae35", "fdac34", "fea933", "fea732", "fea431", 
-    "fea130", "fe9e2f", "fe9b2d", "fe992c", "fe962b", "fe932a", "fe9029", "fd8d27", 
-    "fd8a26", "fc8725", "fc8423", "fb8122", "fb7e21", "fa7b1f", "f9781e", "f9751d", 
-    "f8721c", "f76f1a", "f66c19", "f56918", "f46617", "f36315", "f26014", "f15d13", 
-    "f05b12", "ef5811", "ed5510", "ec530f", "eb500e", "ea4e0d", "e84b0c", "e7490c", 
-    "e5470b", "e4450a", "e2430a", "e14109", "df3f08", "dd3d08", "dc3b07", "da3907", 
-    "d83706", "d63506", "d43305", "d23105", "d02f05", "ce2d04", "cc2b04", "ca2a04", 
-    "c82803", "c52603", "c32503", "c12302", "be2102", "bc2002", "b91e02", "b71d02", 
-    "b41b01", "b21a01", "af1801", "ac1701", "a91601", "a71401", "a41301", "a11201", 
-    "9e1001", "9b0f01", "980e01", "950d01", "920b01", "8e0a01", "8b0902", "880802", 
-    "850702", "810602", "7e0502", "7a0403"
-]
-
-
-VIRIDIS_PALETTE = [
-    '440154', '440256', '450457', '450559', '46075a', '46085c', '460a5d', '460b5e', '470d60', 
-    '470e61', '471063', '471164', '471365', '481467', '481668', '481769', '48186a', '481a6c', 
-    '481b6d', '481c6e', '481d6f', '481f70', '482071', '482173', '482374', '482475', '482576', 
-    '482677', '482878', '482979', '472a7a', '472c7a', '472d7b', '472e7c', '472f7d', '46307e', 
-    '46327e', '46337f', '463480', '453581', '453781', '453882', '443983', '443a83', '443b84', 
-    '433d84', '433e85', '423f85', '424086', '424186', '414287', '414487', '404588', '404688', 
-    '3f4788', '3f4889', '3e4989', '3e4a89', '3e4c8a', '3d4d8a', '3d4e8a', '3c4f8a', '3c508b', 
-    '3b518b', '3b528b', '3a538b', '3a548c', '39558c', '39568c', '38588c', '38598c', '375a8c', 
-    '375b8d', '365c8d', '365d8d', '355e8d', '355f8d', '34608d', '34618d', '33628d', '33638d', 
-    '32648e', '32658e', '31668e', '31678e', '30688e', '30698e', '2f6a8e', '2f6b8e', '2e6c8e', 
-    '2e6d8e', '2d6e8e', '2d6f8e', '2c708e', '2c718e', '2b728e', '2b738e', '2a748e', '2a758e', 
-    '29768e', '29778e', '28788e', '28798e', '277a8e', '277b8e', '267c8e', '267d8e', '257e8e', 
-    '257f8e', '24808e', '24818e', '23828e', '23828e', '22838e', '22848e', '21858e', '21868e', 
-    '20878e', '20888e', '1f898e', '1f8a8d', '1e8b8d', '1e8c8d', '1d8d8d', '1d8e8d', '1c8f8d', 
-    '1c8f8d', '1b908c', '1b918c', '1a928c', '1a938b', '19948b', '19958b', '18968a', '18978a', 
-    '17988a', '179989', '169a89', '169b88', '159c88', '159d87', '149e87', '149f86', '13a086', 
-    '13a185', '12a285', '12a384', '11a483', '11a583', '10a682', '10a781', '0fa881', '0fa980', 
-    '0eaa7f', '0eab7e', '0dac7e', '0dad7d', '0cae7c', '0caf7b', '0bb07a', '0bb179', '0ab278', 
-    '0ab377', '09b476', '09b575', '08b674', '08b773', '07b872', '07b971', '06ba70', '06bb6f', 
-    '05bc6e', '05bd6d', '04be6c', '04bf6b', '03c06a', '03c169', '02c268', '02c367', '01c466', 
-    '01c565', '00c664'
+# Place all your constants here
+import os
+
+# Note: constants should be UPPER_CASE
+constants_path = os.path.realpath(__file__)
+SRC_PATH = os.path.dirname(constants_path)
+PROJECT_PATH = os.path.dirname(SRC_PATH)
+
+
+
+# The larger study area to use for earth engine this study uses the coastline of the Santa Monica bay
+
+STUDY_BOUNDARY_PATH = os.path.join(SRC_PATH,'study_boundary.gpkg')
+
+# Local store of per-scene statistics, see stats_store.py
+
+STATS_STORE_PATH = os.path.join(PROJECT_PATH, 'cache', 'statistics.sqlite')
+
+# Local index of the Landsat scenes over the study area, see scene_index.py
+
+SCENE_INDEX_PATH = os.path.join(PROJECT_PATH, 'cache', 'scenes.sqlite')
+
+# Projected CRS for the study area (WGS 84 / UTM zone 11N), used for distances and areas in metres
+
+STUDY_AREA_CRS = 'EPSG:32611'
+
+# Simplification tolerances in metres for the AOI tiers used in clip and reduceRegion.
+# 'display' is for map layers, 'analysis' stays within half a 30 m Landsat pixel, 'exact' is the original boundary
+
+AOI_TIER_TOLERANCES = {
+    'display': 60,
+    'analysis': 15,
+    'exact': 0,
+}
+
+# Landsat Collection 2 Level-2 scale factors and algorithm coefficients, shared by the
+# Earth Engine (functions.py) and local NumPy (local_functions.py) implementations
+
+OPTICAL_SCALE = 0.0000275
+OPTICAL_OFFSET = -0.2
+THERMAL_SCALE = 0.00341802
+THERMAL_OFFSET = 149.0
+
+# Trinh et al. (2017) ln(chl-a) = a_0 + a_1 * log(blue / green)
+TRINH_CHL_A = {'a_0': 0.9375, 'a_1': -1.8862}
+
+# Novoa et al. (2017) / Nechad et al. (2010) recalibrated NIR model: A * nir / (1 - nir / C)
+NOVOA_SPM = {'A': 4302, 'C': 0.2115}
+
+# Ansari & Akhoondzadeh salinity = a_0 + a_1 * coastal_aerosol + a_2 * blue + a_3 * green
+ANSARI_SALINITY = {'a_0': 570.80, 'a_1': 26535.17, 'a_2': -62141.71, 'a_3': 34952.89}
+
+# Band 10 thermal constants for the brightness temperature used as SST
+SST_B10 = {'K1': 774.8853, 'K2': 1321.0789}
+
+# Version of each product's algorithm; bump it when a formula, mask or scale changes so stored statistics are recomputed
+ALGORITHM_VERSIONS = {
+    'ln_chl_a': 'trinh2017-2',
+    'spm': 'novoa2017-2',
+    'salinity': 'ansari-akhoondzadeh-1',
+    'SST_B10_Celsius': 'b10-brightness-1',
+    'ST_B10_Celsius': 'c2-l2-st-1',
+}
+
+# Acquisition dates the app shows as map layers, newest first (load_process.py, image_processing.py)
+
+LAYER_DATES = ['2021-11-11', '2021-10-26', '2021-10-10', '2021-08-07', '2021-07-22', '2021-07-06']
+
+# Pre-rendered XYZ tiles of the default layers (tile_pyramid.py). Solara serves this "public" directory
+# under /static/public, so the map reads them from the app server instead of Earth Engine
+
+TILE_PYRAMID_PATH = os.path.join(SRC_PATH, 'tiles')
+TILE_PYRAMID_URL = '/static/public/tiles'
+TILE_PYRAMID_ZOOMS = (8, 14)
+
+TURBO_PALETTE = [
+    "30123b", "321543", "33184a", "341b51", "351e58", "36215f", "372466", "38276d", 
+    "392a73", "3a2d79", "3b2f80", "3c3286", "3d358b", "3e3891", "3f3b97", "3f3e9c", 
+    "4040a2", "4143a7", "4146ac", "4249b1", "424bb5", "434eba", "4451bf", "4454c3", 
+    "4456c7", "4559cb", "455ccf", "455ed3", "4661d6", "4664da", "4666dd", "4669e0", 
+    "466be3", "476ee6", "4771e9", "4773eb", "4776ee", "4778f0", "477bf2", "467df4", 
+    "4680f6", "4682f8", "4685fa", "4687fb", "458afc", "458cfd", "448ffe", "4391fe", 
+    "4294ff", "4196ff", "4099ff", "3e9bfe", "3d9efe", "3ba0fd", "3aa3fc", "38a5fb", 
+    "37a8fa", "35abf8", "33adf7", "31aff5", "2fb2f4", "2eb4f2", "2cb7f0", "2ab9ee", 
+    "28bceb", "27bee9", "25c0e7", "23c3e4", "22c5e2", "20c7df", "1fc9dd", "1ecbda", 
+    "1ccdd8", "1bd0d5", "1ad2d2", "1ad4d0", "19d5cd", "18d7ca", "18d9c8", "18dbc5", 
+    "18ddc2", "18dec0", "18e0bd", "19e2bb", "19e3b9", "1ae4b6", "1ce6b4", "1de7b2", 
+    "1fe9af", "20eaac", "22ebaa", "25eca7", "27eea4", "2aefa1", "2cf09e", "2ff19b", 
+    "32f298", "35f394", "38f491", "3cf58e", "3ff68a", "43f787", "46f884", "4af880", 
+    "4ef97d", "52fa7a", "55fa76", "59fb73", "5dfc6f", "61fc6c", "65fd69", "69fd66", 
+    "6dfe62", "71fe5f", "75fe5c", "79fe59", "7dff56", "80ff53", "84ff51", "88ff4e", 
+    "8bff4b", "8fff49", "92ff47", "96fe44", "99fe42", "9cfe40", "9ffd3f", "a1fd3d", "a4fc3c", "a7fc3a", "a9fb39", "acfb38", 
+    "affa37", "b1f936", "b4f836", "b7f735", "b9f635", "bcf534", "bef434", "c1f334", 
+    "c3f134", "c6f034", "c8ef34", "cbed34", "cdec34", "d0ea34", "d2e935", "d4e735", 
+    "d7e535", "d9e436", "dbe236", "dde037", "dfdf37", "e1dd37", "e3db38", "e5d938", 
+    "e7d739", "e9d539", "ebd339", "ecd13a", "eecf3a", "efcd3a", "f1cb3a", "f2c93a", 
+    "f4c73a", "f5c53a", "f6c33a", "f7c13a", "f8be39", "f9bc39", "faba39", "fbb838", 
+    "fbb637", "fcb336", "fcb136", "fdae35", "fdac34", "fea933", "fea732", "fea431", 
+    "fea130", "fe9e2f", "fe9b2d", "fe992c", "fe962b", "fe932a", "fe9029", "fd8d27", 
+    "fd8a26", "fc8725", "fc8423", "fb8122", "fb7e21", "fa7b1f", "f9781e", "f9751d", 
+    "f8721c", "f76f1a", "f66c19", "f56918", "f46617", "f36315", "f26014", "f15d13", 
+    "f05b12", "ef5811", "ed5510", "ec530f", "eb500e", "ea4e0d", "e84b0c", "e7490c", 
+    "e5470b", "e4450a", "e2430a", "e14109", "df3f08", "dd3d08", "dc3b07", "da3907", 
+    "d83706", "d63506", "d43305", "d23105", "d02f05", "ce2d04", "cc2b04", "ca2a04", 
+    "c82803", "c52603", "c32503", "c12302", "be2102", "bc2002", "b91e02", "b71d02", 
+    "b41b01", "b21a01", "af1801", "ac1701", "a91601", "a71401", "a41301", "a11201", 
+    "9e1001", "9b0f01", "980e01", "950d01", "920b01", "8e0a01", "8b0902", "880802", 
+    "850702", "810602", "7e0502", "7a0403"
+]
+
+
+VIRIDIS_PALETTE = [
+    '440154', '440256', '450457', '450559', '46075a', '46085c', '460a5d', '460b5e', '470d60', 
+    '470e61', '471063', '471164', '471365', '481467', '481668', '481769', '48186a', '481a6c', 
+    '481b6d', '481c6e', '481d6f', '481f70', '482071', '482173', '482374', '482475', '482576', 
+    '482677', '482878', '482979', '472a7a', '472c7a', '472d7b', '472e7c', '472f7d', '46307e', 
+    '46327e', '46337f', '463480', '453581', '453781', '453882', '443983', '443a83', '443b84', 
+    '433d84', '433e85', '423f85', '424086', '424186', '414287', '414487', '404588', '404688', 
+    '3f4788', '3f4889', '3e4989', '3e4a89', '3e4c8a', '3d4d8a', '3d4e8a', '3c4f8a', '3c508b', 
+    '3b518b', '3b528b', '3a538b', '3a548c', '39558c', '39568c', '38588c', '38598c', '375a8c', 
+    '375b8d', '365c8d', '365d8d', '355e8d', '355f8d', '34608d', '34618d', '33628d', '33638d', 
+    '32648e', '32658e', '31668e', '31678e', '30688e', '30698e', '2f6a8e', '2f6b8e', '2e6c8e', 
+    '2e6d8e', '2d6e8e', '2d6f8e', '2c708e', '2c718e', '2b728e', '2b738e', '2a748e', '2a758e', 
+    '29768e', '29778e', '28788e', '28798e', '277a8e', '277b8e', '267c8e', '267d8e', '257e8e', 
+    '257f8e', '24808e', '24818e', '23828e', '23828e', '22838e', '22848e', '21858e', '21868e', 
+    '20878e', '20888e', '1f898e', '1f8a8d', '1e8b8d', '1e8c8d', '1d8d8d', '1d8e8d', '1c8f8d', 
+    '1c8f8d', '1b908c', '1b918c', '1a928c', '1a938b', '19948b', '19958b', '18968a', '18978a', 
+    '17988a', '179989', '169a89', '169b88', '159c88', '159d87', '149e87', '149f86', '13a086', 
+    '13a185', '12a285', '12a384', '11a483', '11a583', '10a682', '10a781', '0fa881', '0fa980', 
+    '0eaa7f', '0eab7e', '0dac7e', '0dad7d', '0cae7c', '0caf7b', '0bb07a', '0bb179', '0ab278', 
+    '0ab377', '09b476', '09b575', '08b674', '08b773', '07b872', '07b971', '06ba70', '06bb6f', 
+    '05bc6e', '05bd6d', '04be6c', '04bf6b', '03c06a', '03c169', '02c268', '02c367', '01c466', 
+    '01c565', '00c664'
 ]
\ No newline at end of file
@@ -0,0 +1,160 @@
+import json
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+
+# Calls that leave the process and hit the Earth Engine servers
+REQUEST_METHODS = ('getInfo', 'getMapId', 'getDownloadURL', 'getThumbURL', 'getThumbId')
+
+
+class FakeEEException(Exception):
+    # Stands in for ee.EEException, so code catching it runs unchanged under the fake
+    pass
+
+
+class FakeEarthEngine:
+    """
+    Offline stand-in for the ``ee`` module that records every call instead of talking to Earth Engine.
+
+    Constructors (ee.ImageCollection, ee.Date, ...) and methods (filterDate, clip, ...) are counted in
+    ``calls``; methods that would issue a network request are counted in ``requests`` as well.
+    Install it with ``install()`` before importing the processing modules so their ``import ee``
+    picks up the fake. Requests sleep for ``latency`` seconds, either a number or a function of the
+    request name, to stand in for the network round trip.
+
+    Call names keep the whole method chain, e.g. ``ImageCollection.filterDate.aggregate_array.getInfo``.
+    Recorded responses are keyed by a suffix of that chain (``aggregate_array.getInfo``) and replayed
+    in order, starting over once exhausted; requests without a recording get a canned response.
+    The JSON size of every response is added to ``bytes_transferred``.
+    """
+
+    EEException = FakeEEException
+
+    def __init__(self, latency=0.0, responses=None):
+        self.calls = Counter()
+        self.requests = Counter()
+        self.latency = latency
+        self.responses = dict(responses or {})
+        self.bytes_transferred = 0
+        self._replayed = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load_responses(path):
+        # Recorded responses: {"<call chain suffix>": [response, ...]}
+        with open(path) as f:
+            return json.load(f)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return FakeNode(self, name)
+
+    def record(self, name):
+        with self._lock:
+            self.calls[name] += 1
+            is_request = name.rsplit('.', 1)[-1] in REQUEST_METHODS
+            if is_request:
+                self.requests[name] += 1
+        if is_request:
+            latency = self.latency(name) if callable(self.latency) else self.latency
+            time.sleep(latency)
+        return is_request
+
+    def response(self, name):
+        # Recorded response of a request if there is one, else a canned one shaped like the real one
+        method = name.rsplit('.', 1)[-1]
+        with self._lock:
+            key = max((key for key in self.responses if name == key or name.endswith('.' + key)), key=len, default=None)
+            if key is not None:
+                recorded = self.responses[key]
+                response = recorded[self._replayed[key] % len(recorded)]
+                self._replayed[key] += 1
+            elif method == 'getMapId':
+                number = self.requests[name]
+                response = {'mapid': f'fake-{number}', 'token': '', 'url_format': FakeTileFetcher(number).url_format}
+            else:
+                response = None
+            self.bytes_transferred += len(json.dumps(response))
+        if method == 'getMapId':
+            # The client library wraps the URL template in a tile fetcher
+            response = dict(response)
+            response['tile_fetcher'] = FakeTileFetcher(response.pop('url_format'))
+        return response
+
+    def reset(self):
+        self.calls.clear()
+        self.requests.clear()
+        self.bytes_transferred = 0
+        self._replayed.clear()
+
+    @property
+    def request_count(self):
+        return sum(self.requests.values())
+
+    def count(self, name):
+        """
+        Returns how often a constructor or method was called
+        :param name: Call name, e.g. 'ImageCollection' or 'filterDate'
+        :type name: String
+        :return: Number of recorded calls
+        :rtype: Integer
+        """
+        return sum(count for call, count in self.calls.items() if call == name or call.endswith('.' + name))
+
+
+class FakeNode:
+    # A lazily built Earth Engine object; every attribute is a method that returns another node
+    def __init__(self, backend, name):
+        self._backend = backend
+        self._name = name
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return FakeNode(self._backend, f'{self._name}.{name}')
+
+    def __call__(self, *args, **kwargs):
+        if self._backend.record(self._name):
+            return self._backend.response(self._name)
+        # Mapped functions are invoked once with a placeholder, as the real client library does
+        for arg in list(args) + list(kwargs.values()):
+            if callable(arg) and not isinstance(arg, FakeNode):
+                arg(FakeNode(self._backend, 'Placeholder'))
+        return FakeNode(self._backend, self._name)
+
+    def __getitem__(self, key):
+        return FakeNode(self._backend, self._name)
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return f'<FakeNode {self._name}>'
+
+
+class FakeTileFetcher:
+    def __init__(self, number_or_url):
+        if isinstance(number_or_url, str):
+            self.url_format = number_or_url
+        else:
+            self.url_format = f'https://earthengine.invalid/map/fake-{number_or_url}/{{z}}/{{x}}/{{y}}'
+
+
+def install(latency=0.0, responses=None):
+    """
+    Replaces the ``ee`` module with a FakeEarthEngine
+    :param latency: Seconds every request takes, or a function of the request name returning them
+    :type latency: Float
+    :param responses: Recorded responses, or the path of a JSON file holding them
+    :type responses: Dict
+    :return: The installed fake backend
+    :rtype: FakeEarthEngine
+    """
+    if isinstance(responses, str):
+        responses = FakeEarthEngine.load_responses(responses)
+    backend = FakeEarthEngine(latency, responses)
+    sys.modules['ee'] = backend
+    return backend
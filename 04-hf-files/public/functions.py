@@ -1,201 +1,307 @@
-import ee
-import numpy as np
-
-class ImageFunctions:
-    def __init__(self) -> None:
-        pass
-
-    # Define a function to apply scaling and offset
-    def apply_scale_factors(self, image):
-        optical_bands = image.select('SR_B.*').multiply(0.0000275).add(-0.2)
-        thermal_bands = image.select('ST_B.*').multiply(0.00341802).add(149.0)
-        image = image.addBands(optical_bands, None, True)
-        image = image.addBands(thermal_bands, None, True)
-        return image
-    # Define function to return QA bands
-
-    def extract_qa_bits(self, qa_band, start_bit, end_bit, band_name):
-        """
-        Extracts QA values from an image
-        :param qa_band: Single-band image of the QA layer
-        :type qa_band: ee.Image
-        :param start_bit: Starting bit
-        :type start_bit: Integer
-        :param end_bit: Ending bit
-        :type end_bit: Integer
-        :param band_name: New name for the band
-        :type band_name: String
-        :return: Image with extracted QA values
-        :rtype: ee.Image
-        """
-        # Initialize QA bit string/pattern to check QA band against
-        qa_bits = 0
-        # Add each specified QA bit flag value/string/pattern to the QA bits to check/extract
-        for bit in range(start_bit, end_bit + 1):
-            qa_bits += pow(2, bit)  # Same as qa_bits += (1 << bit)
-        # Return a single band image of the extracted QA bit values
-        return qa_band.select([0], [band_name]).bitwiseAnd(qa_bits).rightShift(start_bit)
-
-    # Define a function to calculate Chlorphyll-a based on trinh et al.(2017)
-    def trinh_et_al_chl_a(self, image):
-        # extract the cloud and water masks
-        qa_band = ee.Image(image).select('QA_PIXEL')
-        cloudMask = self.extract_qa_bits(qa_band, 8, 9, "cloud").neq(3)  # different than 3 to remove clouds
-        waterMask = self.extract_qa_bits(qa_band, 7, 7, "water").eq(1)  # equals 1 to keep water
-
-        # apply the masks to the image
-        image = image.updateMask(cloudMask).updateMask(waterMask)
-        image =  self.apply_scale_factors(image)
-
-        a_0 = 0.9375
-        a_1 = -1.8862
-        blue_bands = image.select('SR_B2')
-        green_bands = image.select('SR_B3')
-        ln_chl_a = image.expression("a_0 + a_1 * log(blue_bands/green_bands)", {
-            'a_0': a_0,
-            'a_1': a_1,
-            'blue_bands': blue_bands,
-            'green_bands': green_bands
-        })
-        image = image.addBands(ln_chl_a.select([0], ['ln_chl_a']))
-
-
-        return image
-
-    # Define a function to calculate statistics chl-a
-
-    def extract_data(self, image):
-        stats = image.reduceRegion(ee.Reducer.mean(), aoi, 30)
-        valid_pixels = image.select('ln_chl_a').unmask().neq(0)  # create a mask of valid pixels
-        valid_area = valid_pixels.multiply(ee.Image.pixelArea()).reduceRegion(ee.Reducer.sum(), aoi, 30)  # calculate the area of valid pixels
-        return image.set('date', image.date().format()).set(stats).set('Area', valid_area)
-
-
-    # Define a function to calculate SPM from Novoa et al.(2017) based on Nechad et al. (2010) NIR (recalibrated) model
-
-    def novoa_et_al_spm(self, image):
-        # extract the cloud and water masks
-        qa_band = ee.Image(image).select('QA_PIXEL')
-        cloudMask = self.extract_qa_bits(qa_band, 8, 9, "cloud").neq(3)  # different than 3 to remove clouds
-        waterMask = self.extract_qa_bits(qa_band, 7, 7, "water").eq(1)  # equals 1 to keep water
-
-        # apply the masks to the image
-        image = image.updateMask(cloudMask).updateMask(waterMask)
-        image =  self.apply_scale_factors(image)
-
-    # Select the NIR band (B5 for Landsat 8 OLI)
-        nir = image.select('SR_B5')
-    # Apply the Nechad et al. (2010) NIR (recalibrated) model
-        spm = image.expression(
-            "4302 * (nir / (1 - nir / 0.2115))",
-            {'nir': nir}
-        )
-        # Set negative SPM values to zero
-        spm = spm.where(spm.lt(0), 0)
-        image = image.addBands(spm.select([0], ['spm']))
-
-
-        return image
-
-
-    # Define a function to calculate statistics SST
-
-    def extract_data_spm(self, image):
-        stats = image.reduceRegion(ee.Reducer.mean(), aoi, 30)
-        valid_pixels = image.select('spm').unmask().neq(0)  # create a mask of valid pixels
-        valid_area = valid_pixels.multiply(ee.Image.pixelArea()).reduceRegion(ee.Reducer.sum(), aoi, 30)  # calculate the area of valid pixels
-        
-        return image.set('date', image.date().format()).set(stats).set('Area', valid_area)
-    
-        # Define a function to calculate SST from Novoa et al.(2017) based on Nechad et al. (2010) NIR (recalibrated) model
-
-    def calculate_sst(self, image):
-        # Constants from Table 1
-        K1_B10 = 774.8853
-        K2_B10 = 1321.0789
-        epsilon_B10 = 0.9926
-        K1_B11 = 480.8883
-        K2_B11 = 1201.1442
-        epsilon_B11 = 0.9877
-
-        # extract the cloud and water masks
-        qa_band = ee.Image(image).select('QA_PIXEL')
-        cloudMask = self.extract_qa_bits(qa_band, 8, 9, "cloud").neq(3)  # different than 3 to remove clouds
-        waterMask = self.extract_qa_bits(qa_band, 7, 7, "water").eq(1)  # equals 1 to keep water
-
-        # apply the masks to the image
-        image = image.updateMask(cloudMask).updateMask(waterMask)
-
-        # Get the radiance scaling factors for Band 10 from the image's metadata
-        ML_B10 = ee.Number(image.get('RADIANCE_MULT_BAND_10'))
-        AL_B10 = ee.Number(image.get('RADIANCE_ADD_BAND_10'))
-        ML_B11 = ee.Number(image.get('RADIANCE_MULT_BAND_11'))
-        AL_B11 = ee.Number(image.get('RADIANCE_ADD_BAND_11'))
-
-        # Get the Band 10 and Band 11 data
-        B10 = image.select('B10')
-        B11 = image.select('B11')
-
-        # Calculate the at-sensor spectral radiance for Bands 10 and 11
-        L_lambda_B10 = B10.multiply(ML_B10).add(AL_B10)
-        L_lambda_B11 = B11.multiply(ML_B11).add(AL_B11)
-
-        # Here, you would need to calculate tau, Lu, and Ld using appropriate methods.
-        # The formulas you provided do not seem to correspond to standard methods for calculating these quantities.
-        # Once you have these, you can calculate SST as follows:
-
-        # Calculate SST using the expression
-        SST_B10_Celsius = image.expression(
-            "K2_B10 / log(K1_B10 / L_lambda_B10 + 1) - 273.15",
-            {
-                'K2_B10': K2_B10,
-                'K1_B10': K1_B10,
-                'L_lambda_B10': L_lambda_B10
-            }
-        )
-
-        # Add the SST_B10_Celsius band to the image
-        image = image.addBands(SST_B10_Celsius.rename('SST_B10_Celsius'))
-
-        return image
-    
-    def ansari_akhoondzadeh_salinity(self, image):
-        # extract the cloud and water masks
-        qa_band = ee.Image(image).select('QA_PIXEL')
-        cloudMask = self.extract_qa_bits(qa_band, 8, 9, "cloud").neq(3)  # different than 3 to remove clouds
-        waterMask = self.extract_qa_bits(qa_band, 7, 7, "water").eq(1)  # equals 1 to keep water
-
-        # apply the masks to the image
-        image = image.updateMask(cloudMask).updateMask(waterMask)
-        image =  self.apply_scale_factors(image)
-
-        a_0 = 570.80
-        a_1 = 26535.17
-        a_2 = -62141.71
-        a_3 = 34952.89
-
-        coastal_aerosol = image.select('SR_B1')
-        blue_bands = image.select('SR_B2')
-        green_bands = image.select('SR_B3')
-        salinity = image.expression("a_0 + (a_1 *coastal_aerosol) + (a_2 * blue_bands) + (a_3 * green_bands)", {
-            'a_0': a_0,
-            'a_1': a_1,
-            'a_2': a_2,
-            'a_3': a_3,
-            'coastal_aerosol': coastal_aerosol,
-            'blue_bands': blue_bands,
-            'green_bands': green_bands
-        })
-
-        image = image.addBands(salinity.select([0], ['salinity']))
-
-
-        return image
-
-
-
-
-
-
-
-  
\ No newline at end of file
+import ee
+import numpy as np
+
+from constants import (ANSARI_SALINITY, NOVOA_SPM, OPTICAL_OFFSET, OPTICAL_SCALE, SST_B10,
+                       THERMAL_OFFSET, THERMAL_SCALE, TRINH_CHL_A)
+from mosaic import daily_mosaics
+from qa import QA_DECODER, bit_mask
+
+class ImageFunctions:
+    def __init__(self, aoi=None) -> None:
+        # Region used by the statistics functions, normally the 'analysis' tier of the study boundary
+        self.aoi = aoi
+
+    # Define a function to apply scaling and offset
+    def apply_scale_factors(self, image):
+        optical_bands = image.select('SR_B.*').multiply(OPTICAL_SCALE).add(OPTICAL_OFFSET)
+        thermal_bands = image.select('ST_B.*').multiply(THERMAL_SCALE).add(THERMAL_OFFSET)
+        image = image.addBands(optical_bands, None, True)
+        image = image.addBands(thermal_bands, None, True)
+        return image
+    # Define function to return QA bands
+
+    def extract_qa_bits(self, qa_band, start_bit, end_bit, band_name):
+        """
+        Extracts QA values from an image
+        :param qa_band: Single-band image of the QA layer
+        :type qa_band: ee.Image
+        :param start_bit: Starting bit
+        :type start_bit: Integer
+        :param end_bit: Ending bit
+        :type end_bit: Integer
+        :param band_name: New name for the band
+        :type band_name: String
+        :return: Image with extracted QA values
+        :rtype: ee.Image
+        """
+        # Return a single band image of the extracted QA bit values
+        return qa_band.select([0], [band_name]).rightShift(start_bit).bitwiseAnd(bit_mask(start_bit, end_bit))
+
+    # Define a function to look up the scenes for a list of dates in one collection query
+    def scene_collection(self, collection_id, dates, region):
+        """
+        Builds a single filtered collection covering every requested date and
+        quality-mosaics the scenes acquired on the same date
+        :param collection_id: Earth Engine collection id, e.g. LANDSAT/LC08/C02/T1_L2
+        :type collection_id: String
+        :param dates: Acquisition dates formatted as YYYY-MM-DD
+        :type dates: List
+        :param region: Geometry or feature collection the scenes must intersect
+        :type region: ee.Geometry
+        :return: Collection with at most one image per requested date
+        :rtype: ee.ImageCollection
+        """
+        start_date = ee.Date(min(dates))
+        end_date = ee.Date(max(dates)).advance(1, 'day')
+
+        # One collection over the whole date span, restricted to the requested days
+        collection = ee.ImageCollection(collection_id) \
+            .filterDate(start_date, end_date) \
+            .filterBounds(region) \
+            .filter(ee.Filter.inList('DATE_ACQUIRED', dates))
+
+        # One mosaic per date, keeping every path/row acquired that day
+        return daily_mosaics(collection)
+
+    # Define a function to split the joined collection back into one image per date
+    def scenes_by_date(self, collection_id, dates, region):
+        scenes = self.scene_collection(collection_id, dates, region)
+        return {date: ee.Image(scenes.filter(ee.Filter.eq('DATE_ACQUIRED', date)).first()) for date in dates}
+
+    # Define a function to calculate Chlorphyll-a based on trinh et al.(2017)
+    def trinh_et_al_chl_a(self, image):
+        # extract the cloud and water masks
+        qa_band = ee.Image(image).select('QA_PIXEL')
+        clearWater = QA_DECODER.ee_mask(qa_band, 'clear_water')  # water without high confidence clouds, see qa.QA_MASKS
+
+        # apply the masks to the image
+        image = image.updateMask(clearWater)
+        image =  self.apply_scale_factors(image)
+
+        a_0 = TRINH_CHL_A['a_0']
+        a_1 = TRINH_CHL_A['a_1']
+        blue_bands = image.select('SR_B2')
+        green_bands = image.select('SR_B3')
+        ln_chl_a = image.expression("a_0 + a_1 * log(blue_bands/green_bands)", {
+            'a_0': a_0,
+            'a_1': a_1,
+            'blue_bands': blue_bands,
+            'green_bands': green_bands
+        })
+        image = image.addBands(ln_chl_a.select([0], ['ln_chl_a']))
+
+
+        return image
+
+    # Define a function to calculate the statistics of one product band in a single pass
+    def region_statistics(self, image, band, aoi=None, scale=30, percentiles=(10, 50, 90)):
+        """
+        Reduces one band over the AOI with a single combined reducer: mean, stdDev, count, the
+        percentiles and the area of the valid (unmasked) pixels
+        :param image: Image holding the product band
+        :type image: ee.Image
+        :param band: Product band, e.g. 'ln_chl_a' or 'spm'
+        :type band: String
+        :param aoi: Region to reduce over, defaults to the AOI the class was created with
+        :type aoi: ee.Geometry
+        :param scale: Pixel size in meters
+        :type scale: Integer
+        :param percentiles: Percentiles to compute, returned as p<percentile>
+        :type percentiles: Tuple
+        :return: Dictionary with mean, stdDev, count, p10, p50, p90 and area (m²)
+        :rtype: ee.Dictionary
+        """
+        aoi = self.aoi if aoi is None else aoi
+        if aoi is None:
+            raise ValueError("region_statistics needs an AOI, pass aoi or create ImageFunctions(aoi)")
+        values = image.select(band)
+        # Area of the valid pixels, second input of the reducer
+        valid_area = ee.Image.pixelArea().updateMask(values.mask()).rename('area')
+        reducer = ee.Reducer.mean() \
+            .combine(ee.Reducer.stdDev(), sharedInputs=True) \
+            .combine(ee.Reducer.count(), sharedInputs=True) \
+            .combine(ee.Reducer.percentile(list(percentiles)), sharedInputs=True) \
+            .combine(ee.Reducer.sum().setOutputs(['area']), sharedInputs=False)
+        return values.addBands(valid_area).reduceRegion(reducer, aoi, scale, maxPixels=1e9)
+
+    # Define a function to set the statistics of a product band as image properties
+    def extract_statistics(self, image, band, aoi=None):
+        stats = self.region_statistics(image, band, aoi)
+        # The mean keeps the band name and the valid area stays 'Area', as read by the time series
+        return image.set(stats.rename(stats.keys(), stats.keys().map(lambda key: ee.String(band).cat('_').cat(key)))) \
+            .set('date', image.date().format()) \
+            .set(band, stats.get('mean')) \
+            .set('Area', stats.get('area'))
+
+    # Define a function to calculate statistics chl-a
+
+    def extract_data(self, image, aoi=None):
+        return self.extract_statistics(image, 'ln_chl_a', aoi)
+
+
+    # Define a function to calculate SPM from Novoa et al.(2017) based on Nechad et al. (2010) NIR (recalibrated) model
+
+    def novoa_et_al_spm(self, image):
+        # extract the cloud and water masks
+        qa_band = ee.Image(image).select('QA_PIXEL')
+        clearWater = QA_DECODER.ee_mask(qa_band, 'clear_water')  # water without high confidence clouds, see qa.QA_MASKS
+
+        # apply the masks to the image
+        image = image.updateMask(clearWater)
+        image =  self.apply_scale_factors(image)
+
+    # Select the NIR band (B5 for Landsat 8 OLI)
+        nir = image.select('SR_B5')
+    # Apply the Nechad et al. (2010) NIR (recalibrated) model
+        spm = image.expression(
+            "A * (nir / (1 - nir / C))",
+            {'A': NOVOA_SPM['A'], 'C': NOVOA_SPM['C'], 'nir': nir}
+        )
+        # Set negative SPM values to zero
+        spm = spm.where(spm.lt(0), 0)
+        image = image.addBands(spm.select([0], ['spm']))
+
+
+        return image
+
+
+    # Define a function to calculate statistics SST
+
+    def extract_data_spm(self, image, aoi=None):
+        return self.extract_statistics(image, 'spm', aoi)
+    
+        # Define a function to calculate SST from Novoa et al.(2017) based on Nechad et al. (2010) NIR (recalibrated) model
+
+    def calculate_sst(self, image):
+        # Constants from Table 1
+        K1_B10 = SST_B10['K1']
+        K2_B10 = SST_B10['K2']
+        epsilon_B10 = 0.9926
+        K1_B11 = 480.8883
+        K2_B11 = 1201.1442
+        epsilon_B11 = 0.9877
+
+        # extract the cloud and water masks
+        qa_band = ee.Image(image).select('QA_PIXEL')
+        clearWater = QA_DECODER.ee_mask(qa_band, 'clear_water')  # water without high confidence clouds, see qa.QA_MASKS
+
+        # apply the masks to the image
+        image = image.updateMask(clearWater)
+
+        # Get the radiance scaling factors for Band 10 from the image's metadata
+        ML_B10 = ee.Number(image.get('RADIANCE_MULT_BAND_10'))
+        AL_B10 = ee.Number(image.get('RADIANCE_ADD_BAND_10'))
+        ML_B11 = ee.Number(image.get('RADIANCE_MULT_BAND_11'))
+        AL_B11 = ee.Number(image.get('RADIANCE_ADD_BAND_11'))
+
+        # Get the Band 10 and Band 11 data
+        B10 = image.select('B10')
+        B11 = image.select('B11')
+
+        # Calculate the at-sensor spectral radiance for Bands 10 and 11
+        L_lambda_B10 = B10.multiply(ML_B10).add(AL_B10)
+        L_lambda_B11 = B11.multiply(ML_B11).add(AL_B11)
+
+        # Here, you would need to calculate tau, Lu, and Ld using appropriate methods.
+        # The formulas you provided do not seem to correspond to standard methods for calculating these quantities.
+        # Once you have these, you can calculate SST as follows:
+
+        # Calculate SST using the expression
+        SST_B10_Celsius = image.expression(
+            "K2_B10 / log(K1_B10 / L_lambda_B10 + 1) - 273.15",
+            {
+                'K2_B10': K2_B10,
+                'K1_B10': K1_B10,
+                'L_lambda_B10': L_lambda_B10
+            }
+        )
+
+        # Add the SST_B10_Celsius band to the image
+        image = image.addBands(SST_B10_Celsius.rename('SST_B10_Celsius'))
+
+        return image
+    
+    def ansari_akhoondzadeh_salinity(self, image):
+        # extract the cloud and water masks
+        qa_band = ee.Image(image).select('QA_PIXEL')
+        clearWater = QA_DECODER.ee_mask(qa_band, 'clear_water')  # water without high confidence clouds, see qa.QA_MASKS
+
+        # apply the masks to the image
+        image = image.updateMask(clearWater)
+        image =  self.apply_scale_factors(image)
+
+        a_0 = ANSARI_SALINITY['a_0']
+        a_1 = ANSARI_SALINITY['a_1']
+        a_2 = ANSARI_SALINITY['a_2']
+        a_3 = ANSARI_SALINITY['a_3']
+
+        coastal_aerosol = image.select('SR_B1')
+        blue_bands = image.select('SR_B2')
+        green_bands = image.select('SR_B3')
+        salinity = image.expression("a_0 + (a_1 *coastal_aerosol) + (a_2 * blue_bands) + (a_3 * green_bands)", {
+            'a_0': a_0,
+            'a_1': a_1,
+            'a_2': a_2,
+            'a_3': a_3,
+            'coastal_aerosol': coastal_aerosol,
+            'blue_bands': blue_bands,
+            'green_bands': green_bands
+        })
+
+        image = image.addBands(salinity.select([0], ['salinity']))
+
+
+        return image
+
+
+
+
+
+
+
+  
+
+    # Define a function to compute every water-quality product from one masked, scaled scene
+    def compute_all_products(self, image):
+        """
+        Shares the QA masking and scaling between the products and returns them as bands of one image,
+        so switching product only changes the visualization
+        :param image: Landsat 8 Collection 2 Level-2 scene
+        :type image: ee.Image
+        :return: Image with unmasked SR_B4, SR_B3, SR_B2 for true color plus masked ln_chl_a, spm and salinity
+        :rtype: ee.Image
+        """
+        # extract the cloud and water masks
+        qa_band = ee.Image(image).select('QA_PIXEL')
+        clearWater = QA_DECODER.ee_mask(qa_band, 'clear_water')  # water without high confidence clouds, see qa.QA_MASKS
+
+        # scale once; the true color bands stay unmasked, the products only cover clear water
+        scaled = self.apply_scale_factors(image)
+        water = scaled.updateMask(clearWater)
+
+        ln_chl_a = water.expression("a_0 + a_1 * log(blue_bands/green_bands)", {
+            'a_0': TRINH_CHL_A['a_0'],
+            'a_1': TRINH_CHL_A['a_1'],
+            'blue_bands': water.select('SR_B2'),
+            'green_bands': water.select('SR_B3')
+        })
+        spm = water.expression(
+            "A * (nir / (1 - nir / C))",
+            {'A': NOVOA_SPM['A'], 'C': NOVOA_SPM['C'], 'nir': water.select('SR_B5')}
+        )
+        spm = spm.where(spm.lt(0), 0)
+        salinity = water.expression("a_0 + (a_1 *coastal_aerosol) + (a_2 * blue_bands) + (a_3 * green_bands)", {
+            'a_0': ANSARI_SALINITY['a_0'],
+            'a_1': ANSARI_SALINITY['a_1'],
+            'a_2': ANSARI_SALINITY['a_2'],
+            'a_3': ANSARI_SALINITY['a_3'],
+            'coastal_aerosol': water.select('SR_B1'),
+            'blue_bands': water.select('SR_B2'),
+            'green_bands': water.select('SR_B3')
+        })
+
+        return scaled.select(['SR_B4', 'SR_B3', 'SR_B2']) \
+            .addBands(ln_chl_a.select([0], ['ln_chl_a'])) \
+            .addBands(spm.select([0], ['spm'])) \
+            .addBands(salinity.select([0], ['salinity'])) \
+            .copyProperties(image, ['system:time_start', 'DATE_ACQUIRED'])
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+
+from local_functions import LocalImage, band_paths, scale_band
+
+
+class LandsatScene:
+    """
+    A downloaded Landsat Collection 2 scene whose raw uint16 bands are memory-mapped.
+
+    Each band is decoded from its GeoTIFF once into an uncompressed .npy file next to the scene
+    (the GeoTIFFs are compressed, so they cannot be mapped directly) and then memory-mapped
+    read-only. Windows are zero-copy views of the mapping; scaling to reflectance or temperature
+    happens lazily, in float32, only for the window asked for. Every product computed on the scene
+    shares the same mappings, so a second product on the same bands costs no new band I/O.
+    """
+
+    def __init__(self, directory, cache_directory=None, properties=None):
+        self.directory = directory
+        self.cache_directory = cache_directory or os.path.join(directory, '.mmap')
+        self.properties = dict(properties or {})
+        self.paths = band_paths(directory)
+        self._bands = {}
+        # Number of bands decoded from GeoTIFF, i.e. the band I/O done by this object
+        self.band_loads = 0
+
+    @property
+    def band_names(self):
+        return list(self.paths)
+
+    def band(self, name):
+        """
+        Returns the memory-mapped raw band, decoding it from its GeoTIFF on first use
+        :param name: Band name, e.g. 'SR_B2' or 'QA_PIXEL'
+        :type name: String
+        :return: Read-only uint16 array backed by the .npy file
+        :rtype: np.memmap
+        """
+        band = self._bands.get(name)
+        if band is None:
+            cache_path = os.path.join(self.cache_directory, f'{name}.npy')
+            if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(self.paths[name]):
+                self._decode(name, cache_path)
+            band = np.load(cache_path, mmap_mode='r')
+            self._bands[name] = band
+        return band
+
+    def _decode(self, name, cache_path):
+        # Copies the GeoTIFF block by block into the .npy file, so the band is never held in memory
+        import rasterio
+
+        os.makedirs(self.cache_directory, exist_ok=True)
+        partial_path = cache_path + '.part.npy'
+        with rasterio.open(self.paths[name]) as src:
+            target = np.lib.format.open_memmap(partial_path, mode='w+', dtype=np.uint16, shape=(src.height, src.width))
+            for _, window in src.block_windows(1):
+                target[window.toslices()] = src.read(1, window=window)
+            target.flush()
+            del target
+        os.replace(partial_path, cache_path)
+        self.band_loads += 1
+
+    def window(self, name, rows=slice(None), cols=slice(None)):
+        # Zero-copy view of the raw band
+        return self.band(name)[rows, cols]
+
+    def scaled(self, name, rows=slice(None), cols=slice(None)):
+        """
+        Scales a window of a band to reflectance (SR_B*) or Kelvin (ST_B*) in float32
+        :param name: Band name
+        :type name: String
+        :param rows: Row slice of the window
+        :type rows: slice
+        :param cols: Column slice of the window
+        :type cols: slice
+        :return: New float32 array of the window only
+        :rtype: np.ndarray
+        """
+        return scale_band(name, self.window(name, rows, cols), np.float32)
+
+    def image(self, names=None):
+        """
+        Wraps the mappings in a LocalImage for LocalImageFunctions, without copying them
+        :param names: Bands to include, every band of the scene when None
+        :type names: List
+        :return: Image whose bands are the memory-mapped raw bands
+        :rtype: LocalImage
+        """
+        return LocalImage({name: self.band(name) for name in (names or self.band_names)}, self.properties)
+
+    def footprint(self):
+        """
+        Memory accounting of the scene
+        :return: Number of mapped bands, mapped bytes (file-backed, shared through the page cache,
+            not process heap) and the number of bands decoded from GeoTIFF
+        :rtype: Dict
+        """
+        return {
+            'mapped_bands': len(self._bands),
+            'mapped_bytes': sum(band.nbytes for band in self._bands.values()),
+            'band_loads': self.band_loads,
+        }
@@ -0,0 +1,87 @@
+import json
+import threading
+
+from map_ids import request_map_id
+from shared_cache import MAP_ID_CACHE
+from tracing import TRACER
+
+
+class CachedLayer:
+    # A computed layer: the Earth Engine image, its tile URL template and the map tile layer showing it.
+    # Layers of the local tile pyramid have no image and stop at the pyramid's highest zoom
+    def __init__(self, image, url_format, tile_layer=None, max_native_zoom=None):
+        self.image = image
+        self.url_format = url_format
+        self.tile_layer = tile_layer
+        self.max_native_zoom = max_native_zoom
+
+
+class LayerCache:
+    """
+    Session-scoped cache of map layers keyed by (product, date, vis params, AOI tier).
+
+    A layer is computed and its map ID requested once; toggling back to a product only shows
+    the cached tile layers again. Hits, misses and the duration of every toggle are recorded.
+    """
+
+    def __init__(self):
+        self._layers = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.toggle_times = []
+
+    @staticmethod
+    def key(product, date, vis_params, aoi_tier):
+        # Vis params hold lists (bands, palette), so they are keyed by their JSON form
+        return (product, date, json.dumps(vis_params, sort_keys=True), aoi_tier)
+
+    def get(self, key):
+        with self._lock:
+            layer = self._layers.get(key)
+            if layer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        TRACER.cache('layer_cache', layer is not None, product=key[0], date=key[1])
+        return layer
+
+    def put(self, key, image, vis_params):
+        """
+        Resolves the map ID of an image through the cache shared by all sessions and stores it under a key
+        :param key: Key from LayerCache.key
+        :type key: Tuple
+        :param image: Image to visualize
+        :type image: ee.Image
+        :param vis_params: Visualization parameters passed to getMapId
+        :type vis_params: Dict
+        :return: The cached layer, without a tile layer yet
+        :rtype: CachedLayer
+        """
+        map_id = MAP_ID_CACHE.get_or_compute(key, lambda: request_map_id(image, vis_params))
+        layer = CachedLayer(image, map_id['tile_fetcher'].url_format)
+        with self._lock:
+            self._layers[key] = layer
+        return layer
+
+    def store(self, key, layer):
+        # Stores a layer that needs no map ID, e.g. one served from the local tile pyramid
+        with self._lock:
+            self._layers[key] = layer
+        return layer
+
+    def layers(self, product=None):
+        with self._lock:
+            return [layer for key, layer in self._layers.items() if product is None or key[0] == product]
+
+    def record_toggle(self, product, seconds):
+        self.toggle_times.append((product, seconds))
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'layers': len(self._layers),
+            'toggles': len(self.toggle_times),
+            'last_toggle_seconds': self.toggle_times[-1][1] if self.toggle_times else None,
+        }
@@ -0,0 +1,123 @@
+import contextlib
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LayerLoader:
+    """
+    Prepares map layers on a bounded thread pool so the UI thread never waits on map-ID requests.
+
+    Every product selection starts a new generation; pending work of older generations is
+    cancelled and layers that finish for a stale generation are not attached. Progress is
+    reported as a dict with done, total, elapsed and eta (seconds) after every change.
+    """
+
+    def __init__(self, max_workers=4, context=None, on_progress=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='layer-loader')
+        self._lock = threading.Lock()
+        self._pending = {}
+        # Context entered around callbacks, e.g. the Solara kernel context of the session
+        self._context = context
+        self.on_progress = on_progress
+        self.generation = 0
+        self._total = 0
+        self._done = 0
+        self._submitted = False
+        self._started = time.perf_counter()
+
+    def start(self):
+        """
+        Starts a new generation and cancels the queued work of the previous ones
+        :return: The new generation number
+        :rtype: Integer
+        """
+        with self._lock:
+            self.generation += 1
+            stale = list(self._pending.values())
+            self._total = 0
+            self._done = 0
+            self._submitted = False
+            self._started = time.perf_counter()
+        # Cancelling runs the done callbacks right away, so it happens outside the lock
+        for future in stale:
+            future.cancel()
+        self._report()
+        return self.generation
+
+    def finish(self):
+        # Marks that every layer of the current generation has been submitted
+        with self._lock:
+            self._submitted = True
+        self._report()
+
+    def submit(self, key, resolve, attach):
+        """
+        Runs resolve on the pool and attach with its result once it completes, if the generation is still current
+        :param key: Identifies the work, identical keys in flight are resolved only once
+        :type key: Hashable
+        :param resolve: Slow part, e.g. the map-ID request
+        :type resolve: Callable
+        :param attach: Called with the result of resolve, e.g. to add the tile layer to the map
+        :type attach: Callable
+        """
+        with self._lock:
+            self._total += 1
+            generation = self.generation
+            future = self._pending.get(key)
+            if future is None or future.cancelled():
+                # resolve runs in a copy of the submitting context, so its spans nest under the current toggle
+                future = self._executor.submit(contextvars.copy_context().run, resolve)
+                self._pending[key] = future
+        future.add_done_callback(lambda done: self._finished(key, generation, done, attach))
+        self._report()
+
+    def skip(self):
+        # Counts a layer that was already available, so progress covers every layer of the selection
+        with self._lock:
+            self._total += 1
+            self._done += 1
+        self._report()
+
+    def _finished(self, key, generation, future, attach):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if future.cancelled() or generation != self.generation:
+                return
+        try:
+            result = future.result()
+            # attach runs under the lock, so start can not begin a new generation (and hide the old
+            # layers) between the generation check and attach
+            with self._lock:
+                if generation != self.generation:
+                    return
+                with self._context or contextlib.nullcontext():
+                    attach(result)
+        except Exception as e:
+            print(f"Layer {key} failed: {e}")
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._done += 1
+        self._report()
+
+    def progress(self):
+        with self._lock:
+            elapsed = time.perf_counter() - self._started
+            eta = elapsed / self._done * (self._total - self._done) if self._done else None
+            complete = self._submitted and self._done == self._total
+            return {'generation': self.generation, 'done': self._done, 'total': self._total,
+                    'elapsed': elapsed, 'eta': eta, 'complete': complete}
+
+    def _report(self):
+        if self.on_progress is not None:
+            with self._context or contextlib.nullcontext():
+                self.on_progress(self.progress())
+
+    def shutdown(self):
+        # Queued work is cancelled and layers still resolving are dropped, as for a new generation
+        with self._lock:
+            self.generation += 1
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,288 @@
+import glob
+import os
+
+import numpy as np
+
+from constants import (ANSARI_SALINITY, NOVOA_SPM, OPTICAL_OFFSET, OPTICAL_SCALE, SST_B10,
+                       THERMAL_OFFSET, THERMAL_SCALE, TRINH_CHL_A)
+from qa import QA_DECODER, bit_mask
+
+
+# Bands read by each product of the fused kernel
+PRODUCT_BANDS = {
+    'ln_chl_a': ('SR_B2', 'SR_B3'),
+    'spm': ('SR_B5',),
+    'salinity': ('SR_B1', 'SR_B2', 'SR_B3'),
+    'ST_B10_Celsius': ('ST_B10',),
+}
+
+# Products computed from the optical bands only, the default of the fused kernel
+OPTICAL_PRODUCTS = ('ln_chl_a', 'spm', 'salinity')
+
+# Precision modes of LocalImageFunctions
+PRECISIONS = ('float64', 'float32')
+
+# float32 guardrails, pixels where a product is ill-conditioned are recomputed in float64 from the raw bands:
+# ln_chl_a when blue or green reflectance is this close to 0 (the scale offset cancels, then the log amplifies it),
+# spm when 1 - nir / C is this close to 0 (the pole of the Nechad model at nir = 0.2115)
+FLOAT32_GUARDS = {'ln_chl_a': 1e-3, 'spm': 1e-2}
+
+
+# Index formulas on scaled reflectance, shared by the step-by-step methods and the fused kernel
+def chl_a_index(blue, green):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return TRINH_CHL_A['a_0'] + TRINH_CHL_A['a_1'] * np.log(blue / green)
+
+
+def spm_index(nir):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spm = NOVOA_SPM['A'] * (nir / (1 - nir / NOVOA_SPM['C']))
+    # Set negative SPM values to zero, masked (NaN) pixels stay masked
+    return np.where(spm < 0, 0, spm)
+
+
+def salinity_index(coastal_aerosol, blue, green):
+    return (ANSARI_SALINITY['a_0'] + ANSARI_SALINITY['a_1'] * coastal_aerosol
+            + ANSARI_SALINITY['a_2'] * blue + ANSARI_SALINITY['a_3'] * green)
+
+
+def surface_temperature_index(surface_temperature):
+    # Collection 2 Level 2 surface temperature (Kelvin, already scaled) to degrees Celsius
+    return surface_temperature - 273.15
+
+
+# Product formulas on a dict of scaled bands
+PRODUCT_INDEX = {
+    'ln_chl_a': lambda bands: chl_a_index(bands['SR_B2'], bands['SR_B3']),
+    'spm': lambda bands: spm_index(bands['SR_B5']),
+    'salinity': lambda bands: salinity_index(bands['SR_B1'], bands['SR_B2'], bands['SR_B3']),
+    'ST_B10_Celsius': lambda bands: surface_temperature_index(bands['ST_B10']),
+}
+
+
+def ill_conditioned(product, bands):
+    # Pixels of a product that float32 cannot compute accurately, None when the product has no guard
+    guard = FLOAT32_GUARDS.get(product)
+    if guard is None:
+        return None
+    with np.errstate(invalid='ignore'):
+        if product == 'ln_chl_a':
+            return (np.abs(bands['SR_B2']) < guard) | (np.abs(bands['SR_B3']) < guard)
+        return np.abs(1 - bands['SR_B5'] / NOVOA_SPM['C']) < guard
+
+
+def scale_band(name, values, dtype=np.float64):
+    """
+    Scales raw Collection 2 values to reflectance (SR_B*) or Kelvin (ST_B*) in the given precision
+    :param name: Band name
+    :type name: String
+    :param values: Raw (or already masked) band values
+    :type values: np.ndarray
+    :param dtype: np.float64 or np.float32
+    :type dtype: type
+    :return: New array of the scaled values
+    :rtype: np.ndarray
+    """
+    scale, offset = (THERMAL_SCALE, THERMAL_OFFSET) if name.startswith('ST_B') else (OPTICAL_SCALE, OPTICAL_OFFSET)
+    values = np.asarray(values).astype(dtype)
+    values *= dtype(scale)
+    values += dtype(offset)
+    return values
+
+
+def clear_water(qa_band):
+    # Same definition as the Earth Engine algorithms (qa.QA_MASKS), one lookup per pixel
+    return QA_DECODER.mask(qa_band, 'clear_water')
+
+
+def band_paths(directory):
+    # Band name -> GeoTIFF path of a downloaded Landsat Collection 2 scene (one file per band, e.g. *_SR_B2.TIF)
+    paths = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.TIF'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        for suffix in ('SR_B', 'ST_B', 'QA_PIXEL', '_B10', '_B11'):
+            if suffix in name:
+                paths[name[name.index(suffix):].lstrip('_')] = path
+                break
+    return paths
+
+
+class LocalImage:
+    """
+    In-memory counterpart of an ee.Image: named band arrays, a shared pixel mask and the scene
+    properties (e.g. RADIANCE_MULT_BAND_10). Masked pixels become NaN once a band is scaled to float.
+    """
+
+    def __init__(self, bands, properties=None, mask=None):
+        self.bands = dict(bands)
+        self.properties = dict(properties or {})
+        self.mask = mask
+
+    def select(self, name):
+        return self.bands[name]
+
+    def band_names(self, prefix):
+        return [name for name in self.bands if name.startswith(prefix)]
+
+    def add_bands(self, bands):
+        return LocalImage({**self.bands, **bands}, self.properties, self.mask)
+
+    def update_mask(self, mask):
+        combined = mask if self.mask is None else self.mask & mask
+        return LocalImage(self.bands, self.properties, combined)
+
+    def masked(self, band, dtype=np.float64):
+        # Float copy of a band with NaN where the image is masked
+        values = np.asarray(band, dtype=dtype)
+        if self.mask is None:
+            return values
+        return np.where(self.mask, values, np.nan)
+
+    @classmethod
+    def from_directory(cls, directory, properties=None):
+        """
+        Reads a downloaded Landsat Collection 2 scene (one GeoTIFF per band, e.g. *_SR_B2.TIF)
+        :param directory: Directory holding the scene's band files
+        :type directory: String
+        :param properties: Scene metadata, e.g. radiance scaling for calculate_sst
+        :type properties: Dict
+        :return: Image with every SR_B*, ST_B*, B10/B11 and QA_PIXEL band found
+        :rtype: LocalImage
+        """
+        import rasterio
+
+        bands = {}
+        for band_name, path in band_paths(directory).items():
+            with rasterio.open(path) as src:
+                bands[band_name] = src.read(1)
+        return cls(bands, properties)
+
+
+class LocalImageFunctions:
+    """
+    NumPy implementation of the ImageFunctions algorithms for scenes already on disk.
+    Methods take and return LocalImage objects and mirror the Earth Engine versions step by step.
+
+    With precision='float32' the scaling and the chl-a, SPM and salinity formulas run in float32,
+    halving memory; the pixels FLOAT32_GUARDS marks as ill-conditioned are recomputed in float64,
+    so results stay within the bounds checked by 05-benchmarks/bench_precision.py.
+    """
+
+    def __init__(self, precision='float64'):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}")
+        self.precision = precision
+        self.dtype = np.float32 if precision == 'float32' else np.float64
+
+    def _product(self, product, raw_bands, scaled_bands):
+        # Computes a product in the working precision and recomputes its ill-conditioned pixels in float64
+        values = PRODUCT_INDEX[product](scaled_bands)
+        if self.dtype is np.float32:
+            ill = ill_conditioned(product, scaled_bands)
+            if ill is not None and ill.any():
+                exact = {name: scale_band(name, raw_bands[name][ill]) for name in PRODUCT_BANDS[product]}
+                values[ill] = PRODUCT_INDEX[product](exact)
+        return values
+
+    def _step_by_step(self, image, product):
+        # Masks and scales the whole image, then computes one product
+        scaled = self.apply_scale_factors(self.mask_clear_water(image))
+        bands = PRODUCT_BANDS[product]
+        values = self._product(product, {name: image.select(name) for name in bands},
+                               {name: scaled.select(name) for name in bands})
+        return scaled.add_bands({product: values})
+
+    # Define a function to apply scaling and offset
+    def apply_scale_factors(self, image):
+        scaled_bands = {name: scale_band(name, image.masked(image.select(name), self.dtype), self.dtype)
+                        for name in image.band_names('SR_B') + image.band_names('ST_B')}
+        return image.add_bands(scaled_bands)
+
+    # Define function to return QA bands
+    def extract_qa_bits(self, qa_band, start_bit, end_bit):
+        """
+        Extracts QA values from a QA_PIXEL array
+        :param qa_band: Array of the QA layer
+        :type qa_band: np.ndarray
+        :param start_bit: Starting bit
+        :type start_bit: Integer
+        :param end_bit: Ending bit
+        :type end_bit: Integer
+        :return: Array with extracted QA values
+        :rtype: np.ndarray
+        """
+        return (np.asarray(qa_band, dtype=np.uint16) >> start_bit) & bit_mask(start_bit, end_bit)
+
+    # Define a function to keep clear water pixels, same masks as the Earth Engine algorithms
+    def mask_clear_water(self, image):
+        return image.update_mask(clear_water(image.select('QA_PIXEL')))
+
+    # Define a function to calculate Chlorphyll-a based on trinh et al.(2017)
+    def trinh_et_al_chl_a(self, image):
+        return self._step_by_step(image, 'ln_chl_a')
+
+    # Define a function to calculate SPM from Novoa et al.(2017) based on Nechad et al. (2010) NIR (recalibrated) model
+    def novoa_et_al_spm(self, image):
+        return self._step_by_step(image, 'spm')
+
+    # Define a function to calculate SST from the Band 10 at-sensor radiance
+    def calculate_sst(self, image):
+        image = self.mask_clear_water(image)
+        ml_b10 = float(image.properties['RADIANCE_MULT_BAND_10'])
+        al_b10 = float(image.properties['RADIANCE_ADD_BAND_10'])
+        l_lambda_b10 = image.masked(image.select('B10')) * ml_b10 + al_b10
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sst = SST_B10['K2'] / np.log(SST_B10['K1'] / l_lambda_b10 + 1) - 273.15
+        return image.add_bands({'SST_B10_Celsius': sst})
+
+    def ansari_akhoondzadeh_salinity(self, image):
+        return self._step_by_step(image, 'salinity')
+
+    def fused_products(self, image, products=OPTICAL_PRODUCTS, tile_rows=256):
+        """
+        Computes several products in one pass over row tiles: the QA mask, the scaling of only the
+        bands the products read, and the index math all happen per tile, so no full-scene float
+        temporaries are created besides the outputs
+        :param image: Unscaled scene with QA_PIXEL and the SR_B* bands the products need
+        :type image: LocalImage
+        :param products: Any of 'ln_chl_a', 'spm', 'salinity' and 'ST_B10_Celsius' (Level 2 surface temperature)
+        :type products: Tuple
+        :param tile_rows: Number of rows processed per tile
+        :type tile_rows: Integer
+        :return: The masked product bands, in the precision of the instance
+        :rtype: Dict
+        """
+        qa_band = image.select('QA_PIXEL')
+        needed = sorted({band for product in products for band in PRODUCT_BANDS[product]})
+        outputs = {product: np.empty(qa_band.shape, dtype=self.dtype) for product in products}
+
+        for start in range(0, qa_band.shape[0], tile_rows):
+            window = slice(start, start + tile_rows)
+            clear = clear_water(qa_band[window])
+            if image.mask is not None:
+                clear &= image.mask[window]
+
+            raw = {name: image.select(name)[window] for name in needed}
+            scaled = {}
+            for name in needed:
+                band = scale_band(name, raw[name], self.dtype)
+                band[~clear] = np.nan
+                scaled[name] = band
+
+            for product in products:
+                outputs[product][window] = self._product(product, raw, scaled)
+
+        return outputs
+
+    def compute_all_products(self, image, tile_rows=256):
+        """
+        Local counterpart of ImageFunctions.compute_all_products: one band stack with the unmasked
+        true color bands and the masked products from a single fused pass over the scene
+        :param image: Unscaled scene with QA_PIXEL and SR_B1 to SR_B5
+        :type image: LocalImage
+        :return: Image with SR_B4, SR_B3, SR_B2, ln_chl_a, spm and salinity
+        :rtype: LocalImage
+        """
+        rgb = {name: scale_band(name, image.select(name), self.dtype) for name in ('SR_B4', 'SR_B3', 'SR_B2')}
+        products = self.fused_products(image, tile_rows=tile_rows)
+        return LocalImage({**rgb, **products}, image.properties)
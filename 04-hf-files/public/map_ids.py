@@ -0,0 +1,91 @@
+import contextvars
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+
+from tracing import TRACER, payload_size, request_size
+
+LOGGER = logging.getLogger('waterquality.map_ids')
+
+# HTTP statuses Earth Engine reports for rate limits and server errors, and the wording of its timeouts
+TRANSIENT_STATUS = re.compile(r'\b(429|5\d\d)\b')
+TRANSIENT_MESSAGES = ('too many requests', 'quota exceeded', 'rate limit', 'internal error', 'service unavailable',
+                      'backend error', 'deadline exceeded', 'timed out')
+
+
+def is_transient(error):
+    """
+    Tells whether a failed request may succeed when retried: rate limits (429), server errors (5xx) and
+    timeouts. Errors in the request itself, e.g. an unknown band, fail the same way every time
+    :param error: Exception raised by the request
+    :type error: Exception
+    :return: True when the request is worth retrying
+    :rtype: Boolean
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # HTTP errors of the underlying API client carry the response status
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status is not None:
+        return int(status) == 429 or int(status) >= 500
+    if isinstance(error, ee.EEException):
+        message = str(error).lower()
+        return TRANSIENT_STATUS.search(message) is not None or any(text in message for text in TRANSIENT_MESSAGES)
+    return False
+
+
+def request_map_id(image, vis_params, retries=3, backoff=0.5):
+    """
+    Requests the map ID of an image, retrying with exponential backoff on transient failures such as
+    rate limits (see is_transient); any other error is raised right away
+    :param image: Image to visualize
+    :type image: ee.Image
+    :param vis_params: Visualization parameters, None for the image's defaults
+    :type vis_params: Dict
+    :param retries: Number of retries after the first attempt
+    :type retries: Integer
+    :param backoff: Delay in seconds before the first retry, doubled for every further one
+    :type backoff: Float
+    :return: Map ID dictionary with the tile_fetcher
+    :rtype: Dict
+    """
+    vis_params = vis_params or {}
+    bands = vis_params.get('bands', [])
+    image = ee.Image(image)
+    with TRACER.span('getMapId', bands=bands if isinstance(bands, str) else ','.join(bands),
+                     request_bytes=request_size(image)) as span:
+        for attempt in range(retries + 1):
+            try:
+                map_id = image.getMapId(vis_params)
+                span.set(retries=attempt, payload_bytes=payload_size({key: map_id.get(key) for key in ('mapid', 'token')}))
+                return map_id
+            except Exception as e:
+                span.set(retries=attempt)
+                if attempt == retries or not is_transient(e):
+                    raise
+                delay = backoff * 2 ** attempt
+                LOGGER.warning("Map ID request failed (%s), retrying in %.1f s", e, delay)
+                time.sleep(delay)
+
+
+def resolve_map_ids(requests, max_workers=6, retries=3, backoff=0.5):
+    """
+    Resolves the map IDs of several images concurrently, so the wall time follows the slowest
+    request instead of the sum of all of them
+    :param requests: (image, vis_params) pairs
+    :type requests: List
+    :param max_workers: Maximum number of requests in flight
+    :type max_workers: Integer
+    :return: Map IDs in the order of the requests
+    :rtype: List
+    """
+    if not requests:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(requests))) as executor:
+        # Each request runs in a copy of the caller's context, so its span nests under the caller's
+        futures = [executor.submit(contextvars.copy_context().run, request_map_id, image, vis_params, retries, backoff)
+                   for image, vis_params in requests]
+        return [future.result() for future in futures]
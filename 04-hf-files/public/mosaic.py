@@ -0,0 +1,52 @@
+import ee
+
+from qa import QA_DECODER
+
+
+def scene_quality(image):
+    """
+    Per-pixel quality used to pick between overlapping scenes: 2 for clear pixels, 1 for cloudy
+    pixels and 0 for fill, from the QA_PIXEL fill bit (0) and cloud confidence bits (8-9)
+    :param image: Landsat Collection 2 Level 2 scene
+    :type image: ee.Image
+    :return: Single band image named 'quality'
+    :rtype: ee.Image
+    """
+    qa_band = image.select('QA_PIXEL')
+    not_fill = QA_DECODER.ee_mask(qa_band, 'fill').Not()
+    clear = QA_DECODER.ee_mask(qa_band, 'cloud').Not()  # same cloud test as the product masks
+    return not_fill.add(not_fill.And(clear)).rename('quality')
+
+
+def daily_mosaics(collection):
+    """
+    Groups a scene collection by acquisition date on the server and quality-mosaics the scenes of
+    every day, so a bay straddling two WRS path/rows keeps both tiles. Each pixel comes from the
+    scene with the best scene_quality, QA_PIXEL included, so the product masks still apply.
+    :param collection: Landsat Collection 2 Level 2 scenes with DATE_ACQUIRED
+    :type collection: ee.ImageCollection
+    :return: One image per day with DATE_ACQUIRED, system:time_start, SCENE_COUNT, the CLOUD_COVER
+        of the clearest scene and a system:index (and MOSAIC_ID) like LC08_20211111
+    :rtype: ee.ImageCollection
+    """
+    days = collection.aggregate_array('DATE_ACQUIRED').distinct()
+
+    def mosaic_day(day):
+        scenes = collection.filter(ee.Filter.eq('DATE_ACQUIRED', day))
+        first = ee.Image(scenes.first())
+        band_names = first.bandNames()
+        mosaic = scenes.map(lambda image: image.addBands(scene_quality(image))) \
+            .qualityMosaic('quality') \
+            .select(band_names) \
+            .setDefaultProjection(first.select(0).projection())
+        # Scene IDs start with the sensor, e.g. LC08_041036_20211111
+        index = ee.String(first.get('system:index')).slice(0, 4).cat('_').cat(ee.String(day).replace('-', '', 'g'))
+        return mosaic.copyProperties(first) \
+            .set('system:time_start', first.get('system:time_start')) \
+            .set('MOSAIC_ID', index) \
+            .set('SCENE_COUNT', scenes.size()) \
+            .set('CLOUD_COVER', scenes.aggregate_min('CLOUD_COVER'))
+
+    # A collection built from a list numbers its images, the daily IDs are set once the images are in it
+    return ee.ImageCollection.fromImages(days.map(mosaic_day)) \
+        .map(lambda image: image.set('system:index', image.get('MOSAIC_ID')))
@@ -0,0 +1,55 @@
+import ee
+
+from qa import QA_DECODER
+
+# Scale of the QA reduction in metres, 10 x 10 Landsat pixels: coarse enough to cost little next to the products
+PREFILTER_SCALE = 300
+
+# Scenes and dates with less of the AOI usable as clear water are skipped
+MIN_USABLE_FRACTION = 0.2
+
+# Scenes this cloudy (CLOUD_COVER, percent of the whole scene) are skipped from their metadata, without a QA reduction
+MAX_CLOUD_COVER = 95
+
+
+def usable_fraction(image, aoi, scale=PREFILTER_SCALE):
+    """
+    Estimates the fraction of the AOI usable by the water products from a coarse reduction of QA_PIXEL:
+    the pixels the product masks keep (QA mask 'clear_water'), pixels outside the scene count as unusable
+    :param image: Landsat Collection 2 Level 2 scene or daily mosaic
+    :type image: ee.Image
+    :param aoi: Region to reduce over
+    :type aoi: ee.Geometry
+    :param scale: Scale of the reduction in metres
+    :type scale: Integer
+    :return: Fraction between 0 and 1
+    :rtype: ee.Number
+    """
+    clear_water = QA_DECODER.ee_mask(image.select('QA_PIXEL'), 'clear_water').unmask(0).rename('usable')
+    fraction = clear_water.reduceRegion(ee.Reducer.mean(), aoi, scale, maxPixels=1e9).get('usable')
+    # A scene missing the AOI reduces to null
+    return ee.Number(ee.Algorithms.If(fraction, fraction, 0))
+
+
+def set_usable_fraction(image, aoi, scale=PREFILTER_SCALE):
+    # Sets USABLE_FRACTION, 0 for scenes overcast by their metadata, which are not reduced at all
+    overcast = ee.Number(image.get('CLOUD_COVER')).gte(MAX_CLOUD_COVER)
+    return image.set('USABLE_FRACTION', ee.Algorithms.If(overcast, 0, usable_fraction(image, aoi, scale)))
+
+
+def prefilter(collection, aoi, min_fraction=MIN_USABLE_FRACTION, scale=PREFILTER_SCALE):
+    """
+    Keeps the images with enough clear water over the AOI, before any full-resolution processing.
+    The filter runs on the server as part of the same request, so the products and statistics of
+    the skipped images are never computed
+    :param collection: Scenes or daily mosaics with QA_PIXEL and CLOUD_COVER
+    :type collection: ee.ImageCollection
+    :param aoi: Region the usable fraction is estimated over
+    :type aoi: ee.Geometry
+    :param min_fraction: Lowest usable fraction kept
+    :type min_fraction: Float
+    :return: The images with USABLE_FRACTION of at least min_fraction
+    :rtype: ee.ImageCollection
+    """
+    return collection.map(lambda image: set_usable_fraction(image, aoi, scale)) \
+        .filter(ee.Filter.gte('USABLE_FRACTION', min_fraction))
@@ -0,0 +1,106 @@
+import ee
+import numpy as np
+
+
+# Landsat Collection 2 QA_PIXEL flags: name -> (start bit, end bit, value), the flag is set when the bits equal the value
+QA_FLAGS = {
+    'fill': (0, 0, 1),
+    'cirrus': (2, 2, 1),
+    'shadow': (4, 4, 1),
+    'snow': (5, 5, 1),
+    'water': (7, 7, 1),
+    'cloud': (8, 9, 3),  # high cloud confidence
+}
+
+# Masks combined from the flags: name -> (flag, required state) pairs, all of which must hold
+QA_MASKS = {
+    'clear_water': (('water', True), ('cloud', False)),
+}
+
+
+def bit_mask(start_bit, end_bit):
+    # Mask of the bits from start_bit to end_bit, once shifted down to bit 0
+    return (1 << (end_bit - start_bit + 1)) - 1
+
+
+class QaDecoder:
+    """
+    Single definition of the QA flags for both backends.
+
+    Locally, every possible 16-bit QA_PIXEL value is decoded once into a 65,536-entry table of
+    packed flags (one bit per name in QA_FLAGS and QA_MASKS), so a whole scene is decoded with one
+    indexing operation. For Earth Engine, the same definitions are turned into ee.Image operations.
+    """
+
+    def __init__(self, flags=QA_FLAGS, masks=QA_MASKS):
+        self.flags = dict(flags)
+        self.masks = dict(masks)
+        self.names = list(self.flags) + list(self.masks)
+        if len(self.names) > 8:
+            raise ValueError("QaDecoder packs the flags into 8 bits")
+        self.bits = {name: 1 << position for position, name in enumerate(self.names)}
+        self._lut = None
+
+    @property
+    def lut(self):
+        # Built on first use, 64 KiB
+        if self._lut is None:
+            values = np.arange(1 << 16, dtype=np.uint32)
+            lut = np.zeros(1 << 16, dtype=np.uint8)
+            decoded = {}
+            for name, (start_bit, end_bit, value) in self.flags.items():
+                decoded[name] = ((values >> start_bit) & bit_mask(start_bit, end_bit)) == value
+            for name, conditions in self.masks.items():
+                decoded[name] = np.logical_and.reduce([decoded[flag] == state for flag, state in conditions])
+            for name in self.names:
+                lut[decoded[name]] |= self.bits[name]
+            self._lut = lut
+        return self._lut
+
+    def decode(self, qa_band):
+        """
+        Decodes a QA_PIXEL array into packed flags
+        :param qa_band: Array of the QA layer
+        :type qa_band: np.ndarray
+        :return: uint8 array of the same shape, test a flag with mask or packed & decoder.bits[name]
+        :rtype: np.ndarray
+        """
+        return self.lut[np.asarray(qa_band, dtype=np.uint16)]
+
+    def mask(self, qa_band, name):
+        """
+        Returns one flag or combined mask of a QA_PIXEL array, e.g. 'clear_water' or 'cloud'
+        :param qa_band: Array of the QA layer, or packed flags from decode
+        :type qa_band: np.ndarray
+        :param name: Name from QA_FLAGS or QA_MASKS
+        :type name: String
+        :return: Boolean array
+        :rtype: np.ndarray
+        """
+        packed = qa_band if qa_band.dtype == np.uint8 else self.decode(qa_band)
+        return (packed & self.bits[name]) != 0
+
+    def ee_mask(self, qa_band, name):
+        """
+        Earth Engine version of mask, built from the same definitions
+        :param qa_band: Single-band image of the QA layer
+        :type qa_band: ee.Image
+        :param name: Name from QA_FLAGS or QA_MASKS
+        :type name: String
+        :return: Single band 0/1 image named after the flag
+        :rtype: ee.Image
+        """
+        if name in self.flags:
+            start_bit, end_bit, value = self.flags[name]
+            qa_band = ee.Image(qa_band).select([0])
+            return qa_band.rightShift(start_bit).bitwiseAnd(bit_mask(start_bit, end_bit)).eq(value).rename(name)
+        mask = None
+        for flag, state in self.masks[name]:
+            condition = self.ee_mask(qa_band, flag)
+            condition = condition if state else condition.Not()
+            mask = condition if mask is None else mask.And(condition)
+        return mask.rename(name)
+
+
+# Shared decoder, the lookup table is built once per process
+QA_DECODER = QaDecoder()
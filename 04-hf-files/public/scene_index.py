@@ -0,0 +1,201 @@
+"""
+Local index of the Landsat scenes over the study area, updated incrementally from Earth Engine.
+
+    python 04-hf-files/public/scene_index.py
+
+Per scene it keeps the acquisition time, WRS path/row, CLOUD_COVER, the fraction of the AOI
+the scene's footprint covers and the fraction usable as clear water (prefilter.py). Updates
+page through the archive in 6-month windows, from its start or from the newest indexed scene
+(less INGESTION_LAG_DAYS, as scenes arrive late), so listing the available dates is a local
+query for the app's date picker and the scripts.
+"""
+import argparse
+import datetime
+import os
+import sqlite3
+import threading
+
+import ee
+import pandas as pd
+
+from constants import SCENE_INDEX_PATH
+from prefilter import PREFILTER_SCALE, set_usable_fraction
+from time_series import ARCHIVE_START, INGESTION_LAG_DAYS, date_windows
+from tracing import TRACER
+
+# Collection the app's layers and the scripts take their dates from
+INDEXED_COLLECTIONS = ('LANDSAT/LC08/C02/T1_L2',)
+
+
+def _date(time_start):
+    # Acquisition date (YYYY-MM-DD, UTC) of a time in ms since the epoch
+    return datetime.datetime.fromtimestamp(time_start / 1000, datetime.timezone.utc).strftime('%Y-%m-%d')
+
+
+class SceneIndex:
+    """
+    SQLite index of scenes keyed by collection, scene ID and AOI hash, the AOI coverage depends on the AOI.
+    """
+
+    def __init__(self, path=SCENE_INDEX_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS scenes (
+                collection TEXT NOT NULL,
+                scene_id TEXT NOT NULL,
+                aoi_hash TEXT NOT NULL,
+                time_start INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                wrs_path INTEGER,
+                wrs_row INTEGER,
+                cloud_cover REAL,
+                aoi_coverage REAL,
+                usable_fraction REAL,
+                PRIMARY KEY (collection, scene_id, aoi_hash)
+            )
+        """)
+        # An index built before the pre-filter lacks usable_fraction, it is emptied so the next update rebuilds it
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(scenes)")]
+        if 'usable_fraction' not in columns:
+            self._connection.execute("DELETE FROM scenes")
+            self._connection.execute("ALTER TABLE scenes ADD COLUMN usable_fraction REAL")
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS scenes_by_time ON scenes (collection, aoi_hash, time_start)")
+        self._connection.commit()
+
+    def last_time_start(self, collection_id, aoi_key):
+        # Acquisition time (ms since the epoch) of the newest indexed scene, None for an empty index
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT MAX(time_start) FROM scenes WHERE collection = ? AND aoi_hash = ?",
+                (collection_id, aoi_key),
+            ).fetchone()
+        return row[0]
+
+    def update(self, collection_id, aoi, aoi_key, window_months=6):
+        """
+        Adds the scenes acquired since the last update, paging from the archive start or the newest
+        indexed scene in date windows of one Earth Engine request each, as time_series.iter_time_series
+        does. Every window is stored as it arrives, so an interrupted update resumes at its newest scene
+        :param collection_id: Earth Engine collection, e.g. 'LANDSAT/LC08/C02/T1_L2'
+        :type collection_id: String
+        :param aoi: Study area the scenes must intersect and whose coverage is computed
+        :type aoi: ee.Geometry
+        :param aoi_key: AOI hash of the boundary, Boundary.aoi_key
+        :type aoi_key: String
+        :param window_months: Length of every window in months
+        :type window_months: Integer
+        :return: Number of scenes added or refreshed
+        :rtype: Integer
+        """
+        end = (datetime.date.today() + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+        last = self.last_time_start(collection_id, aoi_key)
+        start = ARCHIVE_START
+        if last is not None:
+            # Recent scenes are asked again, a scene ingested late can be older than the newest indexed one
+            start = max(start, _date(last - INGESTION_LAG_DAYS * 24 * 3600 * 1000))
+        # An interrupted first update resumes far back, it is paged like the first one
+        windows = date_windows(start, end, window_months)
+
+        aoi_area = aoi.area(100)
+
+        def coverage(image):
+            # Fraction of the AOI inside the scene footprint, 100 m error margin is plenty for a fraction
+            covered = image.geometry().intersection(aoi, 100).area(100)
+            return set_usable_fraction(image, aoi, PREFILTER_SCALE).set('AOI_COVERAGE', covered.divide(aoi_area))
+
+        columns = ['system:index', 'system:time_start', 'WRS_PATH', 'WRS_ROW', 'CLOUD_COVER', 'AOI_COVERAGE',
+                   'USABLE_FRACTION']
+        indexed = 0
+        for window_start, window_end in windows:
+            collection = ee.ImageCollection(collection_id).filterDate(window_start, window_end).filterBounds(aoi)
+            rows = TRACER.get_info(collection.map(coverage).reduceColumns(ee.Reducer.toList(len(columns)), columns)
+                                   .get('list'), 'scene_index', collection=collection_id, start=window_start)
+            with self._lock:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO scenes (collection, scene_id, aoi_hash, time_start, date, wrs_path, "
+                    "wrs_row, cloud_cover, aoi_coverage, usable_fraction) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(collection_id, scene_id, aoi_key, time_start, _date(time_start),
+                      wrs_path, wrs_row, cloud_cover, aoi_coverage, usable_fraction)
+                     for scene_id, time_start, wrs_path, wrs_row, cloud_cover, aoi_coverage, usable_fraction in rows],
+                )
+                self._connection.commit()
+            indexed += len(rows)
+        print(f"{collection_id}: {indexed} scenes indexed since {'the archive start' if last is None else 'the last update'}")
+        return indexed
+
+    def scenes(self, collection_id, aoi_key, start=None, end=None, max_cloud_cover=None, min_coverage=None):
+        """
+        Returns the indexed scenes, newest first
+        :param collection_id: Earth Engine collection
+        :type collection_id: String
+        :param aoi_key: AOI hash of the boundary, Boundary.aoi_key
+        :type aoi_key: String
+        :param start: Keep scenes acquired on or after this date (YYYY-MM-DD)
+        :type start: String
+        :param end: Keep scenes acquired before this date (YYYY-MM-DD)
+        :type end: String
+        :param max_cloud_cover: Keep scenes with at most this CLOUD_COVER (percent)
+        :type max_cloud_cover: Float
+        :param min_coverage: Keep scenes covering at least this fraction of the AOI
+        :type min_coverage: Float
+        :return: scene_id, date, wrs_path, wrs_row, cloud_cover, aoi_coverage and usable_fraction per scene
+        :rtype: pd.DataFrame
+        """
+        query = ("SELECT scene_id, date, wrs_path, wrs_row, cloud_cover, aoi_coverage, usable_fraction FROM scenes "
+                 "WHERE collection = ? AND aoi_hash = ?")
+        params = [collection_id, aoi_key]
+        for condition, value in (("date >= ?", start), ("date < ?", end),
+                                 ("cloud_cover <= ?", max_cloud_cover), ("aoi_coverage >= ?", min_coverage)):
+            if value is not None:
+                query += f" AND {condition}"
+                params.append(value)
+        with self._lock:
+            return pd.read_sql_query(query + " ORDER BY time_start DESC", self._connection, params=params)
+
+    def dates(self, collection_id, aoi_key, limit=None, min_usable_fraction=None, **filters):
+        """
+        Returns the distinct acquisition dates of the indexed scenes, newest first
+        :param collection_id: Earth Engine collection
+        :type collection_id: String
+        :param aoi_key: AOI hash of the boundary, Boundary.aoi_key
+        :type aoi_key: String
+        :param limit: Keep only the newest dates
+        :type limit: Integer
+        :param min_usable_fraction: Keep dates with at least this fraction of the AOI usable as clear water
+        :type min_usable_fraction: Float
+        :param filters: start, end, max_cloud_cover and min_coverage, as for scenes
+        :return: Dates formatted as YYYY-MM-DD
+        :rtype: List
+        """
+        scenes = self.scenes(collection_id, aoi_key, **filters)
+        if min_usable_fraction is not None:
+            # Same-day scenes overlap along their path, so their fractions do not add up. The daily mosaic
+            # keeps the best pixel of every scene and is at least as usable as its best scene
+            usable = scenes.groupby('date', sort=False)['usable_fraction'].max()
+            scenes = scenes[scenes['date'].map(usable).ge(min_usable_fraction)]
+        dates = list(dict.fromkeys(scenes['date']))
+        return dates if limit is None else dates[:limit]
+
+
+def main():
+    # Imported here so that the scripts can use the index with their own constants
+    from boundary import load_boundary
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--collections', nargs='+', default=list(INDEXED_COLLECTIONS))
+    parser.add_argument('--index', default=SCENE_INDEX_PATH, help='scene index (SQLite)')
+    args = parser.parse_args()
+
+    ee.Initialize()
+    boundary = load_boundary()
+    index = SceneIndex(args.index)
+    for collection_id in args.collections:
+        index.update(collection_id, boundary.aoi('analysis'), boundary.aoi_key)
+
+
+if __name__ == '__main__':
+    main()
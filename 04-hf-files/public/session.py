@@ -0,0 +1,22 @@
+import solara
+
+
+# Outside a Solara session (scripts, benchmarks) both helpers return None
+
+
+def session_context():
+    # The Solara kernel context of the current session, entered by the loader threads to update widgets
+    try:
+        import solara.server.kernel_context
+
+        return solara.server.kernel_context.get_current_context()
+    except Exception:
+        return None
+
+
+def session_id():
+    # Identifies the browser session the spans of a Map belong to
+    try:
+        return solara.get_session_id()
+    except Exception:
+        return None
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from tracing import TRACER
+
+
+class SharedCache:
+    """
+    Server-wide cache shared by every session of the app, thread-safe, with TTL and LRU eviction.
+
+    Requests are single-flight: while a value is being computed, identical requests from other
+    sessions wait for that computation instead of starting their own, so N sessions toggling to the
+    same product cost one backend call per layer. Failed computations are not cached.
+    """
+
+    def __init__(self, name, max_entries=256, ttl=None):
+        self.name = name
+        self.max_entries = max_entries
+        # Seconds a value stays valid, None for values that never expire
+        self.ttl = ttl
+        # Disabled caches compute every request, the baseline of 05-benchmarks/bench_sessions.py
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached value of a key, computing it once across all sessions when missing or expired
+        :param key: Hashable key identifying the value
+        :type key: Hashable
+        :param compute: Called without arguments to compute the value, e.g. the map-ID request
+        :type compute: Callable
+        :return: The value
+        """
+        if not self.enabled:
+            return compute()
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and (entry[1] is None or entry[1] > time.monotonic())
+            if hit:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                    self.expirations += 1
+                future = self._in_flight.get(key)
+                owner = future is None
+                if owner:
+                    future = self._in_flight[key] = Future()
+                    self.misses += 1
+                else:
+                    self.joined += 1
+        if hit:
+            TRACER.cache(self.name, True)
+            return entry[0]
+        # A request joining one in flight is served without a backend call, like a hit
+        TRACER.cache(self.name, not owner, joined=int(not owner))
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            expires = None if self.ttl is None else time.monotonic() + self.ttl
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key=None):
+        # Drop one key, or every key when none is given
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'joined': self.joined,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'in_flight': len(self._in_flight),
+            }
+
+
+# Map IDs of the layers, keyed by LayerCache.key; Earth Engine map IDs expire, so they are renewed hourly
+MAP_ID_CACHE = SharedCache('shared.map_ids', max_entries=512, ttl=3600)
+
+# Scene lists and statistics requests of StatsStore.fetch; new overpasses appear, so the scene lists expire
+STATISTICS_CACHE = SharedCache('shared.statistics', max_entries=256, ttl=3600)
+
+# Study boundaries of BoundaryRegistry, keyed by path and modification time
+BOUNDARY_CACHE = SharedCache('shared.boundaries', max_entries=16)
+
+SHARED_CACHES = (MAP_ID_CACHE, STATISTICS_CACHE, BOUNDARY_CACHE)
+
+
+def metrics():
+    # Metrics of every shared cache, keyed by cache name
+    return {cache.name: cache.metrics() for cache in SHARED_CACHES}
@@ -0,0 +1,194 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+import ee
+import pandas as pd
+
+from constants import ALGORITHM_VERSIONS, STATS_STORE_PATH
+from shared_cache import STATISTICS_CACHE
+from tracing import TRACER
+
+# Where the statistics of a row were computed: the app and the scripts reduce daily mosaics on Earth Engine
+# (IDs like LC08_20211111), batch.py reduces downloaded scenes locally (IDs like LC08_041036_20211111)
+EARTH_ENGINE = 'earth_engine'
+LOCAL = 'local'
+
+
+def aoi_hash(geometry):
+    """
+    Identifies an AOI by the hash of its geometry, so statistics over a different boundary are not reused
+    :param geometry: The AOI geometry
+    :type geometry: shapely.geometry.base.BaseGeometry
+    :return: Hex digest of the geometry's WKB
+    :rtype: String
+    """
+    return hashlib.sha1(geometry.wkb).hexdigest()[:16]
+
+
+class StatsStore:
+    """
+    Local SQLite store of per-scene statistics keyed by scene ID, product, AOI hash, algorithm version
+    and source (EARTH_ENGINE or LOCAL), so rows of both backends are never mixed.
+
+    Historical Landsat scenes never change, so only scenes missing from the store are sent to
+    Earth Engine; a rerun after a new overpass reduces exactly one new scene.
+    """
+
+    def __init__(self, path=STATS_STORE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # A store written before the source column mixes the rows of both backends, which cannot be told
+        # apart, so it is emptied and the statistics are computed again
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(statistics)")]
+        if columns and 'source' not in columns:
+            self._connection.execute("DROP TABLE statistics")
+            self._connection.execute("DROP TABLE IF EXISTS windows")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS statistics (
+                scene_id TEXT NOT NULL,
+                product TEXT NOT NULL,
+                aoi_hash TEXT NOT NULL,
+                algorithm_version TEXT NOT NULL,
+                source TEXT NOT NULL,
+                date TEXT,
+                value REAL,
+                area REAL,
+                PRIMARY KEY (scene_id, product, aoi_hash, algorithm_version, source)
+            )
+        """)
+        # Date windows that were fully extracted, the checkpoint of time_series.iter_time_series
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS windows (
+                collection TEXT NOT NULL,
+                product TEXT NOT NULL,
+                aoi_hash TEXT NOT NULL,
+                algorithm_version TEXT NOT NULL,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL,
+                PRIMARY KEY (collection, product, aoi_hash, algorithm_version, start, end)
+            )
+        """)
+        self._connection.commit()
+
+    def known_scenes(self, product, aoi_key, source=EARTH_ENGINE):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT scene_id FROM statistics "
+                "WHERE product = ? AND aoi_hash = ? AND algorithm_version = ? AND source = ?",
+                (product, aoi_key, ALGORITHM_VERSIONS[product], source),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def insert(self, product, aoi_key, rows, source=EARTH_ENGINE):
+        # rows are (scene_id, date, value, area) tuples
+        version = ALGORITHM_VERSIONS[product]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO statistics VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(scene_id, product, aoi_key, version, source, date, value, area)
+                 for scene_id, date, value, area in rows],
+            )
+            self._connection.commit()
+
+    def completed_windows(self, collection_id, product, aoi_key):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT start, end FROM windows WHERE collection = ? AND product = ? AND aoi_hash = ? AND algorithm_version = ?",
+                (collection_id, product, aoi_key, ALGORITHM_VERSIONS[product]),
+            ).fetchall()
+        return set(rows)
+
+    def mark_window(self, collection_id, product, aoi_key, start, end):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO windows VALUES (?, ?, ?, ?, ?, ?)",
+                (collection_id, product, aoi_key, ALGORITHM_VERSIONS[product], start, end),
+            )
+            self._connection.commit()
+
+    def load(self, product, aoi_key, scene_ids=None, start=None, end=None, source=EARTH_ENGINE):
+        """
+        Returns the stored statistics as a DataFrame with scene_id, date, the product column and Area
+        :param product: Product band, e.g. 'ln_chl_a' or 'spm'
+        :type product: String
+        :param aoi_key: AOI hash from aoi_hash
+        :type aoi_key: String
+        :param scene_ids: Restrict to these scenes, all stored scenes when None
+        :type scene_ids: List
+        :param start: Keep scenes acquired on or after this date (YYYY-MM-DD)
+        :type start: String
+        :param end: Keep scenes acquired before this date (YYYY-MM-DD)
+        :type end: String
+        :param source: EARTH_ENGINE or LOCAL, the backend the statistics were computed on
+        :type source: String
+        :return: Statistics sorted by date
+        :rtype: pd.DataFrame
+        """
+        with self._lock:
+            df = pd.read_sql_query(
+                "SELECT scene_id, date, value, area FROM statistics "
+                "WHERE product = ? AND aoi_hash = ? AND algorithm_version = ? AND source = ?",
+                self._connection,
+                params=(product, aoi_key, ALGORITHM_VERSIONS[product], source),
+            )
+        if scene_ids is not None:
+            df = df[df['scene_id'].isin(scene_ids)]
+        df = df.dropna(subset=['value']).rename(columns={'value': product, 'area': 'Area'})
+        df['date'] = pd.to_datetime(df['date'])
+        if start is not None:
+            df = df[df['date'] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df['date'] < pd.Timestamp(end)]
+        return df.sort_values('date').reset_index(drop=True)
+
+    def fetch(self, collection, product, extract_function, aoi_key, prefilter_function=None):
+        """
+        Returns the statistics of every scene in a collection, asking Earth Engine only for the missing ones
+        :param collection: Unprocessed scenes to report on
+        :type collection: ee.ImageCollection
+        :param product: Product band set by extract_function, e.g. 'ln_chl_a'
+        :type product: String
+        :param extract_function: Maps a raw scene to an image with 'date', the product mean and 'Area' properties
+        :type extract_function: Callable
+        :param aoi_key: AOI hash from aoi_hash
+        :type aoi_key: String
+        :param prefilter_function: Narrows the missing scenes before extract_function, e.g. prefilter.prefilter,
+            so stored scenes are never filtered again; the scenes it drops are stored as empty
+        :type prefilter_function: Callable
+        :return: Statistics of the collection's scenes sorted by date
+        :rtype: pd.DataFrame
+        """
+        with TRACER.span('stats_store.fetch', product=product) as span:
+            # Sessions asking for the same collection (same serialized graph) share one request
+            scene_ids = STATISTICS_CACHE.get_or_compute(
+                ('scene_ids', collection.serialize()),
+                lambda: TRACER.get_info(collection.aggregate_array('system:index'), 'scene_ids'),
+            )
+            known = self.known_scenes(product, aoi_key)
+            missing = [scene_id for scene_id in scene_ids if scene_id not in known]
+            span.set(hits=len(scene_ids) - len(missing), misses=len(missing))
+            print(f"{len(scene_ids) - len(missing)} scenes in the statistics store, {len(missing)} to compute")
+
+            if missing:
+                scenes = collection.filter(ee.Filter.inList('system:index', missing))
+                if prefilter_function is not None:
+                    scenes = prefilter_function(scenes)
+                extracted = scenes.map(extract_function)
+                data = STATISTICS_CACHE.get_or_compute(
+                    ('scene_statistics', product, aoi_key, ALGORITHM_VERSIONS[product], tuple(missing)),
+                    lambda: TRACER.get_info(extracted.reduceColumns(
+                        ee.Reducer.toList(4), ['system:index', 'date', product, 'Area']
+                    ).get('list'), 'scene_statistics', scenes=len(missing)),
+                )
+                rows = [tuple(row) for row in data]
+                # reduceColumns drops scenes without a value (e.g. fully clouded or pre-filtered), store them as empty so they
+                # are not asked again
+                returned = {row[0] for row in rows}
+                rows += [(scene_id, None, None, None) for scene_id in missing if scene_id not in returned]
+                self.insert(product, aoi_key, rows)
+
+        return self.load(product, aoi_key, scene_ids)
@@ -0,0 +1,258 @@
+"""
+Pre-renders the default map layers into a local XYZ tile pyramid served by the app.
+
+    python 04-hf-files/public/tile_pyramid.py --products "True Color" --zooms 8 14
+
+Every layer the app shows for LAYER_DATES is rendered through Earth Engine once, with the same
+images and visualization as the map (ImageProcess), and its PNG tiles over the study boundary are
+stored under TILE_PYRAMID_PATH/<layer>/{z}/{x}/{y}.png. A layer is listed in the manifest only
+once all its tiles are stored, so the map never shows a partial layer; rerunning the builder
+resumes with the missing tiles. The map reads the manifest (TilePyramid.url_formats) and falls
+back to live Earth Engine for any layer that is not in it.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+from shapely.geometry import box
+from shapely.prepared import prep
+
+from boundary import load_boundary
+from constants import (LAYER_DATES, STUDY_BOUNDARY_PATH, TILE_PYRAMID_PATH, TILE_PYRAMID_URL,
+                       TILE_PYRAMID_ZOOMS)
+from layer_cache import LayerCache
+from map_ids import request_map_id
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def tile_index(lon, lat, zoom):
+    # XYZ (Web Mercator) tile holding a point
+    n = 2 ** zoom
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(x, y, zoom):
+    # Longitude/latitude box of an XYZ tile
+    n = 2 ** zoom
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return box(x / n * 360 - 180, south, (x + 1) / n * 360 - 180, north)
+
+
+def boundary_tiles(geometry, zooms):
+    """
+    Lists the tiles intersecting a geometry, the layers are clipped to it so every other tile is empty
+    :param geometry: Boundary in EPSG:4326
+    :type geometry: shapely.geometry.base.BaseGeometry
+    :param zooms: Lowest and highest zoom level
+    :type zooms: Tuple
+    :return: (z, x, y) tuples
+    :rtype: List
+    """
+    prepared = prep(geometry)
+    west, south, east, north = geometry.bounds
+    tiles = []
+    for zoom in range(zooms[0], zooms[1] + 1):
+        x_min, y_min = tile_index(west, north, zoom)
+        x_max, y_max = tile_index(east, south, zoom)
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                if prepared.intersects(tile_bounds(x, y, zoom)):
+                    tiles.append((zoom, x, y))
+    return tiles
+
+
+def fetch_tile(url, path, retries=3, backoff=0.5):
+    # Downloads one tile unless it is stored already, retrying with exponential backoff like request_map_id
+    if os.path.exists(path):
+        return False
+    for attempt in range(retries + 1):
+        try:
+            with urllib.request.urlopen(url, timeout=60) as response:
+                data = response.read()
+            break
+        except OSError:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.part', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.part', path)
+    return True
+
+
+class LayerCollector:
+    # Stands in for the map: ImageProcess hands it the (date, image, vis_params) layers instead of showing them
+    def __init__(self):
+        self.layers = []
+
+    def attach_layers(self, layers):
+        self.layers.extend(layers)
+
+    def add_colorbar_branca(self, **kwargs):
+        pass
+
+
+class TilePyramid:
+    """
+    Manifest of the pre-rendered layers, keyed like the layer cache by (product, date, vis params, AOI tier).
+
+    The manifest is re-read when the file changes, so a pyramid built while the app runs is picked up.
+    """
+
+    def __init__(self, directory=TILE_PYRAMID_PATH, url=TILE_PYRAMID_URL):
+        self.directory = directory
+        self.url = url
+        self._lock = threading.Lock()
+        self._layers = {}
+        self._mtime = None
+
+    @staticmethod
+    def layer_id(product, date, vis_params, aoi_tier):
+        # Readable directory name, with a hash of the whole key so changed vis params make a new layer
+        key = json.dumps(LayerCache.key(product, date, vis_params, aoi_tier))
+        slug = re.sub(r'[^a-z0-9]+', '-', product.lower()).strip('-')
+        return f"{slug}-{date}-{hashlib.sha1(key.encode()).hexdigest()[:10]}"
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def layers(self):
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.manifest_path)
+            except OSError:
+                self._layers, self._mtime = {}, None
+                return {}
+            if mtime != self._mtime:
+                with open(self.manifest_path) as f:
+                    self._layers = json.load(f)['layers']
+                self._mtime = mtime
+            return self._layers
+
+    def record(self, layer_id, entry):
+        # Adds a complete layer to the manifest, written atomically so the app never reads a partial file
+        layers = dict(self.layers())
+        layers[layer_id] = entry
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.manifest_path + '.part', 'w') as f:
+            json.dump({'layers': layers}, f, indent=1)
+        os.replace(self.manifest_path + '.part', self.manifest_path)
+
+    def url_formats(self, product, dates, vis_params, aoi_tier):
+        """
+        Returns the local tiles of a product's layers if every date was pre-rendered
+        :param product: Product label, e.g. 'True Color'
+        :type product: String
+        :param dates: Acquisition dates of the layers
+        :type dates: List
+        :param vis_params: Visualization parameters of the layers
+        :type vis_params: Dict
+        :param aoi_tier: AOI tier the layers are clipped to
+        :type aoi_tier: String
+        :return: (date, url template, highest zoom) per date, None when any layer is missing
+        :rtype: List
+        """
+        layers = self.layers()
+        url_formats = []
+        for date in dates:
+            layer_id = self.layer_id(product, date, vis_params, aoi_tier)
+            entry = layers.get(layer_id)
+            if entry is None:
+                return None
+            url_formats.append((date, f"{self.url}/{layer_id}/{{z}}/{{x}}/{{y}}.png", entry['zooms'][1]))
+        return url_formats
+
+
+# Pyramid served by the app
+TILE_PYRAMID = TilePyramid()
+
+
+def build(products=('True Color',), dates=LAYER_DATES, zooms=TILE_PYRAMID_ZOOMS, pyramid=TILE_PYRAMID,
+          boundary_path=STUDY_BOUNDARY_PATH, workers=8):
+    """
+    Renders the layers of the products for the dates into the pyramid, skipping complete layers
+    :param products: Product labels, keys of load_process.PRODUCT_METHODS
+    :type products: Tuple
+    :param dates: Acquisition dates, the dates the app shows by default
+    :type dates: List
+    :param zooms: Lowest and highest zoom level
+    :type zooms: Tuple
+    :param pyramid: Pyramid to write to
+    :type pyramid: TilePyramid
+    :param workers: Number of tiles downloaded concurrently
+    :type workers: Integer
+    :return: Number of tiles downloaded
+    :rtype: Integer
+    """
+    # Imported here so that the map can read the pyramid without the processing modules
+    from load_process import PRODUCT_METHODS, ImageProcess
+
+    collector = LayerCollector()
+    process = ImageProcess(collector)
+    process.dates = list(dates)
+    geometry = load_boundary(boundary_path).tier(process.aoi_tier).geometry
+    tiles = boundary_tiles(geometry, zooms)
+    print(f'{len(tiles)} tiles per layer over zoom {zooms[0]} to {zooms[1]}')
+
+    downloaded = 0
+    for product in products:
+        collector.layers = []
+        getattr(process, PRODUCT_METHODS[product])(collector, boundary_path)
+        for date, image, vis_params in collector.layers:
+            layer_id = pyramid.layer_id(product, date, vis_params, process.aoi_tier)
+            if layer_id in pyramid.layers():
+                print(f'{product} {date}: complete')
+                continue
+
+            url_format = request_map_id(image, vis_params)['tile_fetcher'].url_format
+            layer_directory = os.path.join(pyramid.directory, layer_id)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(fetch_tile, url_format.format(z=z, x=x, y=y),
+                                           os.path.join(layer_directory, str(z), str(x), f'{y}.png'))
+                           for z, x, y in tiles]
+                failed = 0
+                for future in futures:
+                    try:
+                        downloaded += future.result()
+                    except OSError as e:
+                        failed += 1
+                        print(f'Tile failed: {e}')
+
+            if failed:
+                print(f'{product} {date}: {failed} tiles failed, rerun to complete the layer')
+                continue
+            pyramid.record(layer_id, {'product': product, 'date': date, 'vis_params': vis_params,
+                                      'aoi_tier': process.aoi_tier, 'zooms': list(zooms), 'tiles': len(tiles)})
+            print(f'{product} {date}: {len(tiles)} tiles')
+    return downloaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', nargs='+', default=['True Color'])
+    parser.add_argument('--dates', nargs='+', default=list(LAYER_DATES))
+    parser.add_argument('--zooms', nargs=2, type=int, default=list(TILE_PYRAMID_ZOOMS), metavar=('MIN', 'MAX'))
+    parser.add_argument('--directory', default=TILE_PYRAMID_PATH)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    ee.Initialize()
+    build(tuple(args.products), args.dates, tuple(args.zooms), TilePyramid(args.directory), workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
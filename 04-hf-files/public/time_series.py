@@ -0,0 +1,98 @@
+import datetime
+
+import ee
+import pandas as pd
+
+from mosaic import daily_mosaics
+from prefilter import MIN_USABLE_FRACTION, prefilter
+from stats_store import EARTH_ENGINE, StatsStore
+
+# Landsat 8 and 9 Collection 2 surface reflectance, extracted one after the other so scene IDs stay unprefixed
+LANDSAT_COLLECTIONS = ('LANDSAT/LC08/C02/T1_L2', 'LANDSAT/LC09/C02/T1_L2')
+
+# First Landsat 8 acquisitions
+ARCHIVE_START = '2013-03-18'
+
+# Scenes keep arriving for a few weeks after acquisition, windows this recent are not checkpointed
+INGESTION_LAG_DAYS = 30
+
+
+def date_windows(start, end, window_months=6):
+    """
+    Splits a date range into consecutive windows
+    :param start: First date (YYYY-MM-DD)
+    :type start: String
+    :param end: Date after the last one (YYYY-MM-DD)
+    :type end: String
+    :param window_months: Length of every window in months
+    :type window_months: Integer
+    :return: (start, end) pairs formatted as YYYY-MM-DD, end excluded
+    :rtype: List
+    """
+    windows = []
+    window_start = pd.Timestamp(start)
+    end = pd.Timestamp(end)
+    while window_start < end:
+        window_end = min(window_start + pd.DateOffset(months=window_months), end)
+        windows.append((window_start.strftime('%Y-%m-%d'), window_end.strftime('%Y-%m-%d')))
+        window_start = window_end
+    return windows
+
+
+def iter_time_series(product, extract_function, aoi, aoi_key, start=ARCHIVE_START, end=None,
+                     window_months=6, collections=LANDSAT_COLLECTIONS, store=None,
+                     min_usable_fraction=MIN_USABLE_FRACTION):
+    """
+    Pages through the Landsat archive in date windows and yields the statistics of each window as
+    a DataFrame, so no request covers more than one window of scenes. Same-day scenes are
+    quality-mosaicked first, giving one row per day. Every finished window is
+    checkpointed in the statistics store; a rerun reads checkpointed windows from disk and resumes
+    at the first unfinished one. Windows ending less than INGESTION_LAG_DAYS ago are never checkpointed.
+    Days with too little clear water over the AOI are skipped before extract_function runs (prefilter.py).
+    :param product: Product band set by extract_function, e.g. 'ln_chl_a'
+    :type product: String
+    :param extract_function: Maps a raw daily mosaic to an image with 'date', the product mean and 'Area' properties
+    :type extract_function: Callable
+    :param aoi: Region the scenes must intersect
+    :type aoi: ee.Geometry
+    :param aoi_key: AOI hash of the boundary, Boundary.aoi_key
+    :type aoi_key: String
+    :param start: First date (YYYY-MM-DD), defaults to the start of the Landsat 8 archive
+    :type start: String
+    :param end: Date after the last one (YYYY-MM-DD), defaults to tomorrow
+    :type end: String
+    :param window_months: Length of every window in months
+    :type window_months: Integer
+    :param collections: Earth Engine collection ids
+    :type collections: Tuple
+    :param store: Statistics store, the default store when None
+    :type store: StatsStore
+    :param min_usable_fraction: Lowest fraction of the AOI usable as clear water, None keeps every day
+    :type min_usable_fraction: Float
+    :return: Generator of DataFrames with scene_id, date, the product column and Area, one per window and collection
+    :rtype: Generator
+    """
+    store = StatsStore() if store is None else store
+    today = datetime.date.today()
+    end = end or (today + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+
+    for collection_id in collections:
+        completed = store.completed_windows(collection_id, product, aoi_key)
+        for window_start, window_end in date_windows(start, end, window_months):
+            if (window_start, window_end) in completed:
+                # Rows of batch.py (LOCAL) are per-scene statistics of another backend, only the daily mosaics are read
+                chunk = store.load(product, aoi_key, start=window_start, end=window_end, source=EARTH_ENGINE)
+                chunk = chunk[chunk['scene_id'].str.startswith(collection_id.split('/')[1])]
+            else:
+                print(f"{collection_id} {window_start} to {window_end}")
+                scenes = daily_mosaics(ee.ImageCollection(collection_id)
+                                       .filterDate(window_start, window_end)
+                                       .filterBounds(aoi))
+                # Only the days missing from the store are pre-filtered, a rerun does not reduce the QA of stored days
+                chunk = store.fetch(scenes, product, extract_function, aoi_key,
+                                    None if min_usable_fraction is None
+                                    else lambda missing: prefilter(missing, aoi, min_usable_fraction))
+                if pd.Timestamp(window_end).date() <= today - datetime.timedelta(days=INGESTION_LAG_DAYS):
+                    store.mark_window(collection_id, product, aoi_key, window_start, window_end)
+            if not chunk.empty:
+                yield chunk
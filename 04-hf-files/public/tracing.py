@@ -0,0 +1,245 @@
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+
+# Finished spans as one JSON object per line, silent until a handler is attached (see Tracer.configure)
+TRACE_LOGGER = logging.getLogger('waterquality.trace')
+
+# Span the current code runs in, the parent of new spans. Worker pools copy the context of the
+# submitting thread (see LayerLoader.submit), so their spans attach to the toggle that queued them
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def request_size(ee_object):
+    # Size of the serialized expression graph, the bytes sent to Earth Engine for a request
+    try:
+        return len(ee_object.serialize())
+    except (AttributeError, TypeError):
+        return None
+
+
+def payload_size(response):
+    # Size of a response as JSON, standing in for the bytes Earth Engine sent back
+    try:
+        return len(json.dumps(response, default=str))
+    except (TypeError, ValueError):
+        return None
+
+
+class Span:
+    # One timed operation: a backend call, a cache lookup or a whole product toggle
+    def __init__(self, span_id, name, parent, session, attributes):
+        self.span_id = span_id
+        self.name = name
+        self.parent_id = parent.span_id if parent is not None else None
+        # Spans belong to the session of their parent unless given one
+        self.session = session if session is not None else getattr(parent, 'session', None)
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+        self._started = time.perf_counter()
+        self._otel_span = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def finished(self):
+        return self.duration is not None
+
+    def record(self):
+        return {'span_id': self.span_id, 'parent_id': self.parent_id, 'session': self.session, 'name': self.name,
+                'start': self.start, 'duration': self.duration, 'error': self.error, **self.attributes}
+
+
+class Tracer:
+    """
+    Records Earth Engine calls as spans with their duration, request and response sizes, retries and cache hits.
+
+    Spans nest through a context variable, so the map-ID requests a toggle queues on the loader
+    pool are children of that toggle and a slow toggle can be traced to its slowest calls.
+    Finished spans are kept in memory for the session summaries, written to the
+    'waterquality.trace' logger and, once enabled, mirrored to OpenTelemetry.
+    """
+
+    def __init__(self, max_spans=10000):
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._otel_tracer = None
+
+    def configure(self, log_path=None, opentelemetry=False):
+        """
+        Enables the optional exports. Pages call it when they are imported, which Solara does again on
+        every reload, so a log target that already has a handler is not given a second one
+        :param log_path: File the structured log is appended to, '-' for stderr, None to keep it off
+        :type log_path: String
+        :param opentelemetry: Mirror spans to the configured OpenTelemetry tracer provider (needs opentelemetry-api)
+        :type opentelemetry: Boolean
+        """
+        if log_path and not any(getattr(handler, 'trace_log_path', None) == log_path
+                                for handler in TRACE_LOGGER.handlers):
+            handler = logging.StreamHandler() if log_path == '-' else logging.FileHandler(log_path)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            handler.trace_log_path = log_path
+            TRACE_LOGGER.addHandler(handler)
+            TRACE_LOGGER.setLevel(logging.INFO)
+            TRACE_LOGGER.propagate = False
+        if opentelemetry:
+            from opentelemetry import trace
+
+            self._otel_tracer = trace.get_tracer('waterquality')
+
+    def start(self, name, session=None, **attributes):
+        # Starts a span that is ended explicitly, e.g. a toggle that finishes when its last layer arrives
+        span = Span(next(self._ids), name, _current_span.get(), session, attributes)
+        if self._otel_tracer is not None:
+            self._start_otel(span)
+        return span
+
+    def end(self, span, error=None):
+        if span.finished:
+            return
+        span.duration = time.perf_counter() - span._started
+        span.error = error
+        if span._otel_span is not None:
+            self._end_otel(span)
+        with self._lock:
+            self._spans.append(span)
+        if TRACE_LOGGER.isEnabledFor(logging.INFO):
+            TRACE_LOGGER.info(json.dumps(span.record(), default=str))
+
+    @contextlib.contextmanager
+    def activate(self, span):
+        # Makes a span the parent of the spans started inside the block
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    @contextlib.contextmanager
+    def span(self, name, session=None, **attributes):
+        """
+        Times the block as a span, nested under the current one
+        :param name: Operation, e.g. 'getMapId' or 'stats_store.fetch'
+        :type name: String
+        :param session: Session the span belongs to, inherited from the parent when None
+        :type session: String
+        :return: The span, attributes can be added with span.set
+        :rtype: Span
+        """
+        span = self.start(name, session, **attributes)
+        error = None
+        try:
+            with self.activate(span):
+                yield span
+        except BaseException as e:
+            error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            self.end(span, error)
+
+    def get_info(self, ee_object, name, **attributes):
+        """
+        Calls getInfo on an Earth Engine object inside a span recording the request and response sizes
+        :param ee_object: Object to compute
+        :type ee_object: ee.ComputedObject
+        :param name: Span name, e.g. 'scene_ids'
+        :type name: String
+        :return: The result of getInfo
+        """
+        with self.span(name, call='getInfo', request_bytes=request_size(ee_object), **attributes) as span:
+            response = ee_object.getInfo()
+            span.set(payload_bytes=payload_size(response))
+        return response
+
+    def cache(self, name, hit, **attributes):
+        # Records a cache lookup as an instant span, counted in the summaries
+        with self.span(name, hits=int(hit), misses=int(not hit), **attributes):
+            pass
+
+    def spans(self, session=None):
+        with self._lock:
+            return [span for span in self._spans if session is None or span.session == session]
+
+    def summary(self, session=None, slowest=3):
+        """
+        Aggregates the finished spans of a session
+        :param session: Session to summarize, every span when None
+        :type session: String
+        :param slowest: Number of slowest calls listed per toggle
+        :type slowest: Integer
+        :return: 'calls': per span name the count, total and max seconds, request and response bytes, retries, cache hits
+            and misses and errors; 'toggles': every toggle with its duration and slowest calls, newest first
+        :rtype: Dict
+        """
+        spans = self.spans(session)
+        calls = defaultdict(lambda: {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'request_bytes': 0,
+                                     'payload_bytes': 0, 'retries': 0, 'hits': 0, 'misses': 0, 'errors': 0})
+        children = defaultdict(list)
+        for span in spans:
+            children[span.parent_id].append(span)
+            if span.name == 'toggle':
+                continue
+            call = calls[span.name]
+            call['count'] += 1
+            call['seconds'] += span.duration
+            call['max_seconds'] = max(call['max_seconds'], span.duration)
+            for key in ('request_bytes', 'payload_bytes', 'retries', 'hits', 'misses'):
+                call[key] += span.attributes.get(key) or 0
+            call['errors'] += span.error is not None
+
+        toggles = []
+        for span in spans:
+            if span.name != 'toggle':
+                continue
+            descendants, stack = [], list(children[span.span_id])
+            while stack:
+                child = stack.pop()
+                descendants.append(child)
+                stack.extend(children[child.span_id])
+            descendants.sort(key=lambda child: child.duration, reverse=True)
+            toggles.append({**span.attributes, 'seconds': span.duration, 'error': span.error,
+                            'slowest': [(child.name, child.duration) for child in descendants[:slowest]]})
+        toggles.reverse()
+        return {'calls': dict(calls), 'toggles': toggles}
+
+    def format_summary(self, session=None):
+        # Plain-text table of summary()['calls'], slowest total first
+        calls = self.summary(session)['calls']
+        lines = [f"{'call':<24}{'count':>7}{'total s':>10}{'max s':>9}{'sent':>10}{'received':>10}{'retries':>9}{'hits':>6}{'misses':>8}"]
+        for name, call in sorted(calls.items(), key=lambda item: item[1]['seconds'], reverse=True):
+            lines.append(f"{name:<24}{call['count']:>7}{call['seconds']:>10.3f}{call['max_seconds']:>9.3f}"
+                         f"{call['request_bytes']:>10}{call['payload_bytes']:>10}{call['retries']:>9}{call['hits']:>6}{call['misses']:>8}")
+        return '\n'.join(lines)
+
+    def _start_otel(self, span):
+        parent = _current_span.get()
+        context = None
+        if parent is not None and parent._otel_span is not None:
+            from opentelemetry import trace
+
+            context = trace.set_span_in_context(parent._otel_span)
+        span._otel_span = self._otel_tracer.start_span(span.name, context=context)
+
+    def _end_otel(self, span):
+        attributes = {key: value for key, value in span.attributes.items()
+                      if isinstance(value, (str, bool, int, float))}
+        if span.session is not None:
+            attributes['session'] = span.session
+        if span.error is not None:
+            attributes['error'] = span.error
+        span._otel_span.set_attributes(attributes)
+        span._otel_span.end()
+
+
+# Shared by the app sessions and the scripts, sessions are told apart by the session of their spans
+TRACER = Tracer()
@@ -0,0 +1,160 @@
+import contextlib
+import os
+
+import numpy as np
+
+from boundary import load_boundary
+from constants import STUDY_BOUNDARY_PATH
+from local_functions import OPTICAL_PRODUCTS, PRODUCT_BANDS, LocalImage, LocalImageFunctions, band_paths
+
+
+# Overviews are built until the coarsest one fits in a tile of this size, whatever the block size
+OVERVIEW_TILE_SIZE = 256
+
+
+def overview_factors(width, height, tile_size=OVERVIEW_TILE_SIZE):
+    # Decimation factors of the overviews, powers of two, at least one level even for a scene smaller than a tile
+    factors = [2]
+    while max(width, height) / factors[-1] > tile_size:
+        factors.append(factors[-1] * 2)
+    return factors
+
+
+def block_windows(width, height, block_size):
+    # Square windows covering the raster, aligned with the output tiles
+    from rasterio.windows import Window
+
+    for row in range(0, height, block_size):
+        for col in range(0, width, block_size):
+            yield Window(col, row, min(block_size, width - col), min(block_size, height - row))
+
+
+class WindowedProcessor:
+    """
+    Out-of-core version of LocalImageFunctions.fused_products for full Landsat scenes on disk.
+
+    The scene is processed one block_size x block_size window at a time: the QA_PIXEL and SR_B
+    bands the products need are read for the window only, the study boundary is rasterized for
+    the same window as the clip mask, and the float32 products are written to a tiled, compressed
+    GeoTIFF that is finally copied to a Cloud-Optimized GeoTIFF with overviews. The mean and valid
+    area of every product are accumulated on the way. Peak memory follows the block size, not the
+    scene size.
+    """
+
+    def __init__(self, block_size=512, products=OPTICAL_PRODUCTS, boundary_path=STUDY_BOUNDARY_PATH, precision='float64'):
+        if block_size % 16:
+            raise ValueError("block_size must be a multiple of 16, the GeoTIFF tile size constraint")
+        self.block_size = block_size
+        self.products = tuple(products)
+        self.boundary = load_boundary(boundary_path)
+        # The output is float32 either way, 'float32' also computes in float32 (see LocalImageFunctions)
+        self.functions = LocalImageFunctions(precision)
+
+    def clip_mask(self, window, transform, crs):
+        """
+        Rasterizes the exact study boundary over one window
+        :param window: Window of the scene
+        :type window: rasterio.windows.Window
+        :param transform: Affine transform of the scene
+        :type transform: affine.Affine
+        :param crs: CRS of the scene
+        :type crs: rasterio.crs.CRS
+        :return: Boolean array, True inside the study boundary
+        :rtype: np.ndarray
+        """
+        from rasterio.features import geometry_mask
+        from rasterio.windows import transform as window_transform
+
+        geometry = self._boundary_geometry(crs)
+        return geometry_mask([geometry], out_shape=(int(window.height), int(window.width)),
+                             transform=window_transform(window, transform), invert=True)
+
+    def _boundary_geometry(self, crs):
+        # The boundary in the scene CRS, reprojected once per CRS
+        key = crs.to_string()
+        if getattr(self, '_geometry_crs', None) != key:
+            self._geometry = self.boundary.gdf.to_crs(key).geometry.union_all()
+            self._geometry_crs = key
+        return self._geometry
+
+    def _write_blocks(self, paths, needed, temporary_path):
+        # Writes the products block by block to a tiled GeoTIFF, returns their sums, valid counts and the pixel area
+        import rasterio
+        from rasterio.windows import bounds as window_bounds
+        from shapely.geometry import box
+
+        with contextlib.ExitStack() as stack:
+            sources = {band: stack.enter_context(rasterio.open(paths[band])) for band in needed}
+            reference = sources['QA_PIXEL']
+            profile = {
+                'driver': 'GTiff', 'width': reference.width, 'height': reference.height,
+                'count': len(self.products), 'dtype': 'float32', 'nodata': np.nan,
+                'crs': reference.crs, 'transform': reference.transform,
+                'tiled': True, 'blockxsize': self.block_size, 'blockysize': self.block_size,
+                'compress': 'deflate', 'predictor': 3,
+            }
+            geometry = self._boundary_geometry(reference.crs)
+            pixel_area = abs(reference.transform.a * reference.transform.e)
+            sums = dict.fromkeys(self.products, 0.0)
+            counts = dict.fromkeys(self.products, 0)
+            with rasterio.open(temporary_path, 'w', **profile) as destination:
+                for index, product in enumerate(self.products, start=1):
+                    destination.set_band_description(index, product)
+                for window in block_windows(reference.width, reference.height, self.block_size):
+                    # Blocks outside the boundary are left empty (nodata)
+                    if not geometry.intersects(box(*window_bounds(window, reference.transform))):
+                        continue
+                    clip = self.clip_mask(window, reference.transform, reference.crs)
+                    bands = {band: source.read(1, window=window) for band, source in sources.items()}
+                    block = LocalImage(bands, mask=clip)
+                    outputs = self.functions.fused_products(block, self.products, tile_rows=self.block_size)
+                    for product in self.products:
+                        valid = ~np.isnan(outputs[product])
+                        sums[product] += float(outputs[product][valid].sum())
+                        counts[product] += int(valid.sum())
+                    destination.write(
+                        np.stack([outputs[product].astype(np.float32) for product in self.products]),
+                        window=window,
+                    )
+        return sums, counts, pixel_area
+
+    def process(self, scene_directory, output_path):
+        """
+        Computes the products of a scene block by block and writes them as a Cloud-Optimized GeoTIFF.
+        The output only appears at output_path once it is complete.
+        :param scene_directory: Directory holding the scene's band files, e.g. *_SR_B2.TIF and *_QA_PIXEL.TIF
+        :type scene_directory: String
+        :param output_path: Path of the COG, one float32 band per product with NaN as nodata
+        :type output_path: String
+        :return: Per product mean, count of valid pixels and their area (m²) inside the study boundary
+        :rtype: Dict
+        """
+        import rasterio
+        from rasterio.enums import Resampling
+        from rasterio.shutil import copy as copy_dataset
+
+        paths = band_paths(scene_directory)
+        needed = sorted({band for product in self.products for band in PRODUCT_BANDS[product]} | {'QA_PIXEL'})
+        missing = [band for band in needed if band not in paths]
+        if missing:
+            raise FileNotFoundError(f"{scene_directory} has no {', '.join(missing)} band")
+
+        temporary_path = output_path + '.tmp.tif'
+        partial_path = output_path + '.part'
+        try:
+            sums, counts, pixel_area = self._write_blocks(paths, needed, temporary_path)
+            # The overviews are built on the tiled GeoTIFF, the COG driver alone skips them when the
+            # scene is no larger than one block
+            with rasterio.open(temporary_path, 'r+') as dataset:
+                dataset.build_overviews(overview_factors(dataset.width, dataset.height), Resampling.average)
+            copy_dataset(temporary_path, partial_path, driver='COG', compress='DEFLATE', predictor='3',
+                         blocksize=self.block_size, overviews='FORCE_USE_EXISTING')
+            os.replace(partial_path, output_path)
+        finally:
+            for path in (temporary_path, partial_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        return {product: {'mean': sums[product] / counts[product] if counts[product] else None,
+                          'count': counts[product], 'area': counts[product] * pixel_area}
+                for product in self.products}
@@ -0,0 +1,54 @@
+"""
+Compares serial and concurrent map-ID resolution for a multi-date layer stack against a fake
+Earth Engine backend with injected latency.
+
+    python 05-benchmarks/bench_map_ids.py --dates 6 --latency 0.2 0.8
+
+Every request of the fake sleeps for a random latency in the given range; the serial loop takes the
+sum of the latencies, resolve_map_ids only about the largest one.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add the app's "public" directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), '04-hf-files', 'public'))
+
+import fake_ee
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dates', type=int, default=6, help='number of layers in the stack')
+    parser.add_argument('--latency', type=float, nargs=2, default=(0.2, 0.8), help='min and max seconds per request')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    latencies = [rng.uniform(*args.latency) for _ in range(args.dates)]
+    backend = fake_ee.install()
+
+    # Imported after installing the fake so the module binds to it
+    from map_ids import request_map_id, resolve_map_ids
+
+    vis_params = {'bands': ['ln_chl_a'], 'min': 0, 'max': 3}
+    layers = [(backend.Image(f'scene-{index}'), vis_params) for index in range(args.dates)]
+
+    def run(label, function):
+        queue = list(latencies)
+        backend.latency = lambda name: queue.pop(0)
+        backend.reset()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        print(f'{label:<10} {elapsed:6.2f} s  {backend.request_count} requests')
+
+    print(f'latencies: sum {sum(latencies):.2f} s, max {max(latencies):.2f} s')
+    run('serial', lambda: [request_map_id(image, vis) for image, vis in layers])
+    run('concurrent', lambda: resolve_map_ids(layers))
+
+
+if __name__ == '__main__':
+    main()
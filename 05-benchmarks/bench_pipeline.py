@@ -0,0 +1,194 @@
+"""
+Benchmarks the processing pipeline against the fake Earth Engine backend and saves the results as JSON.
+
+    python 05-benchmarks/bench_pipeline.py --latency 0.05 --output results.json
+    python 05-benchmarks/bench_pipeline.py --output new.json --compare results.json
+
+Covers the layer loads of ImageProcess.load_and_process_*, ImageProcessor.load_and_process_images,
+the statistics time series (cold and warm store) and the local NumPy kernels. The fake replays the
+responses in responses.json (keyed by call-chain suffix, see fake_ee) and sleeps --latency seconds
+per request. Every scenario runs in its own process and reports wall time, Earth Engine requests,
+bytes of the responses and the peak RSS of that process.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_PATH = os.path.dirname(os.path.realpath(__file__))
+PUBLIC_PATH = os.path.join(os.path.dirname(BENCHMARK_PATH), '04-hf-files', 'public')
+RESPONSES_PATH = os.path.join(BENCHMARK_PATH, 'responses.json')
+
+# Add the app's "public" directory to the Python path
+sys.path.append(PUBLIC_PATH)
+
+DATES = ['2021-11-11', '2021-10-26', '2021-10-10', '2021-08-07', '2021-07-22', '2021-07-06']
+LAYER_METHODS = ('true', 'chla', 'spm', 'salinity', 'sst')
+
+
+class StubMap:
+    # Records the tile layers instead of drawing them, like a geemap.Map without a browser
+    def __init__(self):
+        self.layers = []
+
+    def add_layer(self, layer):
+        self.layers.append(layer)
+
+    def add_colorbar_branca(self, **kwargs):
+        pass
+
+
+def layer_scenario(methods):
+    def run(backend):
+        from constants import STUDY_BOUNDARY_PATH
+        from load_process import ImageProcess
+
+        map_instance = StubMap()
+        process = ImageProcess(map_instance)
+        return lambda: [getattr(process, f'load_and_process_{method}')(map_instance, STUDY_BOUNDARY_PATH)
+                        for method in methods]
+    return run
+
+
+def image_processor_scenario(backend):
+    from functions import ImageFunctions
+    from image_processing import ImageProcessor
+
+    processor = ImageProcessor(StubMap())
+    return lambda: processor.load_and_process_images(ImageFunctions().trinh_et_al_chl_a, DATES)
+
+
+def statistics_scenario(warm):
+    def run(backend):
+        from boundary import load_boundary
+        from functions import ImageFunctions
+        from stats_store import StatsStore
+        from time_series import iter_time_series
+
+        boundary = load_boundary()
+        aoi = boundary.aoi('analysis')
+        functions = ImageFunctions(aoi)
+        store = StatsStore(os.path.join(tempfile.mkdtemp(), 'statistics.sqlite'))
+
+        def extract():
+            chunks = iter_time_series('ln_chl_a', lambda image: functions.extract_data(functions.trinh_et_al_chl_a(image)),
+                                      aoi, boundary.aoi_key, start='2013-03-18', end='2016-03-18', store=store)
+            return sum(len(chunk) for chunk in chunks)
+
+        if warm:
+            extract()
+            backend.reset()
+        return extract
+    return run
+
+
+def kernel_scenario(precision, fused, size=2000):
+    def run(backend):
+        from bench_fused_kernel import synthetic_scene
+        from local_functions import LocalImageFunctions
+
+        image = synthetic_scene(size)
+        functions = LocalImageFunctions(precision)
+        if fused:
+            return lambda: functions.fused_products(image)
+        return lambda: [functions.trinh_et_al_chl_a(image), functions.novoa_et_al_spm(image),
+                        functions.ansari_akhoondzadeh_salinity(image)]
+    return run
+
+
+SCENARIOS = {
+    **{f'layers_{method}': layer_scenario((method,)) for method in LAYER_METHODS},
+    'layers_toggle_all': layer_scenario(LAYER_METHODS),
+    'image_processor': image_processor_scenario,
+    'statistics_cold': statistics_scenario(warm=False),
+    'statistics_warm': statistics_scenario(warm=True),
+    'kernel_fused_float64': kernel_scenario('float64', fused=True),
+    'kernel_fused_float32': kernel_scenario('float32', fused=True),
+    'kernel_step_by_step_float64': kernel_scenario('float64', fused=False),
+}
+
+
+def run_scenario(name, latency, responses_path):
+    # Runs in the child process: set up, then measure one run of the scenario
+    import fake_ee
+
+    backend = fake_ee.install(latency, responses_path)
+    run = SCENARIOS[name](backend)
+    backend.reset()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    run()
+    wall = time.perf_counter() - start
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux
+    return {'wall': wall, 'requests': backend.request_count, 'bytes': backend.bytes_transferred,
+            'peak_rss_mib': rss_peak / 1024, 'rss_growth_mib': (rss_peak - rss_before) / 1024}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARK_PATH,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous):
+    print(f"\nchange against {previous.get('commit')}:")
+    for name, result in results.items():
+        before = previous['results'].get(name)
+        if before is None:
+            continue
+        changes = []
+        for metric in ('wall', 'requests', 'bytes', 'peak_rss_mib'):
+            if before[metric]:
+                changes.append(f'{metric} {100 * (result[metric] - before[metric]) / before[metric]:+.0f}%')
+            elif result[metric]:
+                changes.append(f'{metric} new')
+        print(f"{name:<28} {', '.join(changes) or 'no change'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per Earth Engine request')
+    parser.add_argument('--responses', default=RESPONSES_PATH, help='recorded responses (JSON)')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--compare', help='results JSON of an earlier run to compare against')
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        # Child process of a single scenario, the result goes to the parent on stdout
+        result = run_scenario(args.scenario, args.latency, args.responses)
+        print('RESULT ' + json.dumps(result))
+        return
+
+    results = {}
+    for name in args.scenarios:
+        completed = subprocess.run([sys.executable, __file__, '--scenario', name, '--latency', str(args.latency),
+                                    '--responses', args.responses], capture_output=True, text=True)
+        lines = [line for line in completed.stdout.splitlines() if line.startswith('RESULT ')]
+        if completed.returncode or not lines:
+            print(f'{name:<28} failed\n{completed.stderr}')
+            continue
+        result = results[name] = json.loads(lines[-1][len('RESULT '):])
+        print(f"{name:<28} {result['wall']:8.3f} s  {result['requests']:4d} requests  {result['bytes']:8d} bytes"
+              f"  peak RSS {result['peak_rss_mib']:7.1f} MiB")
+
+    report = {'commit': git_commit(), 'latency': args.latency, 'responses': os.path.basename(args.responses),
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
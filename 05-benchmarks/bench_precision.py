@@ -0,0 +1,52 @@
+"""
+Compares the throughput of the float32 precision mode of the local algorithms with float64.
+
+    python 05-benchmarks/bench_precision.py --size 4000
+
+Throughput is the fused kernel and the step-by-step methods on a synthetic scene in both precisions.
+The float32 error bounds, swept over every raw uint16 value of the bands each product reads, are
+checked by tests/test_precision.py.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+# Add the app's "public" directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), '04-hf-files', 'public'))
+
+from bench_fused_kernel import synthetic_scene
+from local_functions import LocalImageFunctions
+
+
+def throughput(label, run, pixels):
+    # Peak traced memory from one run, wall time from a second one without tracing overhead
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<22} {elapsed:8.2f} s  {pixels / elapsed / 1e6:6.1f} Mpixel/s  peak {peak / 2**20:9.1f} MiB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=4000, help='scene width and height in pixels')
+    args = parser.parse_args()
+
+    image = synthetic_scene(args.size)
+    pixels = args.size ** 2
+    for precision in ('float64', 'float32'):
+        functions = LocalImageFunctions(precision)
+        for label, run in (('fused', lambda: functions.fused_products(image)),
+                           ('step-by-step', lambda: [functions.trinh_et_al_chl_a(image),
+                                                     functions.novoa_et_al_spm(image),
+                                                     functions.ansari_akhoondzadeh_salinity(image)])):
+            throughput(f'{precision} {label}', run, pixels)
+
+
+if __name__ == '__main__':
+    main()
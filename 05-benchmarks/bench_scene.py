@@ -0,0 +1,82 @@
+"""
+Measures the band I/O and memory of computing several products from one memory-mapped scene.
+
+    python 05-benchmarks/bench_scene.py --size 4000
+
+The baseline reads the scene from its GeoTIFFs for every product (LocalImage.from_directory),
+as each product run does on its own. LandsatScene decodes a band once, the first time a product
+needs it, and maps it; later products reuse the mappings and only load bands not seen yet. A
+reopened scene maps the decoded bands without any band loads. Peak memory is the
+traced NumPy allocations; the mapped bands live in the page cache and are reported separately.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# Add the app's "public" directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), '04-hf-files', 'public'))
+
+from bench_windowed import write_scene
+from landsat_scene import LandsatScene
+from local_functions import PRODUCT_BANDS, LocalImage, LocalImageFunctions
+
+PRODUCTS = ('ln_chl_a', 'salinity', 'spm')
+
+
+def measure(label, function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<28} {elapsed:8.2f} s  peak {peak / 2**20:9.1f} MiB', end='')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=4000, help='scene width and height in pixels')
+    args = parser.parse_args()
+
+    functions = LocalImageFunctions()
+    with tempfile.TemporaryDirectory() as directory:
+        write_scene(directory, args.size)
+
+        expected = {}
+        for product in PRODUCTS:
+            def from_geotiff():
+                image = LocalImage.from_directory(directory)
+                return len(image.bands), functions.fused_products(image, (product,))[product]
+
+            loads, expected[product] = measure(f'GeoTIFF read, {product}', from_geotiff)
+            print(f'  band loads {loads}')
+
+        scene = LandsatScene(directory)
+        for product in PRODUCTS:
+            # Only the bands of the product are mapped, bands shared with earlier products are reused
+            names = ['QA_PIXEL', *PRODUCT_BANDS[product]]
+            loads = scene.band_loads
+            result = measure(f'mapped scene, {product}', lambda: functions.fused_products(scene.image(names), (product,)))
+            print(f'  band loads {scene.band_loads - loads}')
+            np.testing.assert_allclose(result[product], expected[product], equal_nan=True)
+
+        reopened = LandsatScene(directory)
+        measure('reopened scene, all', lambda: functions.fused_products(reopened.image()))
+        print(f"  band loads {reopened.footprint()['band_loads']}")
+        footprint = reopened.footprint()
+        print(f"mapped: {footprint['mapped_bands']} bands, {footprint['mapped_bytes'] / 2**20:.1f} MiB (page cache)")
+
+        view = scene.window('SR_B2', slice(0, 256))
+        assert np.shares_memory(view, scene.band('SR_B2'))
+        assert scene.scaled('SR_B2', slice(0, 256)).dtype == np.float32
+        print('outputs match, windows are views')
+
+
+if __name__ == '__main__':
+    main()
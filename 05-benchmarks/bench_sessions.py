@@ -0,0 +1,133 @@
+"""
+Load test of the shared cross-session cache: many simulated sessions toggle through the products at once.
+
+    python 05-benchmarks/bench_sessions.py --sessions 1 10 50 --latency 0.2
+
+Every session has its own ImageProcess, layer cache and loader pool, like an app Map, and toggles
+through all products in its own random order, waiting for each selection's layers. The Earth Engine
+requests go to the fake backend. With the shared cache the request count should stay at one map ID
+per layer whatever the number of sessions; --no-shared disables the shared caches as the baseline.
+Each session count runs in a fresh process.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+BENCHMARK_PATH = os.path.dirname(os.path.realpath(__file__))
+PUBLIC_PATH = os.path.join(os.path.dirname(BENCHMARK_PATH), '04-hf-files', 'public')
+
+
+def simulate(sessions, latency, shared):
+    sys.path.append(PUBLIC_PATH)
+    import fake_ee
+
+    backend = fake_ee.install(latency)
+
+    import shared_cache
+    from constants import STUDY_BOUNDARY_PATH
+    from layer_cache import LayerCache
+    from layer_loader import LayerLoader
+    from load_process import PRODUCT_METHODS, ImageProcess
+
+    for cache in shared_cache.SHARED_CACHES:
+        cache.enabled = shared
+
+    class SessionMap:
+        # Same layer path as app_map.Map: the session's layer cache, then its loader pool
+        def __init__(self):
+            self.layer_cache = LayerCache()
+            self.loader = LayerLoader(max_workers=4)
+            self.functions = ImageProcess(self)
+            self.product = None
+
+        def attach_layers(self, layers):
+            for date, image, vis_params in layers:
+                key = self.layer_cache.key(self.product, date, vis_params, self.functions.aoi_tier)
+                if self.layer_cache.get(key) is not None:
+                    self.loader.skip()
+                    continue
+                self.loader.submit(key, lambda key=key, image=image, vis_params=vis_params:
+                                   self.layer_cache.put(key, image, vis_params), lambda layer: None)
+
+        def add_colorbar_branca(self, **kwargs):
+            pass
+
+        def toggle(self, product):
+            self.product = product
+            start = time.perf_counter()
+            self.loader.start()
+            getattr(self.functions, PRODUCT_METHODS[product])(self, STUDY_BOUNDARY_PATH)
+            self.loader.finish()
+            while not self.loader.progress()['complete']:
+                time.sleep(0.005)
+            return time.perf_counter() - start
+
+    toggle_times = []
+    lock = threading.Lock()
+
+    def session(seed):
+        products = list(PRODUCT_METHODS)
+        random.Random(seed).shuffle(products)
+        session_map = SessionMap()
+        times = [session_map.toggle(product) for product in products]
+        session_map.loader.shutdown()
+        with lock:
+            toggle_times.extend(times)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(seed,)) for seed in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    toggle_times.sort()
+    return {'sessions': sessions, 'wall': wall, 'requests': backend.request_count,
+            'requests_per_session': backend.request_count / sessions,
+            'toggle_p50': statistics.median(toggle_times),
+            'toggle_p95': toggle_times[int(0.95 * (len(toggle_times) - 1))],
+            'caches': shared_cache.metrics()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per fake Earth Engine request')
+    parser.add_argument('--no-shared', action='store_true', help='disable the shared caches (baseline)')
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--simulate', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.simulate:
+        print('RESULT ' + json.dumps(simulate(args.simulate, args.latency, not args.no_shared)))
+        return
+
+    results = []
+    for sessions in args.sessions:
+        command = [sys.executable, __file__, '--simulate', str(sessions), '--latency', str(args.latency)]
+        completed = subprocess.run(command + (['--no-shared'] if args.no_shared else []), capture_output=True, text=True)
+        lines = [line for line in completed.stdout.splitlines() if line.startswith('RESULT ')]
+        if completed.returncode or not lines:
+            print(f'{sessions} sessions failed\n{completed.stderr}')
+            continue
+        result = json.loads(lines[-1][len('RESULT '):])
+        results.append(result)
+        map_ids = result['caches']['shared.map_ids']
+        print(f"{sessions:4d} sessions  {result['requests']:5d} requests ({result['requests_per_session']:5.1f} per session)"
+              f"  toggle p50 {result['toggle_p50']:.2f} s p95 {result['toggle_p95']:.2f} s  wall {result['wall']:.1f} s"
+              f"  map IDs: {map_ids['hits']} hits, {map_ids['joined']} joined, {map_ids['misses']} misses")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'latency': args.latency, 'shared': not args.no_shared, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Measures the startup of the Solara app: the import time of the page and the time to the first map layer.
+
+    python 05-benchmarks/bench_startup.py --latency 0.3 --output startup.json
+    python 05-benchmarks/bench_startup.py --compare startup.json
+
+page_import      imports pages/01-main.py as Solara does before the first paint; it must not load
+                 any of HEAVY_MODULES, the run fails if it does
+map_import       imports app_map, the geemap, Earth Engine and geopandas imports LazyMap defers
+first_layer      from a fresh process to the first tile layer attached, against the fake Earth Engine
+                 backend: the map modules, the study boundary and the True Color layers of the
+                 loader pool, as the map does once app_map is ready (geemap itself does not import
+                 under the fake, so the map is a stand-in with the same cache and loader)
+
+Every measurement runs in a new process, the fastest of --repeat runs is kept.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BENCHMARK_PATH = os.path.dirname(os.path.realpath(__file__))
+APP_PATH = os.path.join(os.path.dirname(BENCHMARK_PATH), '04-hf-files')
+PUBLIC_PATH = os.path.join(APP_PATH, 'public')
+PAGE_PATH = os.path.join(APP_PATH, 'pages', '01-main.py')
+
+# Modules whose import the page defers until after the first paint
+HEAVY_MODULES = ('ee', 'geemap', 'geopandas', 'ipyleaflet')
+
+
+def page_import():
+    import importlib.util
+
+    import solara  # noqa: F401, loaded by the server before any page
+
+    start = time.perf_counter()
+    spec = importlib.util.spec_from_file_location('main_page', PAGE_PATH)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules]}
+
+
+def map_import():
+    sys.path.append(PUBLIC_PATH)
+    start = time.perf_counter()
+    import app_map  # noqa: F401
+
+    return {'seconds': time.perf_counter() - start}
+
+
+def first_layer(latency):
+    start = time.perf_counter()
+    sys.path.append(PUBLIC_PATH)
+    import fake_ee
+
+    fake_ee.install(latency)
+
+    import threading
+
+    from constants import STUDY_BOUNDARY_PATH
+    from layer_cache import LayerCache
+    from layer_loader import LayerLoader
+    from load_process import ImageProcess
+
+    class StartupMap:
+        # Same layer path as app_map.Map.attach_layers: layer cache, then the loader pool
+        def __init__(self):
+            self.layer_cache = LayerCache()
+            self.loader = LayerLoader(max_workers=4)
+            self.first = threading.Event()
+            self.times = []
+
+        def attach_layers(self, layers):
+            for date, image, vis_params in layers:
+                key = self.layer_cache.key('True Color', date, vis_params, 'display')
+                self.loader.submit(key, lambda key=key, image=image, vis_params=vis_params:
+                                   self.layer_cache.put(key, image, vis_params), self.attached)
+
+        def attached(self, layer):
+            self.times.append(time.perf_counter() - start)
+            self.first.set()
+
+        def add_colorbar_branca(self, **kwargs):
+            pass
+
+    map_instance = StartupMap()
+    map_instance.loader.start()
+    ImageProcess(map_instance).load_and_process_true(map_instance, STUDY_BOUNDARY_PATH)
+    map_instance.loader.finish()
+    map_instance.first.wait()
+    while not map_instance.loader.progress()['complete']:
+        time.sleep(0.005)
+    return {'seconds': map_instance.times[0], 'all_layers_seconds': max(map_instance.times)}
+
+
+def run(name, latency):
+    # Runs one measurement in a fresh interpreter, so nothing is imported yet
+    completed = subprocess.run([sys.executable, __file__, '--measure', name, '--latency', str(latency)],
+                               capture_output=True, text=True)
+    lines = [line for line in completed.stdout.splitlines() if line.startswith('RESULT ')]
+    if completed.returncode or not lines:
+        return {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'no result'}
+    return json.loads(lines[-1][len('RESULT '):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.3, help='seconds per fake Earth Engine request')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--compare', help='results JSON of an earlier run to compare against')
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measurements = {'page_import': page_import, 'map_import': map_import,
+                        'first_layer': lambda: first_layer(args.latency)}
+        print('RESULT ' + json.dumps(measurements[args.measure]()))
+        return
+
+    results = {}
+    for name in ('page_import', 'map_import', 'first_layer'):
+        runs = [run(name, args.latency) for _ in range(args.repeat)]
+        valid = [result for result in runs if 'error' not in result]
+        result = results[name] = min(valid, key=lambda result: result['seconds']) if valid else runs[0]
+        if 'error' in result:
+            print(f"{name:<14} failed: {result['error']}")
+            continue
+        extra = ''
+        if 'all_layers_seconds' in result:
+            extra = f"  all layers {result['all_layers_seconds']:.3f} s"
+        if 'heavy_modules' in result:
+            extra = f"  heavy modules: {', '.join(result['heavy_modules']) or 'none'}"
+        print(f"{name:<14} {result['seconds']:8.3f} s{extra}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'latency': args.latency, 'results': results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+        for name, result in results.items():
+            before = previous.get(name, {})
+            if 'seconds' in result and before.get('seconds'):
+                print(f"{name:<14} {100 * (result['seconds'] - before['seconds']) / before['seconds']:+.0f}% against the earlier run")
+
+    if results['page_import'].get('heavy_modules') or 'error' in results['page_import']:
+        sys.exit('The page import is no longer light, see page_import above')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Measures the windowed processor's time and peak memory against the in-memory fused kernel.
+
+    python 05-benchmarks/bench_windowed.py --size 4000 --block-sizes 256 512 1024
+
+A synthetic scene (QA_PIXEL, SR_B1, SR_B2, SR_B3 and SR_B5 GeoTIFFs in EPSG:32611, centred on the
+study boundary) is written to a temporary directory. The in-memory run reads every band at full
+size; the windowed runs read, clip and write one block at a time. Peak memory is the traced NumPy
+allocations, GDAL's own block cache is not included.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# Add the app's "public" directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), '04-hf-files', 'public'))
+
+from bench_fused_kernel import synthetic_scene
+from boundary import load_boundary
+from constants import STUDY_AREA_CRS
+from local_functions import LocalImage, LocalImageFunctions
+from windowed import WindowedProcessor
+
+
+def write_scene(directory, size):
+    # GeoTIFFs named like a Collection 2 scene, 30 m pixels centred on the study boundary
+    import rasterio
+    from rasterio.transform import from_origin
+
+    minx, miny, maxx, maxy = load_boundary().gdf.to_crs(STUDY_AREA_CRS).total_bounds
+    left = (minx + maxx) / 2 - size * 15
+    top = (miny + maxy) / 2 + size * 15
+    profile = {'driver': 'GTiff', 'width': size, 'height': size, 'count': 1, 'dtype': 'uint16',
+               'crs': STUDY_AREA_CRS, 'transform': from_origin(left, top, 30, 30),
+               'tiled': True, 'blockxsize': 256, 'blockysize': 256}
+    image = synthetic_scene(size)
+    for band in ('QA_PIXEL', 'SR_B1', 'SR_B2', 'SR_B3', 'SR_B5'):
+        with rasterio.open(os.path.join(directory, f'LC08_L2SP_041036_20211111_{band}.TIF'), 'w', **profile) as dst:
+            dst.write(image.select(band), 1)
+
+
+def measure(label, function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<16} {elapsed:8.2f} s  peak {peak / 2**20:9.1f} MiB')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=4000, help='scene width and height in pixels')
+    parser.add_argument('--block-sizes', type=int, nargs='+', default=[256, 512, 1024])
+    args = parser.parse_args()
+
+    import rasterio
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_scene(directory, args.size)
+        processor = WindowedProcessor(block_size=args.block_sizes[0])
+
+        def in_memory():
+            image = LocalImage.from_directory(directory)
+            with rasterio.open(os.path.join(directory, 'LC08_L2SP_041036_20211111_QA_PIXEL.TIF')) as src:
+                window = rasterio.windows.Window(0, 0, src.width, src.height)
+                clip = processor.clip_mask(window, src.transform, src.crs)
+            return LocalImageFunctions().fused_products(image.update_mask(clip))
+
+        expected = measure('in memory', in_memory)
+
+        for block_size in args.block_sizes:
+            output_path = os.path.join(directory, f'products_{block_size}.tif')
+            processor = WindowedProcessor(block_size=block_size)
+            measure(f'windowed {block_size}', lambda: processor.process(directory, output_path))
+            with rasterio.open(output_path) as src:
+                # rasterio reports a scene of one block as untiled, the block shape is checked instead
+                assert src.driver == 'GTiff' and src.block_shapes[0] == (block_size, block_size) and src.overviews(1)
+                for index, product in enumerate(processor.products, start=1):
+                    np.testing.assert_allclose(src.read(index), expected[product].astype(np.float32),
+                                               rtol=1e-6, equal_nan=True)
+        print('outputs match')
+
+
+if __name__ == '__main__':
+    main()
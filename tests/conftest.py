@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The app modules import each other by name from 04-hf-files/public, as they do when the app runs
+PUBLIC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), '04-hf-files', 'public')
+if PUBLIC_PATH not in sys.path:
+    sys.path.insert(0, PUBLIC_PATH)
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+import app_map
+import map_ids
+from fake_ee import FakeEarthEngine
+from layer_cache import LayerCache
+from layer_loader import LayerLoader
+from shared_cache import MAP_ID_CACHE
+
+DATES = ['2024-08-01', '2024-07-16', '2024-07-07', '2024-06-21']
+
+
+class StubMap:
+    # The layer path of app_map.Map (addLayer, show_layer, order_layers) on a plain layer list, without a widget
+    addLayer = app_map.Map.addLayer
+    attach_layers = app_map.Map.attach_layers
+    show_layer = app_map.Map.show_layer
+    order_layers = app_map.Map.order_layers
+
+    def __init__(self, product):
+        self.selected_image_type = product
+        self.layer_cache = LayerCache()
+        self.loader = LayerLoader(max_workers=4)
+        self.functions = type('Functions', (), {'dates': list(DATES), 'aoi_tier': 'display'})()
+        self.layers = (app_map.ipyleaflet.TileLayer(name='basemap'),)
+
+    def add_layer(self, layer):
+        self.layers = self.layers + (layer,)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    # The first request is the slowest, so the map IDs complete in reverse date order
+    delays = [0.2, 0.15, 0.1, 0.05]
+    lock = threading.Lock()
+
+    def latency(name):
+        with lock:
+            return delays.pop(0)
+
+    backend = FakeEarthEngine(latency)
+    monkeypatch.setattr(map_ids, 'ee', backend)
+    MAP_ID_CACHE.invalidate()
+    yield backend
+    MAP_ID_CACHE.invalidate()
+
+
+def test_layers_are_ordered_by_date_whatever_order_they_complete_in(backend):
+    stub = StubMap('Chlorophyll-a')
+    completed = []
+    show_layer = stub.show_layer
+    stub.show_layer = lambda layer, name, *args: (completed.append(name), show_layer(layer, name, *args))
+
+    stub.loader.start()
+    stub.attach_layers([(date, backend.Image(), {'bands': ['ln_chl_a']}) for date in DATES])
+    stub.loader.finish()
+    while not stub.loader.progress()['complete']:
+        time.sleep(0.01)
+    stub.loader.shutdown()
+
+    assert completed == [f'Chlorophyll-a {date}' for date in reversed(DATES)]
+    assert [layer.name for layer in stub.layers] == ['basemap'] + [f'Chlorophyll-a {date}' for date in DATES]
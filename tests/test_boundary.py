@@ -0,0 +1,96 @@
+import importlib.util
+import os
+import shutil
+
+import pytest
+
+from boundary import BoundaryRegistry, load_boundary
+from constants import AOI_TIER_TOLERANCES, PROJECT_PATH, STUDY_AREA_CRS, STUDY_BOUNDARY_PATH
+from shared_cache import SharedCache
+from stats_store import aoi_hash
+
+NOTEBOOK_CONSTANTS_PATH = os.path.join(os.path.dirname(PROJECT_PATH), '02-notebooks', 'constants.py')
+
+# Largest area change of each tier, relative to the area of the original boundary
+AREA_ERRORS = {'display': 1e-3, 'analysis': 5e-4, 'exact': 0.0}
+
+
+def test_aoi_key_is_the_hash_of_the_geometry():
+    boundary = load_boundary(STUDY_BOUNDARY_PATH)
+    assert boundary.aoi_key == aoi_hash(boundary.geometry)
+
+
+def test_scripts_and_app_share_the_aoi_key():
+    # The scripts import 02-notebooks/constants.py as constants, the key must not depend on which is loaded
+    spec = importlib.util.spec_from_file_location('notebook_constants', NOTEBOOK_CONSTANTS_PATH)
+    notebook_constants = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(notebook_constants)
+    assert os.path.realpath(notebook_constants.STUDY_BOUNDARY_PATH) == os.path.realpath(STUDY_BOUNDARY_PATH)
+    assert load_boundary(notebook_constants.STUDY_BOUNDARY_PATH).aoi_key == load_boundary(STUDY_BOUNDARY_PATH).aoi_key
+
+
+@pytest.mark.parametrize('name', list(AOI_TIER_TOLERANCES))
+def test_tier_errors_within_tolerance(name):
+    boundary = load_boundary(STUDY_BOUNDARY_PATH)
+    tier = boundary.tier(name)
+    exact = boundary.tier('exact')
+    assert tier.hausdorff_error <= AOI_TIER_TOLERANCES[name]
+    assert tier.area_error <= AREA_ERRORS[name] * exact.area
+    # No point moves further than the Hausdorff distance, so the area changes by at most that times the perimeter
+    perimeter = boundary.gdf.to_crs(STUDY_AREA_CRS).geometry.union_all().length
+    assert tier.area_error <= tier.hausdorff_error * perimeter
+    assert tier.vertex_count <= exact.vertex_count
+
+
+def test_unknown_tier():
+    with pytest.raises(ValueError):
+        load_boundary(STUDY_BOUNDARY_PATH).tier('preview')
+
+
+@pytest.fixture
+def registry():
+    # A registry on its own cache, so the counts do not depend on the boundaries other tests loaded
+    return BoundaryRegistry(SharedCache('test.boundaries', max_entries=16))
+
+
+@pytest.fixture
+def boundary_path(tmp_path):
+    path = tmp_path / 'study_boundary.gpkg'
+    shutil.copy(STUDY_BOUNDARY_PATH, path)
+    return str(path)
+
+
+def test_registry_loads_a_boundary_once(registry, boundary_path):
+    first = registry.get(boundary_path)
+    assert registry.get(boundary_path) is first
+    assert registry.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+
+
+def test_registry_reloads_a_changed_file(registry, boundary_path):
+    first = registry.get(boundary_path)
+    os.utime(boundary_path, (first.mtime + 10, first.mtime + 10))
+    second = registry.get(boundary_path)
+    assert second is not first and second.mtime == first.mtime + 10
+    # The boundary of the old version is dropped, not kept until it is evicted
+    assert registry.stats() == {'hits': 0, 'misses': 2, 'entries': 1}
+    assert registry.get(boundary_path) is second
+
+
+def test_registry_invalidate(registry, boundary_path):
+    first = registry.get(boundary_path)
+    other = registry.get(STUDY_BOUNDARY_PATH)
+    registry.invalidate(boundary_path)
+    assert registry.stats()['entries'] == 1
+    assert registry.get(STUDY_BOUNDARY_PATH) is other
+    assert registry.get(boundary_path) is not first
+
+    registry.invalidate()
+    assert registry.stats()['entries'] == 0
+    assert registry.get(STUDY_BOUNDARY_PATH) is not other
+    assert registry.stats() == {'hits': 1, 'misses': 4, 'entries': 1}
+
+
+def test_registry_missing_file(registry, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        registry.get(str(tmp_path / 'missing.gpkg'))
+    assert registry.stats() == {'hits': 0, 'misses': 0, 'entries': 0}
@@ -0,0 +1,45 @@
+import pytest
+
+import functions
+import mosaic
+import qa
+from fake_ee import FakeEarthEngine
+from functions import ImageFunctions
+
+COLLECTION = 'LANDSAT/LC08/C02/T1_L2'
+DATES = ['2021-11-11', '2021-10-26', '2021-10-10', '2021-08-07', '2021-07-22', '2021-07-06']
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeEarthEngine()
+    for module in (functions, mosaic, qa):
+        monkeypatch.setattr(module, 'ee', backend)
+    return backend
+
+
+def per_date_queries(ee, dates, region):
+    # The lookup scene_collection replaced: one filtered collection and first() per date
+    return {date: ee.ImageCollection(COLLECTION).filterDate(ee.Date(date), ee.Date(date).advance(1, 'day'))
+            .filterBounds(region).first() for date in dates}
+
+
+def test_per_date_baseline(backend):
+    per_date_queries(backend, DATES, backend.Geometry())
+    assert backend.count('ImageCollection') == backend.count('filterDate') == len(DATES)
+
+
+def test_scene_collection_is_one_query(backend):
+    ImageFunctions().scene_collection(COLLECTION, DATES, backend.Geometry())
+    assert backend.count('ImageCollection') == 1
+    assert backend.count('filterDate') == 1
+    assert backend.count('filterBounds') == 1
+    # Building the collection sends nothing to Earth Engine
+    assert backend.count('getInfo') == backend.request_count == 0
+
+
+def test_scenes_by_date_splits_one_query(backend):
+    scenes = ImageFunctions().scenes_by_date(COLLECTION, DATES, backend.Geometry())
+    assert list(scenes) == DATES
+    assert backend.count('ImageCollection') == backend.count('filterDate') == 1
+    assert backend.request_count == 0
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from layer_loader import LayerLoader
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.005)
+
+
+class Blocking:
+    # A resolve function that blocks on the worker until released
+    def __init__(self, result):
+        self.result = result
+        self.resolving = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.resolving.set()
+        self.release.wait(5)
+        return self.result
+
+
+class StartingContext:
+    # Session context whose entry starts a new generation from another thread, like a toggle in the UI
+    # arriving while a layer of the previous selection is being attached
+    def __init__(self):
+        self.loader = None
+        self.thread = None
+
+    def __enter__(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.loader.start)
+            self.thread.start()
+            time.sleep(0.1)
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+@pytest.fixture
+def loader():
+    loader = LayerLoader(max_workers=1)
+    yield loader
+    loader.shutdown()
+
+
+def test_new_generation_cancels_queued_work(loader):
+    first = Blocking('chl 2024-08-01')
+    attached = []
+    loader.start()
+    loader.submit(('chl', '2024-08-01'), first, attached.append)
+    loader.submit(('chl', '2024-07-16'), lambda: 'chl 2024-07-16', attached.append)
+    loader.submit(('chl', '2024-07-07'), lambda: 'chl 2024-07-07', attached.append)
+    loader.finish()
+    first.resolving.wait(5)
+
+    # The first layer is resolving on the single worker, the two queued ones are cancelled
+    loader.start()
+    loader.submit(('spm', '2024-08-01'), lambda: 'spm 2024-08-01', attached.append)
+    loader.finish()
+    first.release.set()
+    wait_until(lambda: loader.progress()['complete'])
+    time.sleep(0.05)
+
+    assert attached == ['spm 2024-08-01']
+    assert loader.progress()['done'] == loader.progress()['total'] == 1
+
+
+def test_layers_of_a_stale_generation_are_dropped(loader):
+    stale = Blocking('chl 2024-08-01')
+    attached = []
+    loader.start()
+    loader.submit(('chl', '2024-08-01'), stale, attached.append)
+    loader.finish()
+    stale.resolving.wait(5)
+
+    loader.start()
+    loader.finish()
+    stale.release.set()
+    time.sleep(0.1)
+    assert attached == []
+    assert loader.progress()['complete']
+
+
+def test_new_generation_waits_for_an_attach_in_progress():
+    # A layer that passed the generation check is attached before the next generation starts and hides
+    # the previous layers, never after, where it would show on top of the new selection
+    context = StartingContext()
+    loader = LayerLoader(max_workers=1, context=context)
+    context.loader = loader
+    generations = []
+    loader.start()
+    loader.submit(('chl', '2024-08-01'), lambda: 'chl 2024-08-01', lambda layer: generations.append(loader.generation))
+    wait_until(lambda: context.thread is not None)
+    context.thread.join(5)
+    loader.shutdown()
+    assert generations == [1]
+
+
+def test_shutdown_drops_layers_still_resolving():
+    resolving = Blocking('chl 2024-08-01')
+    attached = []
+    loader = LayerLoader(max_workers=1)
+    loader.start()
+    loader.submit(('chl', '2024-08-01'), resolving, attached.append)
+    resolving.resolving.wait(5)
+    loader.shutdown()
+    resolving.release.set()
+    time.sleep(0.1)
+    assert attached == []
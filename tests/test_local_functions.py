@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+import pytest
+
+from local_functions import LocalImage, LocalImageFunctions
+
+# QA_PIXEL values: clear water, water under low-confidence cloud, water under high-confidence cloud, land
+QA = np.array([[128, 128 | 1 << 8], [128 | 3 << 8, 0]], dtype=np.uint16)
+CLEAR = np.array([[True, True], [False, False]])
+
+# Raw Collection 2 values, the same on every pixel so the masked pixels differ only by their QA
+RAW = {'SR_B1': 9000, 'SR_B2': 10000, 'SR_B3': 12000, 'SR_B5': 8000, 'ST_B10': 40000}
+
+
+def reflectance(raw):
+    return raw * 0.0000275 - 0.2
+
+
+# Reference values worked out from the published formulas, independently of local_functions
+EXPECTED = {
+    'ln_chl_a': 0.9375 - 1.8862 * math.log(reflectance(10000) / reflectance(12000)),
+    'spm': 4302 * reflectance(8000) / (1 - reflectance(8000) / 0.2115),
+    'salinity': 570.80 + 26535.17 * reflectance(9000) - 62141.71 * reflectance(10000) + 34952.89 * reflectance(12000),
+    'ST_B10_Celsius': 40000 * 0.00341802 + 149.0 - 273.15,
+}
+
+# float32 keeps about 7 significant digits, salinity adds terms of around 1000 with opposite signs
+TOLERANCES = {'float64': 1e-9, 'float32': 2e-4}
+
+STEP_BY_STEP = {
+    'ln_chl_a': 'trinh_et_al_chl_a',
+    'spm': 'novoa_et_al_spm',
+    'salinity': 'ansari_akhoondzadeh_salinity',
+}
+
+
+def scene():
+    bands = {name: np.full(QA.shape, value, dtype=np.uint16) for name, value in RAW.items()}
+    return LocalImage({**bands, 'QA_PIXEL': QA})
+
+
+def step_by_step(functions, product):
+    method = STEP_BY_STEP.get(product)
+    # Level 2 surface temperature has no public step-by-step method, it follows the same path
+    image = getattr(functions, method)(scene()) if method else functions._step_by_step(scene(), product)
+    return image.select(product)
+
+
+def fused(functions, product):
+    # One row per tile, so the tiling itself is exercised
+    return functions.fused_products(scene(), products=(product,), tile_rows=1)[product]
+
+
+@pytest.mark.parametrize('precision', ['float64', 'float32'])
+@pytest.mark.parametrize('path', [step_by_step, fused])
+@pytest.mark.parametrize('product', sorted(EXPECTED))
+def test_products_match_reference(product, path, precision):
+    values = path(LocalImageFunctions(precision), product)
+    assert values.dtype == np.dtype(precision)
+    np.testing.assert_allclose(values[CLEAR], EXPECTED[product], rtol=TOLERANCES[precision])
+
+
+@pytest.mark.parametrize('precision', ['float64', 'float32'])
+@pytest.mark.parametrize('path', [step_by_step, fused])
+@pytest.mark.parametrize('product', sorted(EXPECTED))
+def test_products_masked_outside_clear_water(product, path, precision):
+    values = path(LocalImageFunctions(precision), product)
+    assert np.isnan(values[~CLEAR]).all()
+    assert not np.isnan(values[CLEAR]).any()
+
+
+@pytest.mark.parametrize('precision', ['float64', 'float32'])
+def test_fused_matches_step_by_step(precision):
+    functions = LocalImageFunctions(precision)
+    products = tuple(sorted(EXPECTED))
+    outputs = functions.fused_products(scene(), products=products, tile_rows=1)
+    for product in products:
+        np.testing.assert_allclose(outputs[product], step_by_step(functions, product), rtol=TOLERANCES[precision])
+
+
+def test_clear_water_mask():
+    functions = LocalImageFunctions()
+    np.testing.assert_array_equal(functions.mask_clear_water(scene()).mask, CLEAR)
+
+
+def test_calculate_sst_reference():
+    # Band 10 brightness temperature from the at-sensor radiance, Landsat 8 K1/K2 constants
+    image = LocalImage({'B10': np.full(QA.shape, 20000, dtype=np.uint16), 'QA_PIXEL': QA},
+                       {'RADIANCE_MULT_BAND_10': 3.342e-4, 'RADIANCE_ADD_BAND_10': 0.1})
+    radiance = 20000 * 3.342e-4 + 0.1
+    expected = 1321.0789 / math.log(774.8853 / radiance + 1) - 273.15
+    sst = LocalImageFunctions().calculate_sst(image).select('SST_B10_Celsius')
+    np.testing.assert_allclose(sst[CLEAR], expected, rtol=1e-12)
+    assert np.isnan(sst[~CLEAR]).all()
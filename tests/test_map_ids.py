@@ -0,0 +1,60 @@
+import ee
+import pytest
+
+import map_ids
+
+
+class FlakyImage:
+    # Fails with the given errors in turn, then returns a map ID
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    def getMapId(self, vis_params):
+        self.calls.append(vis_params)
+        if self.errors:
+            raise self.errors.pop(0)
+        return {'mapid': 'id', 'token': ''}
+
+
+@pytest.fixture(autouse=True)
+def no_wait(monkeypatch):
+    monkeypatch.setattr(map_ids.ee, 'Image', lambda image: image)
+    monkeypatch.setattr(map_ids.time, 'sleep', lambda seconds: None)
+
+
+@pytest.mark.parametrize('error', [
+    ee.EEException('Too Many Requests: Request was rejected because the request rate or concurrency limit was exceeded.'),
+    ee.EEException('Earth Engine responded with HTTP 503'),
+    ee.EEException('Computation timed out.'),
+    TimeoutError('read timed out'),
+])
+def test_transient_errors_are_retried(error):
+    image = FlakyImage(error, error)
+    assert map_ids.request_map_id(image, {'bands': ['SR_B4']})['mapid'] == 'id'
+    assert len(image.calls) == 3
+
+
+@pytest.mark.parametrize('error', [
+    ee.EEException('Image.select: Pattern \'SR_B99\' did not match any bands.'),
+    AttributeError("'NoneType' object has no attribute 'get'"),
+])
+def test_other_errors_are_raised_at_once(error):
+    image = FlakyImage(error)
+    with pytest.raises(type(error)):
+        map_ids.request_map_id(image, {'bands': ['SR_B99']})
+    assert len(image.calls) == 1
+
+
+def test_transient_errors_raised_once_retries_are_spent():
+    error = ee.EEException('Internal error.')
+    image = FlakyImage(*[error] * 3)
+    with pytest.raises(ee.EEException):
+        map_ids.request_map_id(image, {}, retries=2)
+    assert len(image.calls) == 3
+
+
+def test_missing_vis_params():
+    image = FlakyImage()
+    map_ids.request_map_id(image, None)
+    assert image.calls == [{}]
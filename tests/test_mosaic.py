@@ -0,0 +1,78 @@
+import ee
+import pytest
+
+from mosaic import daily_mosaics
+
+# Synthetic scenes on a 0.01 degree grid: two same-day tiles of one path overlapping between
+# longitudes 1 and 2, and one tile of the next overpass
+SCALE = 1113  # metres, about 0.01 degree
+CLEAR_WATER = 128
+CLOUDY_WATER = 128 | 3 << 8  # water bit with high cloud confidence
+
+
+@pytest.fixture(scope='module', autouse=True)
+def earth_engine():
+    # The mosaics are computed by Earth Engine, the tests need credentials for it
+    try:
+        ee.Initialize()
+    except Exception as e:
+        pytest.skip(f'Earth Engine is not available: {e}')
+
+
+def tile(scene_id, date, west, east, blue, qa, cloud_cover):
+    image = ee.Image.constant([blue, qa]).rename(['SR_B2', 'QA_PIXEL']).toUint16() \
+        .reproject(ee.Projection('EPSG:4326').atScale(SCALE)) \
+        .clip(ee.Geometry.Rectangle([west, 0, east, 1], 'EPSG:4326', False))
+    return image.set({
+        'system:index': scene_id,
+        'system:time_start': ee.Date(date).millis(),
+        'DATE_ACQUIRED': date,
+        'CLOUD_COVER': cloud_cover,
+    })
+
+
+@pytest.fixture(scope='module')
+def mosaics():
+    scenes = ee.ImageCollection([
+        # Cloudy, the clear tile of the next row must win where the two overlap
+        tile('LC08_041036_20211111', '2021-11-11', 0, 2, 100, CLOUDY_WATER, 40.0),
+        tile('LC08_041037_20211111', '2021-11-11', 1, 3, 200, CLEAR_WATER, 10.0),
+        tile('LC08_041036_20211127', '2021-11-27', 0, 2, 300, CLEAR_WATER, 5.0),
+    ])
+    return daily_mosaics(scenes)
+
+
+def value_at(image, lon):
+    return image.reduceRegion(ee.Reducer.first(), ee.Geometry.Point([lon, 0.5]), SCALE).getInfo()
+
+
+def mosaic_of(mosaics, date):
+    return ee.Image(mosaics.filter(ee.Filter.eq('DATE_ACQUIRED', date)).first())
+
+
+def test_one_mosaic_per_day(mosaics):
+    assert sorted(mosaics.aggregate_array('DATE_ACQUIRED').getInfo()) == ['2021-11-11', '2021-11-27']
+
+
+def test_system_index_kept(mosaics):
+    # scenes_by_date and the statistics store keys read these IDs
+    assert sorted(mosaics.aggregate_array('system:index').getInfo()) == ['LC08_20211111', 'LC08_20211127']
+
+
+def test_scene_count_and_cloud_cover(mosaics):
+    properties = mosaic_of(mosaics, '2021-11-11').toDictionary(['SCENE_COUNT', 'CLOUD_COVER']).getInfo()
+    assert properties == {'SCENE_COUNT': 2, 'CLOUD_COVER': 10.0}
+    assert mosaic_of(mosaics, '2021-11-27').get('SCENE_COUNT').getInfo() == 1
+
+
+def test_best_quality_pixel_wins_in_overlap(mosaics):
+    mosaic = mosaic_of(mosaics, '2021-11-11')
+    overlap = value_at(mosaic, 1.5)
+    assert overlap == {'SR_B2': 200, 'QA_PIXEL': CLEAR_WATER}
+
+
+def test_tiles_kept_outside_overlap(mosaics):
+    # Each tile fills its own part of the bay, the cloudy one included
+    mosaic = mosaic_of(mosaics, '2021-11-11')
+    assert value_at(mosaic, 0.5)['SR_B2'] == 100
+    assert value_at(mosaic, 2.5)['SR_B2'] == 200
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import local_functions
+from local_functions import LocalImage, LocalImageFunctions
+
+# |float32 - float64| <= atol + rtol * |float64|, in the units of each product
+ERROR_BOUNDS = {
+    'ln_chl_a': {'atol': 1e-4, 'rtol': 0.0},
+    'spm': {'atol': 1e-3, 'rtol': 1e-4},
+    'salinity': {'atol': 2e-2, 'rtol': 0.0},
+}
+
+CLEAR_WATER_QA = 21952
+
+GUARDS = dict(local_functions.FLOAT32_GUARDS)
+
+# Every raw uint16 value of the swept band, with the other bands held at dark, typical and bright water.
+# This covers the SPM pole at nir = 0.2115 and the log(blue / green) of near-zero reflectance
+VALUES = np.arange(1 << 16, dtype=np.uint16)[None, :]
+
+
+def image(**bands):
+    bands = {name: np.broadcast_to(np.asarray(band, dtype=np.uint16), VALUES.shape).copy()
+             for name, band in bands.items()}
+    return LocalImage({**bands, 'QA_PIXEL': np.full(VALUES.shape, CLEAR_WATER_QA, dtype=np.uint16)})
+
+
+SWEEPS = [('spm', 'SR_B5', dict(SR_B5=VALUES))]
+for other in (7280, 8000, 12000, 20000):
+    SWEEPS += [
+        ('ln_chl_a', f'SR_B3, SR_B2={other}', dict(SR_B2=other, SR_B3=VALUES)),
+        ('ln_chl_a', f'SR_B2, SR_B3={other}', dict(SR_B2=VALUES, SR_B3=other)),
+        ('salinity', f'SR_B1, SR_B2/B3={other}', dict(SR_B1=VALUES, SR_B2=other, SR_B3=other)),
+    ]
+SWEEPS.append(('salinity', 'SR_B1/B2/B3', dict(SR_B1=VALUES, SR_B2=VALUES[:, ::-1], SR_B3=np.roll(VALUES, 1000))))
+
+
+@pytest.fixture
+def unguarded(monkeypatch):
+    # Without the guards every pixel stays in float32; monkeypatch restores them whatever the test does
+    monkeypatch.setattr(local_functions, 'FLOAT32_GUARDS', {})
+
+
+def errors(product, bands):
+    swept = image(**bands)
+    expected = LocalImageFunctions('float64').fused_products(swept, (product,))[product]
+    result = LocalImageFunctions('float32').fused_products(swept, (product,))[product]
+    assert result.dtype == np.float32
+    finite = np.isfinite(expected)
+    assert np.array_equal(finite, np.isfinite(result)), 'NaN/inf pattern differs'
+    bound = ERROR_BOUNDS[product]['atol'] + ERROR_BOUNDS[product]['rtol'] * np.abs(expected[finite])
+    return np.abs(result[finite] - expected[finite]) / bound
+
+
+@pytest.mark.parametrize('product, label, bands', SWEEPS, ids=[f'{product} {label}' for product, label, _ in SWEEPS])
+def test_float32_within_error_bounds(product, label, bands):
+    assert errors(product, bands).max() <= 1
+
+
+@pytest.mark.parametrize('product, bands', [('spm', dict(SR_B5=VALUES)),
+                                            ('ln_chl_a', dict(SR_B2=8000, SR_B3=VALUES))], ids=['spm', 'ln_chl_a'])
+def test_guards_are_needed(product, bands, unguarded):
+    assert errors(product, bands).max() > 1
+
+
+def test_guards_are_restored():
+    assert local_functions.FLOAT32_GUARDS == GUARDS
@@ -0,0 +1,55 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from qa import QA_DECODER, QA_FLAGS, QA_MASKS
+
+VALUES = np.arange(1 << 16, dtype=np.uint16)
+
+# Every bit of every QA_PIXEL value, extracted one at a time: BITS[value, bit]
+BITS = (VALUES.astype(np.int64)[:, None] >> np.arange(16)) & 1
+
+
+def extract(start_bit, end_bit):
+    # Field of every QA_PIXEL value, summed from its single bits
+    return sum(BITS[:, bit] << (bit - start_bit) for bit in range(start_bit, end_bit + 1))
+
+
+def expected_flags():
+    flags = {name: extract(start_bit, end_bit) == value for name, (start_bit, end_bit, value) in QA_FLAGS.items()}
+    for name, conditions in QA_MASKS.items():
+        flags[name] = np.all([flags[flag] == state for flag, state in conditions], axis=0)
+    return flags
+
+
+EXPECTED = expected_flags()
+
+
+@pytest.mark.parametrize('name', list(QA_FLAGS) + list(QA_MASKS))
+def test_lut_and_mask_agree_with_bit_extraction(name):
+    assert np.array_equal((QA_DECODER.lut & QA_DECODER.bits[name]) != 0, EXPECTED[name])
+    assert np.array_equal(QA_DECODER.mask(VALUES, name), EXPECTED[name])
+    # Packed flags from decode give the same mask
+    assert np.array_equal(QA_DECODER.mask(QA_DECODER.decode(VALUES), name), EXPECTED[name])
+
+
+def test_every_flag_combination():
+    # Every value of every flag field, the other bits random, decoded in one array
+    fields = [(name, start_bit, range(1 << (end_bit - start_bit + 1)))
+              for name, (start_bit, end_bit, _) in QA_FLAGS.items()]
+    combinations = list(itertools.product(*(values for _, _, values in fields)))
+    used = sum(((1 << (end_bit - start_bit + 1)) - 1) << start_bit for start_bit, end_bit, _ in QA_FLAGS.values())
+    rng = np.random.default_rng(0)
+    qa = rng.integers(0, 1 << 16, len(combinations), dtype=np.uint16) & ~np.uint16(used)
+    for index, combination in enumerate(combinations):
+        for (_, start_bit, _), value in zip(fields, combination):
+            qa[index] |= value << start_bit
+
+    packed = QA_DECODER.decode(qa)
+    for index, combination in enumerate(combinations):
+        states = {name: value == QA_FLAGS[name][2] for (name, _, _), value in zip(fields, combination)}
+        for name, conditions in QA_MASKS.items():
+            states[name] = all(states[flag] == state for flag, state in conditions)
+        for name, state in states.items():
+            assert QA_DECODER.mask(packed[index:index + 1], name)[0] == state, (hex(qa[index]), name)
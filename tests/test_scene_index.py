@@ -0,0 +1,89 @@
+import datetime
+
+import pytest
+
+import pandas as pd
+
+import scene_index
+from fake_ee import FakeEarthEngine
+from scene_index import SceneIndex
+from time_series import ARCHIVE_START, date_windows
+
+COLLECTION = 'LANDSAT/LC08/C02/T1_L2'
+AOI_KEY = 'dff87eb29d9fc030'
+
+
+def time_start(date):
+    return int(datetime.datetime.fromisoformat(date).replace(tzinfo=datetime.timezone.utc).timestamp() * 1000)
+
+
+def scene(scene_id, date, usable_fraction):
+    # A row of the reduceColumns response: system:index, system:time_start, WRS_PATH, WRS_ROW, CLOUD_COVER,
+    # AOI_COVERAGE, USABLE_FRACTION
+    return [scene_id, time_start(date), 41, 36, 10.0, 0.6, usable_fraction]
+
+
+# Two adjacent rows of one path on 2013-04-01, each with a little clear water, and one clear scene
+FIRST_WINDOW = [scene('LC08_041036_20130401', '2013-04-01', 0.15), scene('LC08_041037_20130401', '2013-04-01', 0.15),
+                scene('LC08_041036_20130417', '2013-04-17', 0.25)]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    today = datetime.date.today()
+    windows = date_windows(ARCHIVE_START, (today + datetime.timedelta(days=1)).strftime('%Y-%m-%d'))
+    # The newest window holds a scene of last week, so a later update starts a few weeks back
+    recent = scene('LC08_041036_recent', (today - datetime.timedelta(days=7)).isoformat(), 0.5)
+    backend = FakeEarthEngine(responses={'reduceColumns.get.getInfo': [FIRST_WINDOW] + [[]] * (len(windows) - 2)
+                                         + [[recent]]})
+    monkeypatch.setattr(scene_index, 'ee', backend)
+    monkeypatch.setattr(scene_index, 'set_usable_fraction', lambda image, aoi, scale: image)
+    backend.windows = windows
+    return backend
+
+
+def test_first_update_pages_through_the_archive(backend, tmp_path):
+    index = SceneIndex(str(tmp_path / 'scenes.sqlite'))
+    assert index.update(COLLECTION, backend.Geometry(), AOI_KEY) == 4
+    assert backend.request_count == len(backend.windows)
+    assert backend.count('filterDate') == len(backend.windows)
+
+    backend.reset()
+    index.update(COLLECTION, backend.Geometry(), AOI_KEY)
+    assert backend.request_count == 1
+
+
+def test_interrupted_first_update_resumes_in_windows(backend, tmp_path, monkeypatch):
+    index = SceneIndex(str(tmp_path / 'scenes.sqlite'))
+    requests = iter(range(len(backend.windows)))
+
+    def timeout_on_the_third_request(name):
+        if next(requests) == 2:
+            raise TimeoutError('Computation timed out.')
+        return 0
+
+    backend.latency = timeout_on_the_third_request
+    with pytest.raises(TimeoutError):
+        index.update(COLLECTION, backend.Geometry(), AOI_KEY)
+    assert index.dates(COLLECTION, AOI_KEY) == ['2013-04-17', '2013-04-01']
+
+    windows = []
+
+    def recorded_windows(start, end, window_months=6):
+        windows.extend(date_windows(start, end, window_months))
+        return windows
+
+    backend.latency = 0
+    backend.reset()
+    monkeypatch.setattr(scene_index, 'date_windows', recorded_windows)
+    index.update(COLLECTION, backend.Geometry(), AOI_KEY)
+    assert windows[0][0] == ARCHIVE_START
+    assert backend.request_count == len(windows) > 1
+    assert all(pd.Timestamp(end) <= pd.Timestamp(start) + pd.DateOffset(months=6) for start, end in windows)
+
+
+def test_dates_take_the_best_scene_of_a_day(backend, tmp_path):
+    index = SceneIndex(str(tmp_path / 'scenes.sqlite'))
+    index.update(COLLECTION, backend.Geometry(), AOI_KEY)
+    assert index.dates(COLLECTION, AOI_KEY)[1:] == ['2013-04-17', '2013-04-01']
+    assert index.dates(COLLECTION, AOI_KEY, min_usable_fraction=0.2)[1:] == ['2013-04-17']
@@ -0,0 +1,118 @@
+import threading
+import types
+
+import pytest
+
+import shared_cache
+from fake_ee import FakeEarthEngine
+from shared_cache import SharedCache
+
+SESSIONS = 8
+
+
+class Clock:
+    # Stands in for time.monotonic, moved forward by the test
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(shared_cache, 'time', types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def map_id(backend):
+    return backend.Image().getMapId()['mapid']
+
+
+def concurrently(function, count=SESSIONS):
+    # Runs function from count threads released together, returns their results
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(index):
+        barrier.wait()
+        results[index] = function()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_concurrent_requests_compute_once():
+    backend = FakeEarthEngine(latency=0.2)
+    cache = SharedCache('test')
+    results = concurrently(lambda: cache.get_or_compute('chl 2024-08-01', lambda: map_id(backend)))
+    assert results == ['fake-1'] * SESSIONS
+    assert backend.request_count == 1
+    assert cache.metrics() == {'hits': 0, 'misses': 1, 'joined': SESSIONS - 1, 'evictions': 0,
+                               'expirations': 0, 'entries': 1, 'in_flight': 0}
+
+
+def test_failed_computation_is_shared_but_not_cached():
+    backend = FakeEarthEngine(latency=0.2)
+    cache = SharedCache('test')
+
+    def failing():
+        backend.Image().getInfo()
+        raise backend.EEException('Too many concurrent aggregations')
+
+    def request():
+        try:
+            return cache.get_or_compute('chl 2024-08-01', failing)
+        except backend.EEException as e:
+            return e
+
+    results = concurrently(request)
+    assert all(isinstance(result, backend.EEException) for result in results)
+    assert backend.request_count == 1
+    assert cache.metrics()['entries'] == cache.metrics()['in_flight'] == 0
+    # The next request computes again
+    assert cache.get_or_compute('chl 2024-08-01', lambda: map_id(backend)) == 'fake-1'
+    assert backend.request_count == 2
+
+
+def test_values_expire_after_ttl(clock):
+    backend = FakeEarthEngine()
+    cache = SharedCache('test', ttl=3600)
+    assert cache.get_or_compute('chl 2024-08-01', lambda: map_id(backend)) == 'fake-1'
+    clock.now += 3599
+    assert cache.get_or_compute('chl 2024-08-01', lambda: map_id(backend)) == 'fake-1'
+    clock.now += 1
+    assert cache.get_or_compute('chl 2024-08-01', lambda: map_id(backend)) == 'fake-2'
+    assert backend.request_count == 2
+    assert (cache.hits, cache.misses, cache.expirations) == (1, 2, 1)
+
+
+def test_least_recently_used_value_is_evicted():
+    backend = FakeEarthEngine()
+    cache = SharedCache('test', max_entries=2)
+    cache.get_or_compute('a', lambda: map_id(backend))
+    cache.get_or_compute('b', lambda: map_id(backend))
+    # Using 'a' makes 'b' the least recently used entry
+    cache.get_or_compute('a', lambda: map_id(backend))
+    cache.get_or_compute('c', lambda: map_id(backend))
+    assert backend.request_count == 3
+    assert cache.evictions == 1
+
+    assert cache.get_or_compute('a', lambda: map_id(backend)) == 'fake-1'
+    assert backend.request_count == 3
+    cache.get_or_compute('b', lambda: map_id(backend))
+    assert backend.request_count == 4
+
+
+def test_disabled_cache_computes_every_request():
+    backend = FakeEarthEngine(latency=0.05)
+    cache = SharedCache('test')
+    cache.enabled = False
+    concurrently(lambda: cache.get_or_compute('chl 2024-08-01', lambda: map_id(backend)))
+    assert backend.request_count == SESSIONS
+    assert cache.metrics()['entries'] == 0
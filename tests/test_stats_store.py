@@ -0,0 +1,57 @@
+import sqlite3
+
+import pytest
+
+from stats_store import EARTH_ENGINE, LOCAL, StatsStore
+from time_series import iter_time_series
+
+AOI_KEY = 'dff87eb29d9fc030'
+
+# A daily mosaic of the app and a downloaded scene of batch.py, acquired the same day
+MOSAIC_ROW = ('LC08_20211111', '2021-11-11', 1.5, 100.0)
+SCENE_ROW = ('LC08_041036_20211111', '2021-11-11', 2.5, 80.0)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StatsStore(str(tmp_path / 'statistics.sqlite'))
+    store.insert('ln_chl_a', AOI_KEY, [MOSAIC_ROW])
+    store.insert('ln_chl_a', AOI_KEY, [SCENE_ROW], LOCAL)
+    return store
+
+
+def test_sources_are_kept_apart(store):
+    assert store.known_scenes('ln_chl_a', AOI_KEY) == {'LC08_20211111'}
+    assert store.known_scenes('ln_chl_a', AOI_KEY, LOCAL) == {'LC08_041036_20211111'}
+    assert store.load('ln_chl_a', AOI_KEY, source=EARTH_ENGINE)['scene_id'].tolist() == ['LC08_20211111']
+    assert store.load('ln_chl_a', AOI_KEY, source=LOCAL)['ln_chl_a'].tolist() == [2.5]
+
+
+def test_same_scene_of_both_sources(store):
+    store.insert('ln_chl_a', AOI_KEY, [('LC08_041036_20211111', '2021-11-11', 3.5, 90.0)])
+    assert store.load('ln_chl_a', AOI_KEY, source=LOCAL)['ln_chl_a'].tolist() == [2.5]
+    assert sorted(store.load('ln_chl_a', AOI_KEY)['ln_chl_a']) == [1.5, 3.5]
+
+
+def test_time_series_reads_earth_engine_rows(store):
+    store.mark_window('LANDSAT/LC08/C02/T1_L2', 'ln_chl_a', AOI_KEY, '2021-07-01', '2022-01-01')
+    chunks = list(iter_time_series('ln_chl_a', None, None, AOI_KEY, start='2021-07-01', end='2022-01-01',
+                                   collections=('LANDSAT/LC08/C02/T1_L2',), store=store))
+    assert len(chunks) == 1
+    assert chunks[0]['scene_id'].tolist() == ['LC08_20211111']
+    assert chunks[0]['ln_chl_a'].tolist() == [1.5]
+
+
+def test_store_without_source_is_emptied(tmp_path):
+    path = str(tmp_path / 'statistics.sqlite')
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE statistics (scene_id TEXT, product TEXT, aoi_hash TEXT, algorithm_version TEXT, "
+                       "date TEXT, value REAL, area REAL)")
+    connection.execute("INSERT INTO statistics VALUES ('LC08_041036_20211111', 'ln_chl_a', ?, '1', '2021-11-11', "
+                       "2.5, 80.0)", (AOI_KEY,))
+    connection.commit()
+    connection.close()
+
+    store = StatsStore(path)
+    assert store.known_scenes('ln_chl_a', AOI_KEY) == set()
+    assert store.known_scenes('ln_chl_a', AOI_KEY, LOCAL) == set()
@@ -0,0 +1,62 @@
+import datetime
+
+import pytest
+
+import mosaic
+import prefilter
+import qa
+import stats_store
+import time_series
+from fake_ee import FakeEarthEngine
+from stats_store import StatsStore
+from time_series import iter_time_series
+
+AOI_KEY = 'dff87eb29d9fc030'
+COLLECTION = 'LANDSAT/LC08/C02/T1_L2'
+
+# Daily mosaics of a window too recent to be checkpointed, every run lists its days again
+TODAY = datetime.date.today()
+START = (TODAY - datetime.timedelta(days=20)).isoformat()
+DAYS = [('LC08_' + (TODAY - datetime.timedelta(days=days)).strftime('%Y%m%d'),
+         (TODAY - datetime.timedelta(days=days)).isoformat()) for days in (16, 7)]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    # The newer day is the only one with enough clear water, the older one is pre-filtered out
+    backend = FakeEarthEngine(responses={'aggregate_array.getInfo': [[scene_id for scene_id, _ in DAYS]],
+                                         'reduceColumns.get.getInfo': [[[DAYS[1][0], DAYS[1][1], 1.5, 100.0]]]})
+    for module in (mosaic, prefilter, qa, stats_store, time_series):
+        monkeypatch.setattr(module, 'ee', backend)
+    return backend
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StatsStore(str(tmp_path / 'statistics.sqlite'))
+
+
+def extract(backend, store):
+    return list(iter_time_series('ln_chl_a', lambda image: image, backend.Geometry(), AOI_KEY, start=START,
+                                 collections=(COLLECTION,), store=store))
+
+
+def test_stored_days_are_not_prefiltered_again(backend, store):
+    store.insert('ln_chl_a', AOI_KEY, [(DAYS[0][0], DAYS[0][1], None, None), (DAYS[1][0], DAYS[1][1], 1.5, 100.0)])
+    chunk, = extract(backend, store)
+    assert chunk['scene_id'].tolist() == [DAYS[1][0]]
+    # Only the scene list is asked, no QA reduction runs for the stored days
+    assert backend.request_count == 1
+    assert backend.count('reduceRegion') == 0
+
+
+def test_missing_days_are_prefiltered(backend, store):
+    chunk, = extract(backend, store)
+    assert chunk['scene_id'].tolist() == [DAYS[1][0]]
+    assert backend.request_count == 2
+    assert backend.count('reduceRegion') == 1
+    # The pre-filtered day is stored empty, so the next run asks for nothing but the scene list
+    assert store.known_scenes('ln_chl_a', AOI_KEY) == {scene_id for scene_id, _ in DAYS}
+    backend.reset()
+    extract(backend, store)
+    assert (backend.request_count, backend.count('reduceRegion')) == (1, 0)
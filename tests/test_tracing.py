@@ -0,0 +1,51 @@
+import pytest
+
+from tracing import TRACE_LOGGER, Tracer
+
+
+class Computed:
+    # Stands in for an ee.ComputedObject with its serialized graph and getInfo result
+    def __init__(self, graph, response):
+        self.graph = graph
+        self.response = response
+
+    def serialize(self):
+        return self.graph
+
+    def getInfo(self):
+        return self.response
+
+
+@pytest.fixture
+def logger_handlers():
+    handlers = list(TRACE_LOGGER.handlers)
+    yield
+    for handler in TRACE_LOGGER.handlers:
+        if handler not in handlers:
+            TRACE_LOGGER.removeHandler(handler)
+            handler.close()
+
+
+def test_get_info_records_request_and_response_sizes():
+    tracer = Tracer()
+    assert tracer.get_info(Computed('{"graph": 1}', [1, 2, 3]), 'scene_ids') == [1, 2, 3]
+    span, = tracer.spans()
+    assert span.attributes['request_bytes'] == len('{"graph": 1}')
+    assert span.attributes['payload_bytes'] == len('[1, 2, 3]')
+    call = tracer.summary()['calls']['scene_ids']
+    assert (call['request_bytes'], call['payload_bytes']) == (12, 9)
+
+
+def test_configure_twice_adds_one_handler(tmp_path, logger_handlers):
+    log_path = str(tmp_path / 'trace.jsonl')
+    before = len(TRACE_LOGGER.handlers)
+    tracer = Tracer()
+    tracer.configure(log_path)
+    tracer.configure(log_path)
+    Tracer().configure(log_path)
+    assert len(TRACE_LOGGER.handlers) == before + 1
+
+    with tracer.span('scene_ids'):
+        pass
+    with open(log_path) as log:
+        assert len(log.readlines()) == 1
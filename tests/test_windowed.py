@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+rasterio = pytest.importorskip('rasterio')
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from boundary import load_boundary
+from constants import STUDY_AREA_CRS
+from local_functions import LocalImage, LocalImageFunctions
+from windowed import WindowedProcessor, overview_factors
+
+SIZE = 600
+BANDS = ('QA_PIXEL', 'SR_B1', 'SR_B2', 'SR_B3', 'SR_B5')
+
+
+@pytest.fixture(scope='module')
+def scene_directory(tmp_path_factory):
+    # 30 m GeoTIFFs named like a Collection 2 scene, centred on the study boundary, roughly 70% clear water
+    directory = tmp_path_factory.mktemp('scene')
+    minx, miny, maxx, maxy = load_boundary().gdf.to_crs(STUDY_AREA_CRS).total_bounds
+    profile = {'driver': 'GTiff', 'width': SIZE, 'height': SIZE, 'count': 1, 'dtype': 'uint16',
+               'crs': STUDY_AREA_CRS, 'transform': from_origin((minx + maxx) / 2 - SIZE * 15,
+                                                               (miny + maxy) / 2 + SIZE * 15, 30, 30)}
+    rng = np.random.default_rng(0)
+    bands = {band: rng.integers(7300, 12000, (SIZE, SIZE), dtype=np.uint16) for band in BANDS[1:]}
+    bands['QA_PIXEL'] = np.where(rng.random((SIZE, SIZE)) < 0.7, 21952, 22280).astype(np.uint16)
+    for band in BANDS:
+        with rasterio.open(directory / f'LC08_L2SP_041036_20211111_{band}.TIF', 'w', **profile) as dst:
+            dst.write(bands[band], 1)
+    return str(directory)
+
+
+def single_pass(processor, directory):
+    # The whole scene read, clipped and reduced at once
+    image = LocalImage.from_directory(directory)
+    with rasterio.open(os.path.join(directory, 'LC08_L2SP_041036_20211111_QA_PIXEL.TIF')) as src:
+        clip = processor.clip_mask(Window(0, 0, src.width, src.height), src.transform, src.crs)
+    return LocalImageFunctions().fused_products(image.update_mask(clip), processor.products)
+
+
+def test_overview_factors_reach_one_tile():
+    assert overview_factors(100, 100) == [2]
+    assert overview_factors(512, 512) == [2]
+    assert overview_factors(7000, 7000) == [2, 4, 8, 16, 32]
+
+
+@pytest.mark.parametrize('block_size', [256, 1024])
+def test_windowed_output_matches_single_pass(scene_directory, tmp_path, block_size):
+    processor = WindowedProcessor(block_size=block_size)
+    output_path = str(tmp_path / 'products.tif')
+    statistics = processor.process(scene_directory, output_path)
+    expected = single_pass(processor, scene_directory)
+
+    with rasterio.open(output_path) as src:
+        # A scene no larger than one block still gets its overviews
+        assert src.block_shapes[0] == (block_size, block_size)
+        assert src.overviews(1) == overview_factors(SIZE, SIZE)
+        for index, product in enumerate(processor.products, start=1):
+            np.testing.assert_allclose(src.read(index), expected[product].astype(np.float32),
+                                       rtol=1e-6, equal_nan=True)
+    for product in processor.products:
+        valid = ~np.isnan(expected[product])
+        assert statistics[product]['count'] == int(valid.sum())
+        assert statistics[product]['mean'] == pytest.approx(float(expected[product][valid].mean()), rel=1e-5)
+    assert os.listdir(tmp_path) == ['products.tif']
+
+
+def test_temporary_files_are_removed_on_failure(scene_directory, tmp_path, monkeypatch):
+    processor = WindowedProcessor(block_size=256)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('copy failed')
+
+    monkeypatch.setattr(rasterio.shutil, 'copy', fail)
+    with pytest.raises(RuntimeError):
+        processor.process(scene_directory, str(tmp_path / 'products.tif'))
+    assert os.listdir(tmp_path) == []